@@ -0,0 +1,316 @@
+"""
+asyncio interface to the graphics displays.
+
+AsyncDisplay wraps a PyDisplay so that an event loop never waits on a
+display bus. Every draw call and commit() returns a future that completes
+once the change is on the screen:
+
+    display = AsyncDisplay(pydisplay.MakeDisplay('gu3900', bus='ser'))
+
+    display.begin()
+    display.text((0, 0), 'hello')
+    display.rectangle((0, 0, 63, 15), outline=1)
+    yield From(display.commit())    # in a trollius coroutine
+
+Drawing, packing and transfers run on an executor shared by every display
+on the same physical bus, so two displays on one parallel port take turns
+and displays on separate buses run side by side. Serial drivers that only
+ever write (GU3900Ser and GU7000Ser) go one step further: their bytes are
+written by the event loop itself whenever the port is ready for more. The
+USB Bit Whacker waits for a reply to each command, so it stays on the
+executor.
+
+To do that the AsyncDisplay takes over the serial driver: its write()
+queues for the event loop, and the port is put in non-blocking mode.
+Until close() hands them back, draw on the display only through the
+AsyncDisplay.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import os
+import errno
+import threading
+
+try:
+    import asyncio
+except ImportError:
+    try:
+        import trollius as asyncio # http://pypi.python.org/pypi/trollius
+    except ImportError:
+        asyncio = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor # futures on Python 2
+except ImportError:
+    ThreadPoolExecutor = None
+
+
+def busOf(device):
+    """
+    A key naming the physical bus a driver talks over: the serial port, the
+    parallel port device, or failing those the driver itself.
+    """
+    ser = getattr(device, '_ser', None)
+    if ser is None:
+        ser = getattr(getattr(device, 'ubw', None), 'serial', None)
+    if ser is not None:
+        return ('serial', getattr(ser, 'port', None) or id(ser))
+
+    fd = getattr(device, 'fd', None)
+    if fd is not None:
+        return ('parport', os.fstat(fd).st_rdev)
+
+    return ('device', id(device))
+
+
+_executors = {}
+_executorsLock = threading.Lock()
+
+def executor(bus):
+    """
+    The single-threaded executor that runs all I/O for a bus.
+    """
+    with _executorsLock:
+        if bus not in _executors:
+            _executors[bus] = ThreadPoolExecutor(1)
+        return _executors[bus]
+
+
+def _chain(loop, first, then):
+
+    # a future for then(), started once the future first has succeeded
+    result = asyncio.Future(loop=loop)
+
+    def copy(future):
+        if result.cancelled():
+            return
+        if future.cancelled():
+            result.cancel()
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+
+    def start(future):
+        if future.cancelled() or future.exception() is not None:
+            copy(future)
+        else:
+            then().add_done_callback(copy)
+
+    first.add_done_callback(start)
+    return result
+
+
+class LoopWriter(object):
+    """
+    Stands in for a serial driver's write(). Bytes written from any thread
+    are queued, and the event loop sends them when the port is writable.
+    """
+
+    def __init__(self, loop, ser):
+
+        import fcntl
+
+        self.loop = loop
+        self.fd = ser.fileno()
+        self._flags = fcntl.fcntl(self.fd, fcntl.F_GETFL)
+        fcntl.fcntl(self.fd, fcntl.F_SETFL, self._flags | os.O_NONBLOCK)
+
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._writing = False
+
+    def write(self, data):
+        with self._lock:
+            self._buffer += data
+        self.loop.call_soon_threadsafe(self._start)
+
+    def drain(self):
+        """
+        A future that completes once everything written so far is sent.
+        """
+        waiter = asyncio.Future(loop=self.loop)
+        if self._writing or self._buffer:
+            self._waiters.append(waiter)
+        else:
+            waiter.set_result(None)
+        return waiter
+
+    def _start(self):
+        if self._buffer and not self._writing:
+            self._writing = True
+            self.loop.add_writer(self.fd, self._ready)
+
+    def _ready(self):
+
+        with self._lock:
+            chunk = bytes(self._buffer[:4096])
+        try:
+            sent = os.write(self.fd, chunk)
+        except OSError, e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return
+            self._stop(e)
+            return
+
+        with self._lock:
+            del self._buffer[:sent]
+            empty = not self._buffer
+        if empty:
+            self._stop()
+
+    def close(self):
+        """
+        Put the port back in blocking mode, and send what's still queued
+        there and then.
+        """
+        import fcntl
+
+        if self._writing:
+            self.loop.remove_writer(self.fd)
+            self._writing = False
+        fcntl.fcntl(self.fd, fcntl.F_SETFL, self._flags)
+
+        with self._lock:
+            (data, self._buffer) = (bytes(self._buffer), bytearray())
+        while data:
+            data = data[os.write(self.fd, data):]
+        self._stop()
+
+    def _stop(self, error=None):
+
+        self.loop.remove_writer(self.fd)
+        self._writing = False
+        if error is not None:
+            with self._lock:
+                del self._buffer[:]
+
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if waiter.cancelled():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+
+class AsyncDisplay(object):
+
+    def __init__(self, display, loop=None, bus=None):
+        """
+        Wrap a PyDisplay. bus names the physical bus when busOf() can't tell
+        that two drivers share one.
+        """
+        assert asyncio is not None, 'asyncio not available'
+        assert ThreadPoolExecutor is not None, 'concurrent.futures not available'
+
+        self.display = display
+        self.W = display.W
+        self.H = display.H
+        self.loop = loop or asyncio.get_event_loop()
+
+        device = display.display
+        self.executor = executor(bus or busOf(device))
+
+        # let the event loop send the bytes of write-only serial drivers,
+        # until close()
+        self._writer = None
+        if getattr(device, '_ser', None) is not None:
+            self._writer = LoopWriter(self.loop, device._ser)
+            device.write = self._writer.write
+
+        self._ops = None
+        self._frame = None
+
+    def close(self):
+        """
+        Give the serial driver back its own write() and the port its
+        blocking mode, so the display can be used directly again. Call it
+        from the event loop, once the futures of the draw calls are done.
+        """
+        if self._writer is not None:
+            device = self.display.display
+            if device.__dict__.get('write') == self._writer.write:
+                del device.write
+            self._writer.close()
+            self._writer = None
+
+    def getImage(self):
+        return self.display.image
+
+    image = property(getImage)
+
+    def run(self, func, *args, **kwds):
+        """
+        Call func on the bus executor. Returns a future for its result,
+        complete once any bytes it wrote have left the serial port.
+        """
+        call = lambda: func(*args, **kwds)
+        future = self.loop.run_in_executor(self.executor, call)
+        if self._writer is None:
+            return future
+        return _chain(self.loop, future, self._writer.drain)
+
+    def begin(self):
+        """
+        Start collecting draw calls into a frame. They return the same
+        future as the commit() that sends them.
+        """
+        if self._ops is None:
+            self._ops = []
+            self._frame = asyncio.Future(loop=self.loop)
+        return self._frame
+
+    def commit(self):
+        """
+        Send the draw calls since begin() as a single frame.
+        """
+        (ops, frame) = (self._ops, self._frame)
+        assert ops is not None, 'commit() without begin()'
+        self._ops = self._frame = None
+
+        def draw():
+            with self.display.frame():
+                for (op, args, kwds) in ops:
+                    op(*args, **kwds)
+
+        self.run(draw).add_done_callback(lambda future: self._settle(frame, future))
+        return frame
+
+    def _settle(self, frame, future):
+        if frame.cancelled():
+            return
+        if future.cancelled():
+            frame.cancel()
+        elif future.exception() is not None:
+            frame.set_exception(future.exception())
+        else:
+            frame.set_result(None)
+
+    def flush(self):
+        """
+        A future that completes once the display has caught up.
+        """
+        return self.run(self.display.flush)
+
+    def _call(self, name, *args, **kwds):
+        op = getattr(self.display, name)
+        if self._ops is not None:
+            self._ops.append((op, args, kwds))
+            return self._frame
+        return self.run(op, *args, **kwds)
+
+    _drawops = ( 'bitmap', 'text', 'clear',
+                 'arc', 'chord', 'line', 'shape', 'pieslice', 'point', 'polygon',
+                 'rectangle', 'ellipse' )
+
+    for op in _drawops:
+        exec "def %s(self, *args, **keys): return self._call('%s', *args, **keys)" % (op, op)
@@ -0,0 +1,257 @@
+"""
+Animations played from driver calls recorded ahead of time.
+
+    (frames, durations) = animation.load('rain.gif')
+    rain = animation.Animation(display, frames, durations, xy=(200, 0))
+    rain.start()
+
+Drawing each frame with display.bitmap() dithers, diffs and packs it again
+on every pass of the loop. An Animation dithers the frames once, and then
+draws each of them on a stand-in for the display, which records the
+driver calls that take the screen from one frame to the next. Playing it
+replays those calls on the real driver, so a frame costs no more than
+sending its bytes.
+
+Frames are shown at their own durations, from the file or given. When a
+frame comes due before the one before it has been sent, it's skipped, and
+the next one is drawn the usual way to catch up. The recordings start from
+the screen as it was when they were made; if something else draws on the
+display, the next frame is drawn the usual way and the recordings made
+again from there. On a double buffered display each frame is recorded for
+the page it's drawn on, so an odd number of frames, which alternate pages
+from one loop to the next, replays every time round as well.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import copy
+import time
+import threading
+
+import Image
+
+import dither
+import metrics
+from pydisplay import PyDisplay
+from mirror import Recorder
+
+# what a refresh depends on besides the framebuffer, see _state()
+STATE = ( 'page', 'shown', 'origin', 'mirrored' )
+
+COUNTERS = ( 'refreshes', 'bytes', 'commands' )
+
+
+def load(path):
+    """
+    The frames of an animated GIF, or of any other image, and how long
+    each is shown in seconds.
+    """
+    image = Image.open(path)
+    frames = []
+    durations = []
+    try:
+        while True:
+            frames.append(image.convert('L'))
+            # browsers show frames with no duration for a tenth of a second
+            durations.append((image.info.get('duration') or 100) / 1000.0)
+            image.seek(image.tell() + 1)
+    except EOFError:
+        pass
+    return (frames, durations)
+
+
+def _state(display):
+
+    # the framebuffer and the page and scroll state of a display
+    state = dict([ (name, getattr(display, name)) for name in STATE if hasattr(display, name) ])
+    state['fb'] = display.fb.copy()
+    state['_stale'] = list(getattr(display, '_stale', []))
+    return state
+
+def _matches(display, state):
+
+    for (name, value) in state.items():
+        if name == 'fb':
+            if display.fb.data != value.data:
+                return False
+        elif getattr(display, name, []) != value:
+            return False
+    return True
+
+def _restore(display, state):
+
+    for (name, value) in state.items():
+        if name == 'fb':
+            display.fb = value.copy()
+        elif name == '_stale':
+            display._stale = list(value)
+        else:
+            setattr(display, name, value)
+    display._image = None
+
+
+class Animation(object):
+
+    def __init__(self, display, frames, durations=None, xy=(0, 0), fps=10, **options):
+        """
+        frames are images of any mode, dithered with the options of
+        dither.dither(), by default with method='bayer' which doesn't crawl
+        from frame to frame. durations are in seconds, by default 1/fps.
+        """
+        assert isinstance(display, PyDisplay) and display.display is not display, \
+               'animations need a display with a driver of its own'
+        options.setdefault('method', 'bayer')
+        self.display = display
+        self.xy = tuple(xy)
+        self.frames = [ dither.dither(frame, **options) for frame in frames ]
+        if durations is None:
+            durations = [ 1.0 / fps ] * len(frames)
+        self.durations = list(durations)
+        self.skipped = 0
+        self._steps = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def encode(self, first=0):
+        """
+        Record the driver calls from each frame to the next, starting from
+        the display as it is now, showing frame first.
+        """
+        display = self.display
+        n = len(self.frames)
+        with display.idle():
+            # a copy of the display whose driver records instead of sending
+            recorder = Recorder(display.display)
+            encoder = copy.copy(display)
+            encoder.display = recorder
+            encoder.metrics = recorder.metrics = metrics.Metrics('Animation' + display.__class__.__name__)
+            encoder._lock = threading.RLock()
+            encoder._pipeline = None
+            encoder._depth = 0
+            encoder._work = None
+            before = _state(display)
+            _restore(encoder, before)
+
+            # round the frames until they come back to a state already
+            # recorded: once, or twice when the page drawn on alternates,
+            # and one more frame if the display started out of step. After
+            # a skip that's just the frames back into the loop recorded
+            # before, unless there are too many to be all one loop.
+            steps = {}
+            if self._steps and sum(map(len, self._steps.values())) <= 3*n:
+                steps = dict([ (key, list(value)) for (key, value) in self._steps.items() ])
+            for i in xrange(first, first + 3*n):
+                key = (i % n, encoder.page)
+                if self._find(encoder, key, steps):
+                    break
+                counters = dict(encoder.metrics.counters)
+                encoder.bitmap(self.xy, self.frames[(i + 1) % n])
+                after = _state(encoder)
+                counts = [ (name, encoder.metrics.counters.get(name, 0) - counters.get(name, 0))
+                           for name in COUNTERS ]
+                steps.setdefault(key, []).append((before, recorder.take(), after, counts))
+                before = after
+            self._steps = steps
+
+    def _find(self, display, key, steps=None):
+
+        # the recording for a frame and page that starts from the display
+        # as it is, if there is one
+        if steps is None:
+            steps = self._steps or {}
+        for step in steps.get(key, []):
+            if _matches(display, step[0]):
+                return step
+        return None
+
+    def _step(self, i):
+
+        # replay the calls from frame i to the next, if the display is
+        # still as they expect
+        display = self.display
+        with display.idle():
+            step = self._find(display, (i, display.page))
+            if step is None:
+                return False
+            (before, calls, after, counts) = step
+            driver = display.display
+            t = time.time()
+            for (name, args, kwds) in calls:
+                getattr(driver, name)(*args, **kwds)
+            _restore(display, after)
+            display.metrics.observe('transfer', time.time() - t)
+            for (name, n) in counts:
+                display.metrics.count(name, n)
+            if calls:
+                display.metrics.frame()
+        return True
+
+    def show(self, k, last=None):
+        """
+        Put frame k on the display; last is the frame on it now, if known.
+        """
+        n = len(self.frames)
+        if self._steps and last is not None and (last + 1) % n == k and self._step(last):
+            return
+
+        # after a skip, or when something else has drawn on the display
+        display = self.display
+        display.bitmap(self.xy, self.frames[k])
+        with display.idle():
+            if self._find(display, (k, display.page)) is None:
+                self.encode(k)
+
+    def play(self, loops=1):
+        """
+        Play the frames loops times, or with None until stop().
+        """
+        n = len(self.frames)
+        total = None
+        if loops is not None:
+            total = loops * n
+
+        f = 0
+        last = None
+        due = time.time()
+        while (total is None or f < total) and not self._stopping.isSet():
+            k = f % n
+
+            # too late for this frame already, but always show the last
+            if time.time() >= due + self.durations[k] and (total is None or f + 1 < total):
+                due += self.durations[k]
+                f += 1
+                self.skipped += 1
+                self.display.metrics.count('skipped')
+                continue
+
+            delay = due - time.time()
+            if delay > 0:
+                self._stopping.wait(delay)
+                if self._stopping.isSet():
+                    break
+
+            self.show(k, last)
+            last = k
+            due += self.durations[k]
+            f += 1
+
+    def start(self, loops=None):
+        """
+        Play in the background, by default until stop().
+        """
+        self.stop()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.play, args=(loops,))
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
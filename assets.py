@@ -0,0 +1,264 @@
+"""
+Compiled bitmap assets, kept in a file that's mapped into memory.
+
+Icons and pictures are loaded, resized and dithered once, and the result
+kept ready packed in all three display memory layouts:
+
+    icon = assets.load('mail.gif', (32, 32), invert=True)
+    display.bitmap((0, 0), icon)
+
+The options are those of dither.dither(). An asset's pixels are buffers
+straight onto the asset file, so a lookup copies nothing:
+
+    rows     - row bytes, as a mode '1' tostring(), what a framebuffer holds
+    columns  - column bytes, as bitpack.columns()
+    pages    - page bytes as a list of strings, as bitpack.pages()
+
+PyDisplay.bitmap() puts the rows of an asset straight into the
+framebuffer when it lands on whole bytes, without PIL, and image gives it
+as a PIL image for anything else. Assets are kept by the source file's
+path, the size and the options, and compiled again when the file changes.
+
+A new asset is appended to the file with a new index after it, and the
+header pointed at that index last, so a reader always finds a whole
+index, and assets already mapped are never moved. Once more than half the
+file is old indexes and replaced assets it's written afresh.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import os
+import mmap
+import struct
+import threading
+import cPickle as pickle
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Windows: saves aren't locked against other processes
+
+import Image
+
+import bitpack
+import dither
+
+# the compiled assets, None to keep them in memory only
+CACHE = os.path.join(os.path.expanduser('~'), '.pydisplay-assets')
+
+# magic, then the offset and length of the pickled index at the end
+MAGIC = 'PDASSET1'
+HEADER = struct.Struct('<8sII')
+
+_lock = threading.RLock()
+_assets = None          # (path, size, options) -> (mtime, Asset)
+
+
+class Asset(object):
+
+    def __init__(self, size, data):
+        (W, H) = size
+        self.size = size
+        self.data = data
+        # the three layouts one after another
+        n = (W + 7) / 8 * H
+        m = (H + 7) / 8 * W
+        self.rows = buffer(data, 0, n)
+        self.columns = buffer(data, n, m)
+        self._pages = buffer(data, n + m, m)
+
+    def getPages(self):
+        W = self.size[0]
+        return [ buffer(self._pages, i, W) for i in xrange(0, len(self._pages), W) ]
+
+    pages = property(getPages)
+
+    def packed(self, axis=None):
+        """
+        The layout for a display's axis, with the pages one after another
+        as from dither.pack().
+        """
+        if axis == 'columns':
+            return self.columns
+        if axis == 'pages':
+            return self._pages
+        return self.rows
+
+    def getImage(self):
+        return Image.fromstring('1', self.size, str(self.rows))
+
+    image = property(getImage)
+
+
+def load(path, size=None, resample=Image.ANTIALIAS, **options):
+    """
+    The asset compiled from an image file, resized to size with the PIL
+    filter resample if it's given, and dithered with the options of
+    dither.dither(). For crisp icons resize with Image.NEAREST and
+    threshold with method='none'.
+    """
+    filename = os.path.abspath(path)
+    mtime = os.path.getmtime(filename)
+    if size is not None:
+        size = tuple(size)
+    key = (filename, size, tuple(sorted(options.items() + [ ('resample', resample) ])))
+
+    with _lock:
+        assets = _load()
+        if key in assets and assets[key][0] == mtime:
+            return assets[key][1]
+
+    asset = make(filename, size, resample, **options)
+
+    with _lock:
+        _assets[key] = (mtime, asset)
+        _save(key, mtime, asset)
+        return asset
+
+
+def make(path, size=None, resample=Image.ANTIALIAS, **options):
+    """
+    An asset made afresh from an image file, not kept.
+    """
+    image = Image.open(path).convert('L')
+    if size is not None and image.size != size:
+        image = image.resize(size, resample)
+    bitmap = dither.dither(image, **options)
+    (W, H) = bitmap.size
+    data = bitmap.tostring()
+    data = data + bitpack.columns(data, W, H) + ''.join(bitpack.pages(data, W, H))
+    return Asset(bitmap.size, data)
+
+
+def _read(filename):
+
+    # the assets in a file, mapped; Windows can't replace a file that's
+    # mapped, so there it's read in
+    with open(filename, 'rb') as f:
+        if os.name == 'nt':
+            data = f.read()
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, offset, length) = HEADER.unpack(data[:HEADER.size])
+    assert magic == MAGIC, 'not an asset file'
+    index = pickle.loads(data[offset:offset+length])
+    assets = {}
+    for (key, (mtime, size, offset, length)) in index.items():
+        assets[key] = (mtime, Asset(size, buffer(data, offset, length)))
+    return assets
+
+
+def _load():
+
+    # map the asset file the first time it's needed
+    global _assets
+    if _assets is None:
+        _assets = {}
+        if CACHE and os.path.exists(CACHE):
+            try:
+                _assets = _read(CACHE)
+            except Exception, e:
+                print 'ignoring asset cache %s: %s' % (CACHE, e)
+    return _assets
+
+
+def _save(key, mtime, asset):
+
+    # append the asset and a new index to the file, as it is on disk now
+    # since other programs may have added to it too
+    if not CACHE:
+        return
+    try:
+        f = _open()
+        try:
+            index = _index(f)
+            if index is None:
+                # not an asset file, or a broken one: start a new one
+                f.close()
+                _write(CACHE, {}, None)
+                f = _open()
+                index = {}
+
+            f.seek(0, 2)
+            end = f.tell()
+            f.write(asset.data)
+            index[key] = (mtime, asset.size, end, len(asset.data))
+            table = pickle.dumps(index, pickle.HIGHEST_PROTOCOL)
+            f.write(table)
+            f.flush()
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, end + len(asset.data), len(table)))
+
+            live = sum([ entry[3] for entry in index.values() ])
+            if live < (end + len(asset.data)) / 2:
+                _compact(f, index)
+        finally:
+            f.close()
+    except (IOError, OSError), e:
+        print 'can\'t save asset cache %s: %s' % (CACHE, e)
+
+
+def _index(f):
+
+    # the index of an open asset file, or None if it isn't one
+    try:
+        (magic, offset, length) = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            return None
+        f.seek(offset)
+        return pickle.loads(f.read(length))
+    except Exception:
+        return None
+
+
+def _open():
+
+    # the asset file, made empty if there isn't one, and locked; if another
+    # program wrote a new one while this waited for the lock, that one
+    if not os.path.exists(CACHE):
+        _write(CACHE, {}, None)
+    while True:
+        f = open(CACHE, 'r+b')
+        if fcntl is None:
+            return f
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        if os.path.exists(CACHE) and os.fstat(f.fileno()).st_ino == os.stat(CACHE).st_ino:
+            return f
+        f.close()
+
+
+def _write(filename, index, source):
+
+    # a file with the assets of an index copied from source, written aside
+    # and renamed so a reader never sees half of it. Assets whose image
+    # file has gone are dropped.
+    with open(filename + '.new', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        offset = HEADER.size
+        table = {}
+        for (key, (mtime, size, start, length)) in index.items():
+            if not os.path.exists(key[0]):
+                continue
+            source.seek(start)
+            f.write(source.read(length))
+            table[key] = (mtime, size, offset, length)
+            offset += length
+        data = pickle.dumps(table, pickle.HIGHEST_PROTOCOL)
+        f.write(data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, offset, len(data)))
+    if os.name == 'nt' and os.path.exists(filename):
+        os.remove(filename)
+    os.rename(filename + '.new', filename)
+
+
+def _compact(f, index):
+
+    # write the file afresh with just the assets in use; those mapped here
+    # keep the old file's pages
+    _write(CACHE, index, f)
@@ -115,10 +115,15 @@ try:
     #        os.write(self.fd, data)
     
     import parallel
+    import busprogram
     import time
     
     class GD120C280Par(GD120C280):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 40e-6    # cursor position
+        byteCost    = 80e-6    # a byte per pixel, BUSY polling
+        
         def __init__(self, dev=0):
             
             self.W = 280
@@ -134,9 +139,27 @@ try:
             self.getBUSY = p.getInBusy      # pin 11
             
             self.setData = p.setData        # pins 2-9
+            
+            # run the byte loop in C if the library is installed
+            try:
+                self.write = self.program(p).bind()
+                print 'gd120c280: using fast I/O library'
+            except:
+                print 'gd120c280: fast I/O library not available, using pyparallel'
                 
             self.init()
         
+        def program(self, p):
+            
+            program = busprogram.Program(p)
+            program.literal(self.setData, 0)
+            program.loop()
+            program.data(self.setData)
+            program.wait(self.getBUSY, False)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+        
         def write(self, data):
             
             oldbyte = 0
@@ -0,0 +1,225 @@
+"""
+Refresh throughput benchmarks, run against every driver on the fake buses
+from virtual.py.
+
+    python benchmark.py [-n updates] [-d driver] [-s scenario] [-o results.json]
+
+For each driver and scenario it reports updates per second, bytes and
+commands sent per update, and the CPU time Python spends per update. The
+bytes are counted on the fake bus, so they include each controller's
+command overhead; commands are the separate writes the cost model
+counts. -o writes the results as JSON, for comparing versions.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import virtual
+virtual.install()
+
+import os
+import sys
+import time
+import random
+import optparse
+
+import Image
+from ImageDraw import Draw
+import ImageFont
+
+import pydisplay
+import truchet
+
+try:
+    import json
+except ImportError:
+    import simplejson as json # http://pypi.python.org/pypi/simplejson
+
+
+# name, MakeDisplay arguments
+DRIVERS = [ ('virtual',       ('virtual',),     {}),
+            ('ks0108-par',    ('ks0108',),      { 'bus' : 'par' }),
+            ('ks0108-usb',    ('ks0108',),      { 'bus' : 'usb' }),
+            ('sed1330-par',   ('sed1330',),     { 'bus' : 'par', 'W' : 160, 'H' : 80 }),
+            ('sed1330-usb',   ('sed1330',),     { 'bus' : 'usb', 'W' : 160, 'H' : 80 }),
+            ('sed1520',       ('sed1520',),     {}),
+            ('t6963c',        ('t6963c',),      { 'W' : 128, 'H' : 64 }),
+            ('gu300',         ('gu300',),       { 'W' : 256, 'H' : 64 }),
+            ('gu311',         ('gu311',),       {}),
+            ('gu3900-par',    ('gu3900',),      { 'bus' : 'par' }),
+            ('gu3900-ser',    ('gu3900',),      { 'bus' : 'ser' }),
+            ('gu3900-usb',    ('gu3900',),      { 'bus' : 'usb' }),
+            ('gu3900dma',     ('gu3900dma',),   {}),
+            ('gu7000-par',    ('gu7000',),      { 'bus' : 'par' }),
+            ('el320_240',     ('el320_240',),   { 'bus' : 'par' }),
+            ('el640_200sk',   ('el640_200sk',), { 'bus' : 'par' }),
+            ('gd120c280',     ('gd120c280',),   {}) ]
+
+
+#____ scenarios _________________________________________________________________
+
+def tiles(display, rng):
+    """
+    Random 8x8 truchet tiles at random places, as truchet.py draws them.
+    """
+    (W, H) = (display.W, display.H)
+    tiles = [ Image.fromstring('1', (8, 8), tile) for pair in truchet.patterns for tile in pair ]
+    while True:
+        xy = (rng.randrange(0, W, 8), rng.randrange(0, H, 8))
+        display.bitmap(xy, rng.choice(tiles))
+        yield None
+
+def fullscreen(display, rng):
+    """
+    Whole screens of tiles at once.
+    """
+    (W, H) = (display.W, display.H)
+    tiles = [ Image.fromstring('1', (8, 8), tile) for tile in rng.choice(truchet.patterns) ]
+    while True:
+        image = Image.new('1', (W, H))
+        for x in xrange(0, W, 8):
+            for y in xrange(0, H, 8):
+                image.paste(rng.choice(tiles), (x, y))
+        display.bitmap((0, 0), image)
+        yield None
+
+def ticker(display, rng):
+    """
+    A line of text scrolling two pixels at a time along the bottom of the
+    screen, as the widget script tickers do.
+    """
+    (W, H) = (display.W, display.H)
+    font = ImageFont.load_default()
+    text = 'The quick brown fox jumps over the lazy dog. ' * 4
+    (w, h) = font.getsize(text)
+    strip = Image.new('1', (w + W, h))
+    Draw(strip).text((W, 0), text, font=font, fill=1)
+    offset = 0
+    while True:
+        display.bitmap((0, H - h), strip.crop((offset, 0, offset + W, h)))
+        offset = (offset + 2) % w
+        yield None
+
+def credits(display, rng):
+    """
+    Lines of text rolling up the whole screen a pixel at a time, through
+    scroll(), which the controllers that can do it themselves.
+    """
+    (W, H) = (display.W, display.H)
+    font = ImageFont.load_default()
+    (w, h) = font.getsize('Mg')
+    lines = [ 'line %d of the credits' % i for i in xrange(32) ]
+    roll = Image.new('1', (W, len(lines) * (h + 2)))
+    for (i, line) in enumerate(lines):
+        Draw(roll).text((2, i * (h + 2)), line, font=font, fill=1)
+    row = 0
+    while True:
+        with display.frame():
+            display.scroll(0, -1)
+            display.bitmap((0, H - 1), roll.crop((0, row, W, row + 1)))
+        row = (row + 1) % roll.size[1]
+        yield None
+
+def text(display, rng):
+    """
+    A clock ticking in the corner, as the Clock widget draws it.
+    """
+    font = ImageFont.load_default()
+    (w, h) = font.getsize('00:00:00')
+    second = 0
+    while True:
+        label = '%02d:%02d:%02d' % (second / 3600 % 24, second / 60 % 60, second % 60)
+        with display.frame():
+            display.rectangle((0, 0, w, h), fill=0)
+            display.text((0, 0), label, font=font, fill=1)
+        second += 1
+        yield None
+
+SCENARIOS = [ ('tiles', tiles), ('fullscreen', fullscreen), ('ticker', ticker), ('credits', credits),
+              ('text', text) ]
+
+
+#____ harness ___________________________________________________________________
+
+def cpu():
+    (user, system) = os.times()[:2]
+    return user + system
+
+def run(name, args, kwds, scenarios, updates, seed=0):
+    """
+    Benchmark one driver. Returns a list of result dicts, one per scenario.
+    """
+    first = len(virtual.transports)
+    display = pydisplay.MakeDisplay(*args, **kwds)
+    buses = virtual.transports[first:]
+
+    results = []
+    for (scenario, make) in scenarios:
+
+        display.clear()
+        for bus in buses:
+            bus.reset()
+        commands = display.metrics.snapshot().get('commands', 0)
+
+        steps = make(display, random.Random(seed))
+        (t, c) = (time.time(), cpu())
+        for i in xrange(updates):
+            steps.next()
+        (t, c) = (time.time() - t, cpu() - c)
+
+        nbytes = sum([ len(bus.written()) for bus in buses ])
+        commands = display.metrics.snapshot().get('commands', 0) - commands
+        results.append({ 'driver'              : name,
+                         'scenario'            : scenario,
+                         'updates'             : updates,
+                         'ops_per_sec'         : updates / max(t, 1e-9),
+                         'bytes_per_update'    : float(nbytes) / updates,
+                         'commands_per_update' : float(commands) / updates,
+                         'cpu_per_update'      : c / updates })
+        for bus in buses:
+            bus.reset()
+
+    return results
+
+def main(argv):
+
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', '--updates', type='int', default=200,
+                      help='updates per scenario [%default]')
+    parser.add_option('-d', '--driver', action='append', default=[],
+                      help='only this driver, may be repeated')
+    parser.add_option('-s', '--scenario', action='append', default=[],
+                      help='only this scenario, may be repeated')
+    parser.add_option('-o', '--output', help='write the results to a JSON file')
+    (options, args) = parser.parse_args(argv)
+
+    drivers = [ d for d in DRIVERS if not options.driver or d[0] in options.driver ]
+    scenarios = [ s for s in SCENARIOS if not options.scenario or s[0] in options.scenario ]
+
+    print '%-14s %-11s %10s %10s %10s %10s' % \
+          ('driver', 'scenario', 'updates/s', 'bytes/up', 'cmds/up', 'cpu ms/up')
+    results = []
+    for (name, args, kwds) in drivers:
+        for result in run(name, args, kwds, scenarios, options.updates):
+            print '%-14s %-11s %10.1f %10.1f %10.2f %10.3f' % \
+                  (name, result['scenario'], result['ops_per_sec'], result['bytes_per_update'],
+                   result['commands_per_update'], result['cpu_per_update'] * 1000)
+            results.append(result)
+
+    if options.output:
+        f = open(options.output, 'w')
+        try:
+            json.dump({ 'time'    : time.time(),
+                        'python'  : sys.version.split()[0],
+                        'updates' : options.updates,
+                        'results' : results }, f, indent=1)
+        finally:
+            f.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
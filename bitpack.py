@@ -0,0 +1,137 @@
+"""
+Conversions from packed row-major bitmaps to controller memory layouts.
+
+The input is always one bit per pixel, row by row, most significant bit
+leftmost, each row padded to a whole byte: a PIL mode '1' tostring(), or
+the contents of a framebuffer.Framebuffer.
+
+With NumPy installed, every 8x8 block of pixels is transposed at once by
+looking up each of its rows in a table of 64-bit words and ORing them
+together. Without it, PIL does the rotation, a band at a time.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import Image
+
+try:
+    import numpy # http://numpy.scipy.org
+except ImportError:
+    numpy = None
+
+
+def _table(topbit):
+
+    # table[r][v] places the 8 pixels of byte v from row r of an 8x8 block
+    # into a 64-bit word holding the block's 8 columns, first column in the
+    # top byte, and row r at bit topbit(r) of each column
+    table = [ [ 0L ] * 256 for r in xrange(8) ]
+    for r in xrange(8):
+        for v in xrange(256):
+            word = 0L
+            for c in xrange(8):
+                if v & (0x80 >> c):
+                    word |= 1L << ((7-c)*8 + topbit(r))
+            table[r][v] = word
+    return numpy.array(table, dtype='>u8')
+
+if numpy is not None:
+    _msbtop = _table(lambda r: 7-r)   # top pixel in bit 7
+    _lsbtop = _table(lambda r: r)     # top pixel in bit 0
+
+
+def _blocks(data, W, H, table):
+
+    # (H+7)/8 bands of 8*stride column bytes
+    stride = (W + 7) / 8
+    n = (H + 7) / 8
+    rows = numpy.frombuffer(str(data), numpy.uint8)
+    if n*8 != H:
+        rows = numpy.concatenate((rows, numpy.zeros(stride * (n*8 - H), numpy.uint8)))
+    rows = rows.reshape(n, 8, stride)
+
+    words = table[0][rows[:, 0, :]]
+    for r in xrange(1, 8):
+        words |= table[r][rows[:, r, :]]
+    return words.astype('>u8').view(numpy.uint8).reshape(n, stride*8)
+
+
+def columns(data, W, H):
+    """
+    Convert a W x H bitmap to vertical byte columns, the layout used by the
+    GU3900, GU300, GU7000 and GD120C280: for each column left to right,
+    (H+7)/8 bytes from top to bottom, top pixel in the most significant bit.
+    """
+    if numpy is not None:
+        bands = _blocks(data, W, H, _msbtop)
+        return numpy.ascontiguousarray(bands.T[:W]).tostring()
+
+    image = Image.fromstring('1', (W, H), str(data))
+    image = image.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
+    return image.tostring()
+
+
+def pages(data, W, H):
+    """
+    Convert a W x H bitmap to 8-pixel pages, the layout used by the KS0108,
+    SED1520 and GU311: a list of (H+7)/8 strings from the top down, each
+    holding W bytes from left to right, top pixel in the least significant
+    bit.
+    """
+    if numpy is not None:
+        bands = _blocks(data, W, H, _lsbtop)
+        return [ band[:W].tostring() for band in bands ]
+
+    image = Image.fromstring('1', (W, H), str(data))
+    result = []
+    for y in xrange(0, H, 8):
+        band = image.crop((0, y, W, y+8)).transpose(Image.ROTATE_270)
+        result.append(band.tostring())
+    return result
+
+
+if __name__ == '__main__':
+
+    # compare with rotating images through PIL, as the refresh code used to
+
+    import random
+    import time
+
+    def pil(data, W, H):
+        image = Image.fromstring('1', (W, H), data)
+        image = image.crop((0, 0, W, H))
+        image = image.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
+        return image.tostring()
+
+    def chunks(data, W, H):
+        image = Image.fromstring('1', (W, H), data)
+        result = []
+        for y in xrange(0, H, 8):
+            update = ''
+            for x in xrange(0, W, 8):
+                update += image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270).tostring()
+            result.append(update[:W])
+        return result
+
+    print 'packing with%s NumPy' % ('out', '')[numpy is not None]
+
+    for (W, H, pack, old) in [ (140, 16, columns, pil), (256, 64, columns, pil),
+                               (280, 120, columns, pil), (320, 240, columns, pil),
+                               (122, 32, pages, chunks), (128, 64, pages, chunks) ]:
+
+        stride = (W + 7) / 8
+        data = ''.join([ chr(random.randint(0, 255)) for i in xrange(stride*H) ])
+        assert pack(data, W, H) == old(data, W, H)
+
+        for (name, f) in [ ('PIL', old), (pack.__name__, pack) ]:
+            count = 0
+            t = time.time()
+            while time.time() - t < 1.0:
+                f(data, W, H)
+                count += 1
+            rate = count / (time.time() - t)
+            print '%4dx%-4d %-8s %8.1f frames/s %8.2f MB/s' % \
+                  (W, H, name, rate, rate * stride * H / 1e6)
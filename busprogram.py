@@ -0,0 +1,137 @@
+"""
+Bus programs: the pin wiggling of parallel port drivers, run in C.
+
+A driver describes how it sends bytes, in terms of its own wiring, once
+when it starts:
+
+    write = busprogram.Program(p)
+    write.set(self.setCS, 0)
+    write.set(self.setA0, 0)
+    write.loop()
+    write.data(self.setData)
+    write.pulse(self.setWR, 0)
+    write.next()
+    self.sendData = write.bind()
+
+Each step names one of the driver's pyparallel methods, so the program
+follows whatever pins they've been wired to. It compiles to bytecode that
+bus_run() in the _pydisplay library executes for a whole string at a
+time, instead of a Python call per pin change. The part between loop()
+and next() runs once per byte of the string.
+
+bind() raises if the library isn't installed, and set() and the others
+raise ValueError for a method that isn't a line of the port; drivers then
+keep their pyparallel loops.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+# instructions, as in pydisplay.c
+(DATA, LITERAL, CONTROL, WAIT, DELAY, LOOP, NEXT) = range(1, 8)
+
+# pyparallel's lines: the register bit of each in linux/parport.h, and
+# whether the port inverts it, which pyparallel hides
+OUTPUTS = { 'setDataStrobe':    (0x01, True),
+            'setAutoFeed':      (0x02, True),
+            'setInitOut':       (0x04, False),
+            'setSelect':        (0x08, True) }
+
+INPUTS = { 'getInError':        (0x08, False),
+           'getInSelected':     (0x10, False),
+           'getInPaperOut':     (0x20, False),
+           'getInAcknowledge':  (0x40, False),
+           'getInBusy':         (0x80, True) }
+
+_library = None
+
+
+def library():
+    """
+    The C library, loaded the first time it's needed. Raises if it isn't
+    installed.
+    """
+    global _library
+    if _library is None:
+        from ctypes import cdll
+        from sys import prefix
+        _library = cdll.LoadLibrary(prefix + '/lib/python/site-packages/_pydisplay.so')
+    return _library
+
+
+class Program(object):
+
+    def __init__(self, port):
+        self.port = port
+        self.code = []
+
+    def _line(self, method, level, lines):
+
+        # the register bit a driver's method sets or reads, and its value
+        # for a level of the line
+        for (name, (bit, inverted)) in lines.items():
+            if method == getattr(self.port, name, None):
+                return (bit, (bool(level) != inverted) and bit or 0)
+        raise ValueError('%r is not a line of the port' % method)
+
+    def set(self, method, level):
+        """
+        Set an output line, as method(level) would.
+        """
+        self.code += [ CONTROL ] + list(self._line(method, level, OUTPUTS))
+
+    def pulse(self, method, level):
+        """
+        Take an output line to level and back.
+        """
+        self.set(method, level)
+        self.set(method, not level)
+
+    def wait(self, method, level):
+        """
+        Wait until an input line reads level, as method() would.
+        """
+        self.code += [ WAIT ] + list(self._line(method, level, INPUTS))
+
+    def data(self, method):
+        """
+        Put the next byte of the string on the data lines.
+        """
+        if method != self.port.setData:
+            raise ValueError('%r is not the data lines of the port' % method)
+        self.code.append(DATA)
+
+    def literal(self, method, value):
+        """
+        Put a byte on the data lines, as method(value) would.
+        """
+        if method != self.port.setData:
+            raise ValueError('%r is not the data lines of the port' % method)
+        self.code += [ LITERAL, value & 0xFF ]
+
+    def delay(self, microseconds):
+        assert 0 <= microseconds < 0x10000, 'delay out of range'
+        self.code += [ DELAY, microseconds & 0xFF, microseconds >> 8 ]
+
+    def loop(self):
+        self.code.append(LOOP)
+
+    def next(self):
+        self.code.append(NEXT)
+
+    def tostring(self):
+        return ''.join(map(chr, self.code))
+
+    def bind(self):
+        """
+        A function sending a string through the program.
+        """
+        run = library().bus_run
+        fd = self.port._fd
+        code = self.tostring()
+        def send(data=''):
+            if run(fd, code, len(code), data, len(data)) < 0:
+                raise IOError('bus program failed')
+        return send
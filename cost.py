@@ -0,0 +1,80 @@
+"""
+Transfer cost model for display buses.
+
+Drivers describe their bus with two numbers: the time to set up a write
+(commandCost, e.g. moving the cursor and issuing a write opcode) and the
+time to send each byte of pixel data (byteCost), both in seconds. The
+graphics interface uses them to decide how to split a refresh.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+# used for drivers that don't describe their bus
+DEFAULT_COMMAND_COST = 100e-6
+DEFAULT_BYTE_COST    = 10e-6
+
+
+class BusCost(object):
+
+    def __init__(self, command=DEFAULT_COMMAND_COST, byte=DEFAULT_BYTE_COST):
+
+        self.command = command
+        self.byte = byte
+        self.reset()
+
+    def forDevice(cls, device):
+        """
+        Make a cost model from a driver's commandCost and byteCost.
+        """
+        return cls(getattr(device, 'commandCost', DEFAULT_COMMAND_COST),
+                   getattr(device, 'byteCost', DEFAULT_BYTE_COST))
+    forDevice = classmethod(forDevice)
+
+    def estimate(self, nbytes, commands=1):
+        """
+        Estimated seconds to send nbytes of data in the given number of writes.
+        """
+        return commands * self.command + nbytes * self.byte
+
+    def reset(self):
+        """
+        Forget all recorded measurements.
+        """
+        self._samples = 0
+        self._cc = self._cb = self._bb = self._ct = self._bt = 0.0
+
+    def record(self, nbytes, commands, seconds):
+        """
+        Record a measured transfer for calibrate().
+        """
+        self._samples += 1
+        self._cc += commands * commands
+        self._cb += commands * nbytes
+        self._bb += nbytes * nbytes
+        self._ct += commands * seconds
+        self._bt += nbytes * seconds
+
+    def calibrate(self):
+        """
+        Fit the command and byte costs to the recorded measurements by least
+        squares. Returns False, leaving the costs alone, if the measurements
+        can't separate the two.
+        """
+        det = self._cc * self._bb - self._cb * self._cb
+        if self._samples < 2 or abs(det) < 1e-9 * self._cc * self._bb:
+            return False
+
+        command = (self._ct * self._bb - self._bt * self._cb) / det
+        byte    = (self._bt * self._cc - self._ct * self._cb) / det
+
+        # noisy measurements can push one term below zero
+        self.command = max(command, 0.0)
+        self.byte = max(byte, 1e-9)
+        return True
+
+    def __repr__(self):
+
+        return 'BusCost(command=%g, byte=%g)' % (self.command, self.byte)
@@ -0,0 +1,132 @@
+"""
+Damage tracking for the graphics interface.
+
+A damage box is a (left, top, right, bottom) tuple in screen pixels, with
+the right and bottom edges exclusive, the same convention as PIL's getbbox().
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+
+def union(a, b):
+
+    return ( min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]) )
+
+
+def clip(bbox, W, H):
+    """
+    Clip a box to the screen, or return None if nothing is left of it.
+    """
+    (left, top, right, bottom) = bbox
+    left = max(left, 0); top = max(top, 0)
+    right = min(right, W); bottom = min(bottom, H)
+
+    if left >= right or top >= bottom:
+        return None
+
+    return (left, top, right, bottom)
+
+
+def _flatten(xy):
+
+    coords = []
+    for item in xy:
+        if isinstance(item, (tuple, list)):
+            coords.extend(item)
+        else:
+            coords.append(item)
+    return coords
+
+
+def extent(xy, width=1):
+    """
+    Find the box covered by an ImageDraw coordinate list, which may be
+    [(x, y), ...] or [x, y, ...]. Returns None if xy can't be understood.
+    """
+    try:
+        coords = _flatten(xy)
+        xs = coords[0::2]
+        ys = coords[1::2]
+        pad = max(int(width or 1), 1)
+        return ( int(min(xs)) - pad, int(min(ys)) - pad,
+                 int(max(xs)) + pad + 1, int(max(ys)) + pad + 1 )
+    except:
+        return None
+
+
+def wrap(bbox, origin, W, H):
+    """
+    The boxes a box of the screen covers in display memory that's shown
+    from origin on, wrapping round at the right and bottom edges. The box
+    must already be clipped to the screen.
+    """
+    def spans(a, b, offset, n):
+        (a, b) = (a + offset, b + offset)
+        if a >= n:
+            return [ (a - n, b - n) ]
+        if b > n:
+            return [ (a, n), (0, b - n) ]
+        return [ (a, b) ]
+
+    (left, top, right, bottom) = bbox
+    (x, y) = origin
+    return [ (l, t, r, b) for (l, r) in spans(left, right, x, W)
+                          for (t, b) in spans(top, bottom, y, H) ]
+
+
+def intersects(a, b):
+
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def disjoint(boxes):
+    """
+    Merge overlapping boxes until none of them overlap.
+    """
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in xrange(len(boxes)):
+            for j in xrange(i+1, len(boxes)):
+                if intersects(boxes[i], boxes[j]):
+                    boxes[i] = union(boxes[i], boxes.pop(j))
+                    merged = True
+                    break
+            if merged: break
+    return boxes
+
+
+def area(bbox):
+
+    return (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+
+
+def coalesce(boxes, cost=None):
+    """
+    Merge boxes wherever one write of their union is cheaper than separate
+    writes. cost(bbox) prices a write, by default the bytes it moves.
+    """
+    if cost is None:
+        cost = lambda bbox: area(bbox) / 8
+        
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        best = None
+        for i in xrange(len(boxes)):
+            for j in xrange(i+1, len(boxes)):
+                u = union(boxes[i], boxes[j])
+                saving = cost(boxes[i]) + cost(boxes[j]) - cost(u)
+                if saving >= 0 and (best is None or saving > best[0]):
+                    best = (saving, i, j, u)
+        if best is not None:
+            (saving, i, j, u) = best
+            boxes.pop(j)
+            boxes[i] = u
+            merged = True
+    return boxes
@@ -0,0 +1,212 @@
+"""
+Dithering of photos and icons down to 1-bit bitmaps.
+
+    icon = dither.dither(Image.open('mail.gif'), invert=True)
+    frame = dither.pack(Image.open('pumpkin.jpg'), display.axis, method='bayer')
+
+dither() returns a mode '1' image, pack() the same already packed in a
+display's memory layout, 'rows', 'columns' or 'pages' as in PyDisplay.axis.
+The picture is first taken to grey and adjusted:
+
+    gamma    - below 1 lightens the midtones, above 1 darkens them
+    contrast - stretches the tones about the middle grey
+    invert   - sets the pixels that were dark, for icons drawn in black
+               on white, where the display lights the ink
+
+and then dithered by one of
+
+    'floyd'  - Floyd-Steinberg error diffusion, the best for photos
+    'bayer'  - an 8x8 ordered dither, a regular pattern that stays put
+               from frame to frame, which suits animation
+    'none'   - a plain threshold at middle grey
+
+With NumPy, error diffusion works along diagonal wavefronts of pixels
+whose errors have all arrived, a whole wavefront at a time, giving the
+same result as going pixel by pixel. Without it PIL's own dithering is
+used. Results are cached by a hash of the picture and the options, so an
+icon redrawn every minute is only dithered once.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import threading
+import hashlib
+
+import Image
+import ImageChops
+
+import bitpack
+
+try:
+    import numpy # http://numpy.scipy.org
+except ImportError:
+    numpy = None
+
+METHODS = ( 'floyd', 'bayer', 'none' )
+
+# dithered pictures kept, the least recently used dropped first
+CACHED = 64
+
+_cache = {}
+_tick = 0
+_lock = threading.Lock()
+
+
+def _bayer(n):
+
+    # the n x n threshold matrix, values 0 to n*n-1, built up from 2 x 2
+    if n == 1:
+        return [ [ 0 ] ]
+    m = _bayer(n / 2)
+    h = n / 2
+    return [ [ 4*m[y % h][x % h] + ((0, 2), (3, 1))[y / h][x / h] for x in xrange(n) ]
+             for y in xrange(n) ]
+
+BAYER = _bayer(8)
+
+
+def levels(gamma=1.0, contrast=1.0, invert=False):
+    """
+    The grey level table for the tone adjustments, 256 values 0 to 255.
+    """
+    table = []
+    for v in xrange(256):
+        v = (v / 255.0) ** gamma
+        v = (v - 0.5) * contrast + 0.5
+        if invert:
+            v = 1.0 - v
+        table.append(int(round(min(max(v, 0.0), 1.0) * 255)))
+    return table
+
+
+def dither(image, method='floyd', gamma=1.0, contrast=1.0, invert=False):
+    """
+    A picture of any mode as a mode '1' image, see the module notes.
+    """
+    assert method in METHODS, 'unknown dither method %s' % method
+    key = (_hash(image), method, gamma, contrast, invert)
+
+    global _tick
+    with _lock:
+        _tick += 1
+        if key in _cache:
+            result = _cache[key][1]
+            _cache[key] = (_tick, result)
+            return result.copy()
+
+    grey = image.convert('L').point(levels(gamma, contrast, invert))
+    if numpy is not None:
+        result = _numpy(grey, method)
+    else:
+        result = _pil(grey, method)
+
+    with _lock:
+        _cache[key] = (_tick, result)
+        if len(_cache) > CACHED:
+            # forget the oldest quarter
+            items = sorted(_cache.items(), key=lambda item: item[1][0])
+            for (old, value) in items[:len(items) - CACHED*3/4]:
+                del _cache[old]
+    return result.copy()
+
+
+def pack(image, axis=None, **options):
+    """
+    A picture dithered and packed in a display's memory layout: row bytes
+    for 'rows' or None, as from a mode '1' tostring(), column bytes for
+    'columns' and page bytes, one page after another, for 'pages'. The
+    options are those of dither().
+    """
+    bitmap = dither(image, **options)
+    (W, H) = bitmap.size
+    data = bitmap.tostring()
+    if axis == 'columns':
+        return bitpack.columns(data, W, H)
+    if axis == 'pages':
+        return ''.join(bitpack.pages(data, W, H))
+    return data
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def _hash(image):
+
+    # what the picture looks like, whatever object it's in
+    digest = hashlib.sha1(image.tostring())
+    digest.update('%s %s' % (image.mode, image.size))
+    if image.mode == 'P':
+        digest.update(str(image.getpalette()))
+    return digest.hexdigest()
+
+
+def _numpy(grey, method):
+
+    (W, H) = grey.size
+    values = numpy.frombuffer(grey.tostring(), numpy.uint8).reshape(H, W)
+
+    if method == 'none':
+        bits = values >= 128
+    elif method == 'bayer':
+        thresholds = (numpy.array(BAYER) * 4 + 2)
+        thresholds = numpy.tile(thresholds, ((H + 7) / 8, (W + 7) / 8))[:H, :W]
+        bits = values >= thresholds
+    else:
+        bits = _floyd(values / 255.0)
+
+    return Image.fromstring('1', (W, H), numpy.packbits(bits, axis=1).tostring())
+
+
+def _floyd(values):
+
+    # Floyd-Steinberg, a pixel's error going 7/16 right and 3/16, 5/16 and
+    # 1/16 to the pixels below left, below and below right. Pixel (x, y)
+    # needs (x-1, y), (x-1, y-1), (x, y-1) and (x+1, y-1) done first, all of
+    # which lie on earlier wavefronts x + 2y = t, so each wavefront can be
+    # done at once. A border round the buffer takes the error falling off.
+    (H, W) = values.shape
+    buffer = numpy.zeros((H + 1, W + 2))
+    buffer[:H, 1:W+1] = values
+    bits = numpy.zeros((H, W), bool)
+    ys = numpy.arange(H)
+
+    for t in xrange(W + 2*(H-1)):
+        y = ys[(2*ys <= t) & (t - 2*ys < W)]
+        x = t - 2*y
+        v = buffer[y, x+1]
+        on = v >= 0.5
+        bits[y, x] = on
+        error = v - on
+        buffer[y, x+2] += error * (7/16.0)
+        buffer[y+1, x] += error * (3/16.0)
+        buffer[y+1, x+1] += error * (5/16.0)
+        buffer[y+1, x+2] += error * (1/16.0)
+
+    return bits
+
+
+def _pil(grey, method):
+
+    if method == 'floyd':
+        return grey.convert('1')
+    if method == 'none':
+        return grey.point(lambda v: v >= 128 and 255, '1')
+
+    # compare with a tiling of the threshold matrix
+    (W, H) = grey.size
+    tile = Image.new('L', (8, 8))
+    tile.putdata([ v*4 + 2 for row in BAYER for v in row ])
+    thresholds = Image.new('L', (W, H))
+    for y in xrange(0, H, 8):
+        for x in xrange(0, W, 8):
+            thresholds.paste(tile, (x, y))
+    # v - threshold + 1 is above zero where v >= threshold
+    above = ImageChops.subtract(grey, thresholds, 1, 1)
+    return above.point(lambda v: v > 0 and 255, '1')
@@ -8,8 +8,12 @@ This file is released under the GNU Lesser General Public Licence.
 See the file LICENSE for details.
 """
 
+from __future__ import with_statement
+
 import time
 
+from metrics import Metrics
+
 VSYNC_LO = 0x0
 VSYNC_HI = 0x20
 HSYNC_LO = 0x0
@@ -53,20 +57,20 @@ class EL320_240:
         
         out = []
         
-        t = time.time()
-        for byte in data:
-            b = ord(byte)
-            hi = (b>>4) & 0x0F
-            out.append(hi)
-            lo = b & 0x0F
-            out.append(lo)
-        #print 1.0 / (time.time() - t),
+        metrics = Metrics.forDevice(self)
+        
+        with metrics.timer('pack'):
+            for byte in data:
+                b = ord(byte)
+                hi = (b>>4) & 0x0F
+                out.append(hi)
+                lo = b & 0x0F
+                out.append(lo)
 
         # write the update frame out to the display
         
-        #t = time.time()
-        self.scan(out, address/40)
-        #print 1.0 / (time.time() - t)
+        with metrics.timer('scan'):
+            self.scan(out, address/40)
 
     #
     # the core raster scan algorithm
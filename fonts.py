@@ -0,0 +1,157 @@
+"""
+Font registry: loaded fonts shared between widgets, and the largest size
+of a font that fits a box.
+
+Widgets size their text to the space they're given:
+
+    font = fonts.fit('trebuc.ttf', '0123456789', height=self.H, ink=True)
+
+finds the largest size at which the sample is less than height pixels
+high, by a binary search over the sizes rather than trying each in turn.
+The answer is remembered, in memory and in a file in the home directory,
+keyed by a hash of the font file, the sample and the box, so later runs
+load just the one font. Fonts are loaded through the glyph cache, which
+keeps one of each file and size.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import os
+import threading
+import hashlib
+import cPickle as pickle
+
+import glyphs
+
+# where fitted sizes are kept between runs, None to keep them in memory only
+CACHE = os.path.join(os.path.expanduser('~'), '.pydisplay-fonts')
+
+# the usual places for fonts that aren't given with a path
+FONTDIRS = [ os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+             os.path.expanduser('~/.fonts'),
+             os.path.expanduser('~/.local/share/fonts'),
+             '/usr/local/share/fonts',
+             '/usr/share/fonts' ]
+
+_lock = threading.RLock()
+_sizes = None           # (font hash, sample, box, ink, largest) -> size
+_hashes = {}            # font file -> (mtime, hash)
+
+
+def load(path, size):
+    """
+    A font at a size, loaded once however many widgets use it.
+    """
+    return glyphs.truetype(path, size)
+
+
+def fit(path, sample, width=None, height=None, ink=False, largest=200):
+    """
+    The largest font no bigger than largest at which sample is less than
+    width wide and height high; either may be None to leave it free. The
+    sample is measured by font.getsize(), or with ink set by the pixels it
+    actually sets. If no size fits, the font at size 1.
+    """
+    return load(path, fitSize(path, sample, width, height, ink, largest))
+
+
+def fitSize(path, sample, width=None, height=None, ink=False, largest=200):
+    """
+    The size fit() would load.
+    """
+    key = (fontHash(path), sample, width, height, ink, largest)
+    with _lock:
+        sizes = _load()
+        if key in sizes:
+            return sizes[key]
+
+    def fits(size):
+        font = load(path, size)
+        if ink:
+            bbox = font.getmask(sample, '1').getbbox() or (0, 0, 0, 0)
+            (w, h) = (bbox[2]-bbox[0], bbox[3]-bbox[1])
+        else:
+            (w, h) = font.getsize(sample)
+        return (width is None or w < width) and (height is None or h < height)
+
+    # text grows with the font size, so the sizes that fit are all those
+    # below some size: search for it
+    (low, high) = (1, largest)
+    while low < high:
+        middle = (low + high + 1) / 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+
+    with _lock:
+        _sizes[key] = low
+        _save()
+    return low
+
+
+def locate(path):
+    """
+    The file a font name refers to, looking in the usual font directories
+    if it isn't a path, or None if it can't be found.
+    """
+    if os.path.exists(path):
+        return os.path.abspath(path)
+    if os.path.dirname(path):
+        return None
+    for folder in FONTDIRS:
+        for (root, dirs, files) in os.walk(folder):
+            if path in files:
+                return os.path.join(root, path)
+    return None
+
+
+def fontHash(path):
+    """
+    A hash of a font's file, so a changed font is fitted afresh. Fonts that
+    can't be found are known by name.
+    """
+    with _lock:
+        filename = locate(path)
+        if filename is None:
+            return path
+        mtime = os.path.getmtime(filename)
+        if _hashes.get(filename, (None,))[0] != mtime:
+            with open(filename, 'rb') as f:
+                _hashes[filename] = (mtime, hashlib.sha1(f.read()).hexdigest())
+        return _hashes[filename][1]
+
+
+def _load():
+
+    # read the remembered sizes the first time they're needed
+    global _sizes
+    if _sizes is None:
+        _sizes = {}
+        if CACHE and os.path.exists(CACHE):
+            try:
+                with open(CACHE, 'rb') as f:
+                    _sizes = pickle.load(f)
+            except Exception, e:
+                print 'ignoring font cache %s: %s' % (CACHE, e)
+    return _sizes
+
+
+def _save():
+
+    # written aside and renamed, so a reader never sees half a file
+    if not CACHE:
+        return
+    try:
+        with open(CACHE + '.new', 'wb') as f:
+            pickle.dump(_sizes, f, pickle.HIGHEST_PROTOCOL)
+        if os.name == 'nt' and os.path.exists(CACHE):
+            os.remove(CACHE)
+        os.rename(CACHE + '.new', CACHE)
+    except (IOError, OSError), e:
+        print 'can\'t save font cache %s: %s' % (CACHE, e)
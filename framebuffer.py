@@ -0,0 +1,229 @@
+"""
+Packed 1-bit framebuffer for the graphics interface.
+
+Pixels are stored one bit per pixel, row by row, most significant bit
+leftmost, with each row padded to a whole byte. This is the layout of a
+PIL mode '1' image's tostring(), and the native layout of the row-wise
+controllers, so their refreshes are straight slices of the buffer.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import Image
+from binascii import hexlify
+
+import bitpack
+
+try:
+    import numpy # http://numpy.scipy.org
+except ImportError:
+    numpy = None
+
+
+def align(bbox):
+    """
+    Widen a box to whole bytes horizontally.
+    """
+    (left, top, right, bottom) = bbox
+    return ((left/8)*8, top, ((right+7)/8)*8, bottom)
+
+
+def _runs(flags):
+
+    # (start, stop) pairs for each run of true values
+    runs = []
+    start = None
+    for i in xrange(len(flags)):
+        if flags[i] and start is None:
+            start = i
+        elif not flags[i] and start is not None:
+            runs.append((start, i))
+            start = None
+    if start is not None:
+        runs.append((start, len(flags)))
+    return runs
+
+
+class Framebuffer(object):
+
+    def __init__(self, W, H, data=None):
+
+        self.W = W
+        self.H = H
+        self.stride = (W + 7) / 8
+        if data is None:
+            self.data = bytearray(self.stride * H)
+        else:
+            assert len(data) == self.stride * H
+            self.data = bytearray(data)
+
+    def fromImage(cls, image):
+        (W, H) = image.size
+        return cls(W, H, image.convert('1').tostring())
+    fromImage = classmethod(fromImage)
+
+    def copy(self):
+
+        return Framebuffer(self.W, self.H, self.data)
+
+    def toImage(self):
+
+        return Image.fromstring('1', (self.W, self.H), str(self.data))
+
+    def rows(self, top, bottom):
+        """
+        The packed bytes of whole rows, ready for a row-wise controller.
+        """
+        return str(self.data[top*self.stride:bottom*self.stride])
+
+    def get(self, bbox):
+        """
+        The packed bytes of a box, which must be aligned to whole bytes.
+        """
+        (left, top, right, bottom) = bbox
+        (b0, b1) = (left/8, right/8)
+        if (b0, b1) == (0, self.stride):
+            return self.rows(top, bottom)
+        data = self.data
+        stride = self.stride
+        return ''.join([ str(data[y*stride+b0:y*stride+b1]) for y in xrange(top, bottom) ])
+
+    def put(self, bbox, packed):
+        """
+        Store packed bytes into a box, which must be aligned to whole bytes.
+        """
+        (left, top, right, bottom) = bbox
+        (b0, b1) = (left/8, right/8)
+        n = b1 - b0
+        data = self.data
+        stride = self.stride
+        if (b0, b1) == (0, self.stride):
+            data[top*stride:bottom*stride] = packed
+            return
+        for y in xrange(top, bottom):
+            i = (y - top) * n
+            data[y*stride+b0:y*stride+b1] = packed[i:i+n]
+
+    def columns(self, left, right):
+        """
+        The full-height columns from left to right as vertical bytes, ready
+        for a column-wise controller. left must be a multiple of 8.
+        """
+        aligned = align((left, 0, right, self.H))
+        w = aligned[2] - aligned[0]
+        update = bitpack.columns(self.get(aligned), w, self.H)
+        return update[:(right - left) * ((self.H + 7) / 8)]
+
+    def pages(self, bbox):
+        """
+        The 8-pixel pages covering a box, cut to its left and right edges,
+        as a list of strings ready for a page-wise controller. The top of
+        the box must be a multiple of 8.
+        """
+        (left, top, right, bottom) = bbox
+        bottom = min(bottom, self.H)
+        (l, t, r, b) = align((left, top, right, bottom))
+        pages = bitpack.pages(self.get((l, t, r, b)), r - l, b - t)
+        return [ page[left-l:right-l] for page in pages ]
+
+    def crop(self, bbox):
+        """
+        Copy a box out as a PIL image.
+        """
+        aligned = align(bbox)
+        (left, top, right, bottom) = aligned
+        image = Image.fromstring('1', (right-left, bottom-top), self.get(aligned))
+        if aligned == tuple(bbox):
+            return image
+        (l, t, r, b) = bbox
+        return image.crop((l-left, 0, r-left, b-top))
+
+    def changes(self, bbox, packed, axis=None):
+        """
+        Compare packed bytes with an aligned box of the framebuffer and find
+        the changed pixels, split along a display's addressing axis:
+
+            'rows'    - one box per run of changed rows
+            'columns' - one box per run of changed columns
+            'pages'   - one box per changed 8-pixel page
+            None      - a single box around every change
+        """
+        (left, top, right, bottom) = bbox
+        mask = _Mask(self.get(bbox), packed, right - left, bottom - top)
+        h = bottom - top
+
+        if axis == 'rows':
+            bands = [ (y0, y1) for (y0, y1) in _runs(mask.rows) ]
+
+        elif axis == 'columns':
+            bands = []
+            for (x0, x1) in _runs(mask.columns(0, h)):
+                rows = [ y for y in xrange(h) if mask.touches(y, x0, x1) ]
+                bands.append((rows[0], rows[-1] + 1, x0, x1))
+
+        elif axis == 'pages':
+            bands = []
+            for page in xrange((top/8)*8, bottom, 8):
+                y0 = max(page - top, 0)
+                y1 = min(page + 8 - top, h)
+                bands.append((y0, y1))
+
+        else:
+            bands = [ (0, h) ]
+
+        result = []
+        for band in bands:
+            if len(band) == 4:
+                (y0, y1, x0, x1) = band
+            else:
+                (y0, y1) = band
+                rows = [ y for y in xrange(y0, y1) if mask.rows[y] ]
+                if not rows: continue
+                (y0, y1) = (rows[0], rows[-1] + 1)
+                flags = mask.columns(y0, y1)
+                x0 = flags.index(True)
+                x1 = len(flags) - flags[::-1].index(True)
+            result.append((left + x0, top + y0, left + x1, top + y1))
+        return result
+
+
+class _Mask(object):
+
+    # which pixels differ between two packed regions of the same size
+
+    def __init__(self, old, new, w, h):
+
+        n = w / 8
+        self.w = w
+        if numpy is not None:
+            a = numpy.frombuffer(old, numpy.uint8).reshape(h, n)
+            b = numpy.frombuffer(new, numpy.uint8).reshape(h, n)
+            self.bits = numpy.unpackbits(numpy.bitwise_xor(a, b), axis=1)
+            self.rows = list(self.bits.any(axis=1))
+        else:
+            # each row's difference as a w-bit integer, leftmost pixel highest
+            self.bits = []
+            for y in xrange(h):
+                a = old[y*n:(y+1)*n]
+                b = new[y*n:(y+1)*n]
+                if a == b:
+                    self.bits.append(0)
+                else:
+                    self.bits.append(long(hexlify(a), 16) ^ long(hexlify(b), 16))
+            self.rows = [ bits != 0 for bits in self.bits ]
+
+    def columns(self, y0, y1):
+
+        if numpy is not None:
+            return list(self.bits[y0:y1].any(axis=0))
+        bits = reduce(lambda a, b: a | b, self.bits[y0:y1], 0)
+        return [ c == '1' for c in bin(bits)[2:].zfill(self.w) ]
+
+    def touches(self, y, x0, x1):
+
+        if numpy is not None:
+            return self.bits[y, x0:x1].any()
+        return (self.bits[y] >> (self.w - x1)) & ((1 << (x1 - x0)) - 1) != 0
@@ -0,0 +1,307 @@
+"""
+Glyph cache for text rendering.
+
+Drawing text through PIL rasterizes every character of the string each
+time, and measuring it with getmask().getbbox() rasterizes it again. The
+cache has PIL render each character once per font, keeps its 1-bit ink
+and where it sits, and draws strings by pasting glyphs:
+
+    glyphs.text(draw, (0, 0), '12:30', font, fill=1)
+    (l, t, r, b) = glyphs.getbbox('12:30', font)
+
+Strings are laid out from each character's advance, font.getsize()
+across it. A clock or a ticker repeats the same few characters, so once
+they have been seen its text comes entirely from the cache, however the
+string changes.
+
+Whether that comes out as draw.text() would draw it is checked once per
+pair of characters, by having PIL draw the pair: a kerned pair, or a
+character PIL places at fractions of a pixel, doesn't come out as its
+glyphs put an advance apart. A string with such a pair is rendered by
+PIL whole and cached as a string instead, and so is anchored text, which
+needs the whole string's metrics. Pillow lines a string up on its
+tallest characters, so now and then one comes out a row off all the
+same. Glyphs are kept up to a byte budget and the least recently used
+are dropped first.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import threading
+
+import Image
+from ImageDraw import Draw
+import ImageFont
+
+# what a glyph costs on top of its bitmap, roughly
+OVERHEAD = 64
+
+# a character with ink, to check the pair after a blank one
+REFERENCE = '|'
+
+# how many of a character to check its advance over
+RUN = 8
+
+
+class Glyph(object):
+
+    # the ink of a character, or of a whole string, as PIL renders it;
+    # for a pair of characters just the step between them
+
+    def __init__(self, mask, offset, advance):
+        self.mask = mask        # 1-bit ink, or None for a blank glyph
+        self.offset = offset    # from the pen position to the mask
+        self.advance = advance  # the pen advance, font.getsize() across
+        self.size = OVERHEAD
+        if mask:
+            (w, h) = mask.size
+            self.size += (w + 7) / 8 * h
+        self.used = 0
+
+
+def fontKey(font):
+    """
+    What identifies a font in the cache: its file and size when they're
+    known, otherwise the font object itself.
+    """
+    path = getattr(font, 'path', None)
+    if path is None:
+        return font
+    return (path, getattr(font, 'size', None))
+
+
+class GlyphCache(object):
+
+    def __init__(self, budget=256*1024):
+        self.budget = budget
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._glyphs = {}
+        self._fonts = {}
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def truetype(self, path, size):
+        """
+        A TrueType font, loaded once however often it's asked for.
+        """
+        with self._lock:
+            key = (path, size)
+            if key not in self._fonts:
+                font = ImageFont.truetype(path, size)
+                # older PILs don't remember where a font came from
+                font.path = path
+                font.size = size
+                self._fonts[key] = font
+            return self._fonts[key]
+
+    def glyph(self, font, char, first=True):
+        """
+        The cached rendering of a character, made by PIL on first use.
+        PIL clips a bitmap font's character to the start of the string, so
+        one that isn't first is rendered after a blank to keep all of it.
+        """
+        if first or not isinstance(font, ImageFont.ImageFont):
+            return self._get(('glyph', fontKey(font), char), _rasterize, font, char)
+        return self._get(('following', fontKey(font), char), _following, font, char)
+
+    def step(self, font, first, second):
+        """
+        How far PIL moves the pen from one character to the next, or None
+        if the pair doesn't come out as its glyphs an advance apart.
+        """
+        return self._get(('step', fontKey(font), first, second), self._measure, font, first, second).advance
+
+    def layout(self, font, text):
+        """
+        Each character of a string with its glyph and pen position, or None
+        if the string can't be put together from its characters.
+        """
+        result = []
+        x = 0
+        for i in xrange(len(text)):
+            if i:
+                step = self.step(font, text[i-1], text[i])
+                if step is None:
+                    return None
+                x += step
+            result.append((x, self.glyph(font, text[i], i == 0)))
+        return result
+
+    def advance(self, font, text):
+        """
+        The pen advance across a string.
+        """
+        layout = self.layout(font, text)
+        if not layout:
+            return font.getsize(text)[0]
+        (x, glyph) = layout[-1]
+        return x + glyph.advance
+
+    def _get(self, key, make, *args):
+
+        with self._lock:
+            self._tick += 1
+            glyph = self._glyphs.get(key)
+            if glyph is not None:
+                self.hits += 1
+                glyph.used = self._tick
+                return glyph
+            self.misses += 1
+
+        glyph = make(*args)
+
+        with self._lock:
+            glyph.used = self._tick
+            if key not in self._glyphs:
+                self._glyphs[key] = glyph
+                self.bytes += glyph.size
+                if self.bytes > self.budget:
+                    self._evict()
+        return glyph
+
+    def _measure(self, font, first, second):
+
+        # the step is the first character's advance if PIL draws the pair
+        # just as its glyphs put together that far apart, and a run of the
+        # first character is as long as its advances add up to; after a
+        # blank second character a reference one has to land right too
+        advance = self.glyph(font, first).advance
+        if font.getsize(first * RUN)[0] != advance * RUN:
+            return Glyph(None, (0, 0), None)
+        pair = first + second
+        layout = [ (0, self.glyph(font, first)), (advance, self.glyph(font, second, False)) ]
+        if layout[1][1].mask is None:
+            pair += REFERENCE
+            layout.append((advance + layout[1][1].advance, self.glyph(font, REFERENCE, False)))
+        drawn = _rasterize(font, pair)
+        composed = _compose(_pieces(layout))
+        if drawn.mask is None or composed.mask is None:
+            same = drawn.mask is composed.mask
+        else:
+            same = (composed.offset == drawn.offset
+                    and composed.mask.size == drawn.mask.size
+                    and composed.mask.tostring() == drawn.mask.tostring())
+        if not same:
+            advance = None
+        return Glyph(None, (0, 0), advance)
+
+    def _evict(self):
+
+        # drop the least recently used glyphs, down to three quarters of
+        # the budget so that eviction doesn't run on every new one
+        items = sorted(self._glyphs.items(), key=lambda item: item[1].used)
+        for (key, glyph) in items:
+            if self.bytes <= self.budget * 3 / 4:
+                break
+            del self._glyphs[key]
+            self.bytes -= glyph.size
+
+    def clear(self):
+        with self._lock:
+            self._glyphs.clear()
+            self.bytes = 0
+
+    def _ink(self, font, text, anchor):
+
+        # the pieces of ink of a string, each where it goes from the
+        # drawing position
+        if anchor is None:
+            layout = self.layout(font, text)
+            if layout is not None:
+                return _pieces(layout)
+        glyph = self._get(('text', fontKey(font), text, anchor), _rasterize, font, text, anchor)
+        if glyph.mask is None:
+            return []
+        return [ (glyph.offset, glyph.mask) ]
+
+    def getbbox(self, text, font, anchor=None):
+        """
+        The box of the ink of a string drawn at (0, 0), or None if there
+        isn't any. Unlike font.getmask(text).getbbox() it's measured from
+        the drawing position, so drawing at (-left, -top) puts the ink in
+        the corner.
+        """
+        bbox = None
+        for ((x, y), mask) in self._ink(font, text, anchor):
+            (w, h) = mask.size
+            box = (x, y, x+w, y+h)
+            if bbox is None:
+                bbox = box
+            else:
+                bbox = (min(bbox[0], box[0]), min(bbox[1], box[1]), max(bbox[2], box[2]), max(bbox[3], box[3]))
+        return bbox
+
+    def text(self, draw, xy, text, font=None, fill=None, anchor=None):
+        """
+        Draw a string with an ImageDraw, as draw.text() would.
+        """
+        if font is None:
+            font = draw.getfont()
+        (x, y) = xy
+        for ((dx, dy), mask) in self._ink(font, text, anchor):
+            draw.bitmap((x+dx, y+dy), mask, fill=fill)
+
+
+def _rasterize(font, text, anchor=None):
+
+    # draw the text with room all round for overhangs and the anchor, and
+    # keep the ink
+    if not text:
+        return Glyph(None, (0, 0), 0)
+    (w, h) = font.getsize(text)
+    margin = max(w, h)
+    image = Image.new('1', (w + 2*margin, h + 2*margin))
+    if anchor is None:
+        Draw(image).text((margin, margin), text, 1, font)
+    else:
+        Draw(image).text((margin, margin), text, 1, font, anchor)
+    bbox = image.getbbox()
+    if bbox is None:
+        return Glyph(None, (0, 0), w)
+    return Glyph(image.crop(bbox), (bbox[0] - margin, bbox[1] - margin), w)
+
+
+def _following(font, char):
+
+    # a bitmap font's character as it comes after another, whole
+    glyph = _rasterize(font, ' ' + char)
+    if glyph.mask is not None:
+        glyph.offset = (glyph.offset[0] - font.getsize(' ')[0], glyph.offset[1])
+    glyph.advance = font.getsize(char)[0]
+    return glyph
+
+
+def _pieces(layout):
+
+    # the ink of the glyphs laid out, each piece where it goes
+    return [ ((pen + glyph.offset[0], glyph.offset[1]), glyph.mask) for (pen, glyph) in layout if glyph.mask is not None ]
+
+
+def _compose(pieces):
+
+    # pieces of ink put together, as one glyph
+    if not pieces:
+        return Glyph(None, (0, 0), 0)
+    left = min([ x for ((x, y), mask) in pieces ])
+    top = min([ y for ((x, y), mask) in pieces ])
+    right = max([ x + mask.size[0] for ((x, y), mask) in pieces ])
+    bottom = max([ y + mask.size[1] for ((x, y), mask) in pieces ])
+    image = Image.new('1', (right - left, bottom - top))
+    for ((x, y), mask) in pieces:
+        image.paste(1, (x - left, y - top), mask)
+    return Glyph(image, (left, top), 0)
+
+
+# the cache shared by the displays and widgets
+cache = GlyphCache()
+
+truetype = cache.truetype
+getbbox = cache.getbbox
+text = cache.text
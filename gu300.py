@@ -75,9 +75,14 @@ class GU300(object):
 try:
     
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class GU300Parallel(GU300):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 60e-6    # cursor address and write command
+        byteCost    = 12e-6    # three port writes per byte
+        
         def __init__(self, W=256, H=64, dev=0, fastwrite=True):
             
             p = parallel.Parallel(dev)
@@ -95,25 +100,35 @@ try:
             self.W = W
             self.H = H
     
-            # enable the fast write if using the default wiring and the C library is installed
+            # run the byte loops in C if the library is installed
             self.sendData = self.slowData
+            self.sendCommand = self.slowCommand
             if fastwrite:
                 try:
-                    assert self.setWR == p.setDataStrobe
-                    assert self.setCD == p.setAutoFeed 
-                    from ctypes import cdll
-                    from sys import prefix
-                    self._pydisplay = cdll.LoadLibrary(prefix + '/lib/python/site-packages/_pydisplay.so')
-                    self.fd = p._fd
-                    self.sendData = self.fastData
+                    self.sendData = self.program(p, 0).bind()
+                    self._command = self.program(p, 1).bind()
+                    self.sendCommand = self.fastCommand
+                    self.byteCost = 3e-6
                     print 'gu300: using fast I/O library'
                 except:
                     self.sendData = self.slowData
+                    self.sendCommand = self.slowCommand
                     print 'gu300: fast I/O library not available, using pyparallel'
                 
             self.init()
         
-        def sendCommand(self, cmd):
+        def program(self, p, CD):
+            
+            program = busprogram.Program(p)
+            program.set(self.setCS, 0)
+            program.set(self.setCD, CD)
+            program.loop()
+            program.data(self.setData)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+        
+        def slowCommand(self, cmd):
             
             self.setCS(0)
             self.setCD(1)
@@ -132,9 +147,9 @@ try:
                 self.setWR(0)
                 self.setWR(1)
                 
-        def fastData(self, data):
+        def fastCommand(self, cmd):
             
-            self._pydisplay.gu300_write(self.fd, data, len(data))      
+            self._command(chr(cmd))
     
 except: print 'GU300 parallel not available'
 
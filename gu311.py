@@ -30,6 +30,10 @@ try:
     
     class GU311(object):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 30e-6    # seven bytes of header
+        byteCost    = 2e-6     # kernel handshaking
+        
         def __init__(self, dev=0):
             
             if USE_FCNTL:
@@ -43,6 +47,7 @@ try:
                 self.getBUSY  = p.getInBusy     # pin 11
                 self.setData  = p.setData       # pins 2-9
                 self.setWR(1)
+                self.byteCost = 15e-6
             
             self.init()
             
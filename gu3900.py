@@ -214,7 +214,11 @@ try:
     import serial # http://pyserial.sourceforge.net
     
     class GU3900Ser(GU3900):
-    
+        
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 3.9e-3   # fifteen bytes of cursor and header
+        byteCost    = 260e-6   # 38400 baud
+        
         def __init__(self, W=256, H=64, device='/dev/ttyS0', speed=38400):
             
             self._ser = serial.Serial(device, speed, writeTimeout=2, dsrdtr=True )
@@ -237,9 +241,14 @@ except: print 'GU3900 serial not available'
 try:
 
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class GU3900Par(GU3900):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 225e-6   # fifteen bytes of cursor and header
+        byteCost    = 15e-6    # port writes and RDY polling
+        
         def __init__(self, W=256, H=64, dev=0):
             
             p = parallel.Parallel(dev)
@@ -253,15 +262,12 @@ try:
             self.W = W
             self.H = H
             
-            # enable the fast write if using the default wiring and the C library is installed
+            # run the byte loop in C if the library is installed
             try:
-                assert self.setWR == p.setDataStrobe
-                assert self.getRDY == p.getInBusy
-                from ctypes import cdll
-                from sys import prefix
-                self._pydisplay = cdll.LoadLibrary(prefix + '/lib/python/site-packages/_pydisplay.so')
+                self._write = self.program(p).bind()
                 self.write = self.fastWrite
-                self.fd = p._fd
+                self.commandCost = 60e-6
+                self.byteCost    = 4e-6
                 print 'gu3900: using fast I/O library'
             except:
                 self.write = self.slowWrite
@@ -269,6 +275,18 @@ try:
                 
             self.init()
             
+        def program(self, p):
+            
+            # the C loop this replaces strobed /WR low and back, with the
+            # data set in advance as here
+            program = busprogram.Program(p)
+            program.loop()
+            program.data(self.setData)
+            program.wait(self.getRDY, True)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+            
         def slowWrite(self, s):
             for c in s:
                 self.setData(ord(c)) # set the data bits
@@ -277,7 +295,7 @@ try:
                 self.setWR(0)
     
         def fastWrite(self, data):
-            self._pydisplay.gu3900_write(self.fd, data, len(data))                
+            self._write(data)
 
 except: print 'GU3900 parallel not available'    
 
@@ -291,7 +309,11 @@ try:
     
     # this is excruciatingly slow
     class GU3900USB(GU3900):
-    
+        
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 1.2e-3   # a USB transfer and the header
+        byteCost    = 16e-6    # 64 byte bit-bang chunks
+        
         def __init__(self, W=256, H=64, dev=0):
             
             self.W = W
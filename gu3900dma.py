@@ -42,9 +42,14 @@ class GU3900DMA(object):
 try:
     
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class GU3900DMAParallel(GU3900DMA):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 120e-6   # eight bytes of header
+        byteCost    = 15e-6    # port writes and RDY polling
+        
         def __init__(self, W=256, H=64, dev=0):
             
             p = parallel.Parallel(dev)
@@ -58,15 +63,12 @@ try:
             self.W = W 
             self.H = H
             
-            # enable the fast write if using the default wiring and the C library is installed
+            # run the byte loop in C if the library is installed
             try:
-                assert self.setWR == p.setDataStrobe
-                assert self.getRDY == p.getInBusy
-                from ctypes import cdll
-                from sys import prefix
-                self._pydisplay = cdll.LoadLibrary(prefix + '/lib/python/site-packages/_pydisplay.so')
+                self._write = self.program(p).bind()
                 self.sendData = self.fastWrite
-                self.fd = p._fd
+                self.commandCost = 32e-6
+                self.byteCost    = 4e-6
                 self.synchronizeDisplay(1)
                 print 'gu3900dma: using fast I/O library'
             except:
@@ -75,6 +77,16 @@ try:
                 
             self.init()
             
+        def program(self, p):
+            
+            program = busprogram.Program(p)
+            program.loop()
+            program.data(self.setData)
+            program.wait(self.getRDY, True)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+            
         def slowWrite(self, data):
             for b in data:
                 self.setData(ord(b))            # setting the data bits in advance gives the RDY flag time to set
@@ -83,7 +95,7 @@ try:
                 self.setWR(1)                   # toggle display /WR pin to signal a write
             
         def fastWrite(self, data):
-            self._pydisplay.gu3900_write(self.fd, data, len(data))
+            self._write(data)
       
 except: print 'GU3900DMA parallel not available'
 
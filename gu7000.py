@@ -65,6 +65,10 @@ try:
     
     class GU7000Ser(GU7000):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 3.9e-3   # fifteen bytes of cursor and header
+        byteCost    = 260e-6   # 38400 baud
+        
         def __init__(self, W, H, dev='/dev/ttyS0'):
             
             GU7000.__init__(self, W, H)
@@ -91,6 +95,10 @@ try:
     
     class GU7000Par(GU7000):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 50e-6    # cursor and header through ppdev
+        byteCost    = 2e-6     # kernel handshaking
+        
         def __init__(self, W, H, dev=0):
             
             GU7000.__init__(self, W, H)
@@ -117,7 +125,11 @@ try:
     BAUD_RATE = 0x2800
     
     class GU7000USB(GU7000):
-    
+        
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 1.2e-3   # a USB transfer and the header
+        byteCost    = 16e-6    # 64 byte bit-bang chunks
+        
         def __init__(self, W, H, dev=0):
             
             GU7000.__init__(self, W, H)
@@ -51,9 +51,14 @@ class KS0108(object):
 try:
     
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class KS0108Par(KS0108):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 60e-6    # chip, page and address select
+        byteCost    = 10e-6    # three port writes per byte
+        
         def __init__(self, W=128, H=64, dev=0):
             
             p = parallel.Parallel(dev)
@@ -68,9 +73,31 @@ try:
             
             self.W = W
             self.H = H
+            
+            # run the byte loops in C if the library is installed
+            try:
+                self._command = self.program(p, 0).bind()
+                self._write = self.program(p, 1).bind()
+                self.sendCommand = self.fastCommand
+                self.writeDisplayData = self.fastWrite
+                self.byteCost = 3e-6
+                print 'ks0108: using fast I/O library'
+            except:
+                print 'ks0108: fast I/O library not available, using pyparallel'
     
             self.init()   
             
+        def program(self, p, RS):
+            
+            program = busprogram.Program(p)
+            program.set(self.setRS, RS)
+            program.loop()
+            program.set(self.setE, 1)
+            program.data(self.setData)
+            program.set(self.setE, 0)
+            program.next()
+            return program
+            
         def sendCommand(self, cmd, data=0):
             self.setRS(0)   # this is a display command
             self.setE(1)    # and here it is...
@@ -87,6 +114,12 @@ try:
                 self.setE(1)    # and here it is...
                 self.setData(byte) 
                 self.setE(0)    # complete the operation
+                
+        def fastCommand(self, cmd, data=0):
+            self._command(chr(cmd | data))
+            
+        def fastWrite(self, data):
+            self._write(str(bytearray(data)))
 
 except: print 'KS0108 parallel not available'
     
@@ -97,6 +130,10 @@ try:
     
     class KS0108UBW(KS0108):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 8e-3     # a USB round trip per command
+        byteCost    = 25e-6    # hex encoded bulk writes
+        
         def __init__(self, W=128, H=64, dev=0):
             
             self.ubw = ubw.MakeUsbBitWhacker(dev)
@@ -0,0 +1,324 @@
+"""
+Stacked drawing layers, composited onto a display.
+
+A LayerStack holds layers in z-order, bottom first. Each layer is drawn
+on like a display, and combines with what's below it by one of the raster
+ops the controllers offer in hardware, the GU3900 and GU7000 write mix
+modes and the SED1330 overlay modes:
+
+    over - the pixels drawn on the layer replace those below, the rest of
+           it is transparent
+    or, and, xor
+
+    stack = LayerStack(display)
+    background = stack.add()
+    clock = stack.add('xor')
+    background.bitmap((0, 0), Image.open('pumpkin.png').convert('1'))
+    clock.text((0, 0), '12:00')
+
+Each layer tracks the boxes drawn on it. Only the boxes where a changed
+layer can be seen are composited again and handed to the display, which
+diffs them and sends what actually changed, so a clock over a static
+background costs only the clock's pixels.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import threading
+
+import Image
+import ImageChops
+from ImageDraw import ImageDraw, Draw
+
+import damage
+import glyphs
+import dither
+import assets
+from pydisplay import PyDisplay, Frame
+
+MODES = ( 'over', 'or', 'and', 'xor' )
+
+
+def _opaque(keys):
+
+    # the same draw keywords with every colour given made solid, for a mask
+    keys = dict(keys)
+    for name in ('fill', 'outline'):
+        if keys.get(name) is not None:
+            keys[name] = 1
+    return keys
+
+
+class Layer(PyDisplay):
+    """
+    A layer of a LayerStack. Draw calls are as for a PyDisplay; pass fill
+    and outline as keywords so that 'over' layers can track their coverage.
+    """
+
+    def __init__(self, stack, mode='over'):
+        assert mode in MODES, 'unknown layer mode %s' % mode
+        self.stack = stack
+        self.W = stack.W
+        self.H = stack.H
+        self.mode = mode
+        self.visible = True
+        self._depth = 0
+        self._work = None
+        self._lock = stack._lock # one lock for the whole stack
+        self._pipeline = None
+        self._image = self._blank()
+        # the pixels drawn on, which 'over' layers show
+        self.mask = Image.new('1', (self.W, self.H))
+
+    def _blank(self):
+        # the transparent colour: 1 leaves what's below an 'and' unchanged
+        return Image.new('1', (self.W, self.H), self.mode == 'and')
+
+    def extent(self):
+        """
+        The box this layer can affect, or None.
+        """
+        if self.mode == 'over':
+            return self.mask.getbbox()
+        if self.mode == 'and':
+            return ImageChops.invert(self._image).getbbox()
+        return self._image.getbbox()
+
+    def begin(self):
+        PyDisplay.begin(self)
+        if self._depth == 1:
+            self._saved = (self._image.copy(), self.mask.copy())
+            self.stack._save(self)
+
+    def _commit(self):
+
+        boxes = self._damage
+        self._work = None
+        self._damage = []
+
+        if self._aborted:
+            (self._image, self.mask) = self._saved
+            return
+
+        if None in boxes:
+            boxes = [ (0, 0, self.W, self.H) ]
+        boxes = [ damage.clip(bbox, self.W, self.H) for bbox in boxes ]
+        self.stack.invalidate(self, [ bbox for bbox in boxes if bbox ])
+
+    def clear(self):
+        self.erase()
+
+    def erase(self, bbox=None):
+        """
+        Make a box of the layer, by default all of it, transparent again.
+        """
+        if bbox is None:
+            bbox = (0, 0, self.W, self.H)
+        with self.frame():
+            self.invalidate(bbox)
+            self._work.paste(self.mode == 'and', bbox)
+            self.mask.paste(0, bbox)
+
+    def show(self, visible=True):
+        with self._lock:
+            self.stack._save(self)
+            if visible != self.visible:
+                self.visible = visible
+                self.stack.invalidate(self, [ self.extent() ], force=True)
+
+    def hide(self):
+        self.show(False)
+
+    def setMode(self, mode):
+        assert mode in MODES, 'unknown layer mode %s' % mode
+        with self._lock:
+            self.stack._save(self)
+            before = self.extent()
+            if mode != self.mode:
+                # the transparent colour changes, so keep only what was drawn
+                drawn = self._image
+                self.mode = mode
+                self._image = self._blank()
+                self._image.paste(drawn, None, self.mask)
+            self.stack.invalidate(self, [ before, self.extent() ], force=True)
+
+    def bitmap(self, xy, bitmap, fill=None, mask=None):
+        """
+        Paste a bitmap, all of it or only the pixels set in mask.
+        """
+        if isinstance(bitmap, assets.Asset):
+            bitmap = bitmap.image
+        elif bitmap.mode != '1':
+            bitmap = dither.dither(bitmap)
+        (x, y) = xy
+        (w, h) = bitmap.size
+        with self.frame():
+            self.invalidate( (x, y, x+w, y+h) )
+            self._work.paste(bitmap, xy, mask)
+            self.mask.paste(1, (x, y, x+w, y+h), mask)
+
+    def text(self, xy, text, fill=None, font=None, anchor=None):
+        with self.frame():
+            PyDisplay.text(self, xy, text, fill, font, anchor)
+            glyphs.text(Draw(self.mask), xy, text, font, 1, anchor)
+
+    for op in PyDisplay._imageop:
+        exec "def %s(self, *args, **keys): self.imageop(ImageDraw.%s, *args, **keys) " % (op, op)
+
+    def imageop(self, op, *args, **keys):
+        with self.frame():
+            PyDisplay.imageop(self, op, *args, **keys)
+            op(Draw(self.mask), *args, **_opaque(keys))
+
+
+class LayerStack(object):
+
+    def __init__(self, display):
+        self.display = display
+        self.W = display.W
+        self.H = display.H
+        self.layers = []
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pending = []
+        self._saved = {}
+
+    def add(self, mode='over', index=None):
+        """
+        Make a layer, by default on top of the others.
+        """
+        layer = Layer(self, mode)
+        with self._lock:
+            if index is None:
+                index = len(self.layers)
+            self.layers.insert(index, layer)
+        return layer
+
+    def remove(self, layer):
+        with self._lock:
+            extent = layer.extent()
+            self.layers.remove(layer)
+            self._damage([ extent ])
+
+    def move(self, layer, index):
+        """
+        Change a layer's place in the stack, 0 at the bottom.
+        """
+        with self._lock:
+            self.layers.remove(layer)
+            self.layers.insert(index, layer)
+            self.invalidate(layer, [ layer.extent() ], force=True)
+
+    def frame(self):
+        """
+        Group changes to several layers into a single refresh.
+        """
+        return Frame(self)
+
+    def begin(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            self._aborted = False
+            self._order = list(self.layers)
+            self._saved = {}
+        self._depth += 1
+
+    def commit(self):
+        assert self._depth > 0, 'commit() without begin()'
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                if self._aborted:
+                    self._restore()
+                elif self._pending:
+                    self._refresh()
+                self._saved = {}
+        finally:
+            self._lock.release()
+
+    def abort(self):
+        """
+        End a frame and throw away every change to the layers since
+        begin(), leaving the screen as it was.
+        """
+        assert self._depth > 0, 'abort() without begin()'
+        self._aborted = True
+        self.commit()
+
+    def _save(self, layer):
+
+        # a layer as it was before the frame, the first time it changes
+        if self._depth and layer not in self._saved:
+            self._saved[layer] = (layer._image.copy(), layer.mask.copy(), layer.visible, layer.mode)
+
+    def _restore(self):
+
+        # put the layers back as they were at the start of the frame, which
+        # is what the display shows
+        self.layers = self._order
+        for (layer, (image, mask, visible, mode)) in self._saved.items():
+            (layer._image, layer.mask, layer.visible, layer.mode) = (image, mask, visible, mode)
+        self._pending = []
+
+    def invalidate(self, layer, boxes, force=False):
+        """
+        Note boxes of a layer as changed. Unless force is set the parts
+        that can't be seen, because the layer is hidden or covered by a
+        solid 'over' layer above it, are skipped.
+        """
+        with self._lock:
+            boxes = [ bbox for bbox in boxes if bbox ]
+            if not force:
+                boxes = [ bbox for bbox in boxes if self._visible(layer, bbox) ]
+            self._damage(boxes)
+
+    def _visible(self, layer, bbox):
+
+        if not layer.visible or layer not in self.layers:
+            return False
+        for above in self.layers[self.layers.index(layer)+1:]:
+            if above.visible and above.mode == 'over':
+                if above.mask.crop(bbox).getextrema()[0]:
+                    return False
+        return True
+
+    def _damage(self, boxes):
+        self.begin()
+        try:
+            self._pending += [ bbox for bbox in boxes if bbox ]
+        finally:
+            self.commit()
+
+    def composite(self, bbox):
+        """
+        The layers combined over a box, as an image.
+        """
+        (left, top, right, bottom) = bbox
+        with self._lock:
+            result = Image.new('1', (right-left, bottom-top))
+            for layer in self.layers:
+                if not layer.visible:
+                    continue
+                image = layer._image.crop(bbox)
+                if layer.mode == 'over':
+                    result = Image.composite(image, result, layer.mask.crop(bbox))
+                elif layer.mode == 'or':
+                    result = ImageChops.lighter(result, image)
+                elif layer.mode == 'and':
+                    result = ImageChops.darker(result, image)
+                elif layer.mode == 'xor':
+                    result = ImageChops.difference(result, image)
+            return result
+
+    def _refresh(self):
+
+        boxes = damage.disjoint(self._pending)
+        self._pending = []
+        with self.display.frame():
+            for bbox in boxes:
+                self.display.bitmap(bbox[:2], self.composite(bbox))
@@ -96,6 +96,8 @@ import time
 import threading
 import Queue
 
+from metrics import Metrics
+
 try:
     
     import ftdi
@@ -114,6 +116,7 @@ try:
             self.usb.enableBitBang()
             self.usb.setBaudRate(3)
             
+            Metrics.forDevice(self)
             self.frameQueue = Queue.Queue()
             self.t = threading.Thread(target=self._run, args=[])
             self.t.setDaemon(True)
@@ -129,6 +132,8 @@ try:
             
         def _run(self):
             
+            metrics = Metrics.forDevice(self)
+            
             while True:
                 
                 t = time.time()
@@ -141,7 +146,7 @@ try:
                 
                 time.sleep(0.000010)
                 
-                #print 1.0 / (time.time() - t)                
+                metrics.observe('scan', time.time() - t)
                 
 
         
@@ -164,6 +169,7 @@ try:
             self.H = H
             self.frame = []
             
+            Metrics.forDevice(self)
             self.frameQueue = Queue.Queue()
             self.t = threading.Thread(target=self._run, args=[])
             self.t.setDaemon(True)
@@ -187,6 +193,8 @@ try:
             
         def _run(self):
             
+            metrics = Metrics.forDevice(self)
+            
             while True:
                 
                 t = time.time()
@@ -199,14 +207,14 @@ try:
                 
                 time.sleep(0.000010)
                 
-                #print 1.0 / (time.time() - t)
+                metrics.observe('scan', time.time() - t)
             
 except: pass
 
 
 if __name__ == '__main__':
 
-    import Image        
+    import assets
     
     W = 320; H = 240;
     #W = 160; H = 80;
@@ -214,10 +222,7 @@ if __name__ == '__main__':
     #d = FourBitLcdUsb(W, H, dev=0)
     d = FourBitLcdPar(W, H, dev=3)
 
-    image = Image.open('pumpkin.jpg')
-    image = image.resize((W, H)).convert('1')
-    image = image.convert('L').point(lambda x: 255-x, mode='1')
-    image = image.tostring()
+    image = str(assets.load('pumpkin.jpg', (W, H), invert=True).rows)
 
     frame = [ image ]
     
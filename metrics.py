@@ -0,0 +1,276 @@
+"""
+Refresh metrics for the displays and their drivers.
+
+Each driver carries a Metrics object, shared with the PyDisplay wrapping
+it, holding counters and latency histograms:
+
+    refreshes, bytes, commands, frames   - counters
+    diff, pack, transfer                 - histograms, in seconds
+
+snapshot() returns them as a dict, with the effective frame rate, and
+dump() writes every display's metrics to a file in the Prometheus text
+exposition format, for node_exporter's textfile collector:
+
+    metrics.startDump('/var/lib/node_exporter/textfile/pydisplay.prom')
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import os
+import time
+import threading
+import weakref
+
+# histogram bucket upper bounds in seconds, from a fast parallel port
+# write up to a full frame over 38400 baud serial
+BUCKETS = ( 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+            0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0 )
+
+# the window the frame rate is averaged over, in seconds
+FPS_WINDOW = 10.0
+
+HELP = { 'refreshes' : 'Refresh writes sent to the display.',
+         'bytes'     : 'Bytes of pixel data sent to the display.',
+         'commands'  : 'Separate writes sent to the display.',
+         'frames'    : 'Frames brought up to date on the display.',
+         'diff'      : 'Time spent finding changed pixels.',
+         'pack'      : 'Time spent converting pixels to the display layout.',
+         'transfer'  : 'Time spent sending pixels to the display.',
+         'scan'      : 'Time taken by one raster scan of the panel.',
+         'fps'       : 'Frames per second reaching the display.' }
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [ 0 ] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i in xrange(len(self.buckets)):
+            if value <= self.buckets[i]:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        # (bound, observations at or below it) for each bucket
+        total = 0
+        result = []
+        for (bound, count) in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Timer(object):
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        
+    def __enter__(self):
+        self.start = time.time()
+        
+    def __exit__(self, type, value, traceback):
+        self.metrics.observe(self.name, time.time() - self.start)
+        return False
+
+
+_registry = []
+_registryLock = threading.Lock()
+
+
+class Metrics(object):
+
+    def __init__(self, name):
+
+        self.name = name
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self._frames = []
+        self._lock = threading.Lock()
+
+        # number displays of the same type in the order they're made
+        with _registryLock:
+            _registry[:] = [ ref for ref in _registry if ref() is not None ]
+            self.instance = len([ ref for ref in _registry if ref().name == name ])
+            _registry.append(weakref.ref(self))
+
+    def forDevice(cls, device):
+        """
+        The metrics of a driver, made the first time they're asked for.
+        """
+        metrics = getattr(device, 'metrics', None)
+        if metrics is None:
+            metrics = cls(device.__class__.__name__)
+            device.metrics = metrics
+        return metrics
+    forDevice = classmethod(forDevice)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(seconds)
+
+    def timer(self, name):
+        """
+        Time a block into a histogram:
+        
+            with self.metrics.timer('pack'):
+                update = fb.columns(left, right)
+        """
+        return Timer(self, name)
+
+    def total(self, name):
+        """
+        Seconds observed so far in a histogram.
+        """
+        with self._lock:
+            if name not in self.histograms:
+                return 0.0
+            return self.histograms[name].sum
+
+    def frame(self):
+        """
+        Count a frame reaching the display, for the frame rate.
+        """
+        now = time.time()
+        with self._lock:
+            self.counters['frames'] = self.counters.get('frames', 0) + 1
+            self._frames.append(now)
+            while self._frames[0] < now - FPS_WINDOW:
+                self._frames.pop(0)
+
+    def fps(self):
+        """
+        Frames per second reaching the display, over the last FPS_WINDOW
+        or since the metrics were made if that's less.
+        """
+        now = time.time()
+        with self._lock:
+            recent = [ t for t in self._frames if t >= now - FPS_WINDOW ]
+        if not recent:
+            return 0.0
+        return len(recent) / max(min(FPS_WINDOW, now - self.started), 1e-6)
+
+    def snapshot(self):
+        """
+        The current values, as a dict of counters, histograms and fps.
+        """
+        result = { 'fps' : self.fps() }
+        with self._lock:
+            result.update(self.counters)
+            for (name, histogram) in self.histograms.items():
+                result[name] = { 'count'   : histogram.count,
+                                 'sum'     : histogram.sum,
+                                 'buckets' : histogram.cumulative() }
+        return result
+
+
+def registered():
+    """
+    Every Metrics object still in use.
+    """
+    with _registryLock:
+        return [ ref() for ref in _registry if ref() is not None ]
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+def exposition(displays=None):
+    """
+    Metrics in the Prometheus text exposition format, by default those of
+    every display.
+    """
+    if displays is None:
+        displays = registered()
+
+    # gather each metric family across displays, so it's declared once
+    families = {}
+    for metrics in displays:
+        labels = 'display="%s",instance="%d"' % (metrics.name, metrics.instance)
+        snapshot = metrics.snapshot()
+        for (name, value) in snapshot.items():
+            families.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(families.keys()):
+        samples = families[name]
+        help = HELP.get(name, name)
+
+        if name == 'fps':
+            lines.append('# HELP pydisplay_fps %s' % help)
+            lines.append('# TYPE pydisplay_fps gauge')
+            for (labels, value) in samples:
+                lines.append('pydisplay_fps{%s} %s' % (labels, _number(value)))
+
+        elif isinstance(samples[0][1], dict):
+            family = 'pydisplay_%s_seconds' % name
+            lines.append('# HELP %s %s' % (family, help))
+            lines.append('# TYPE %s histogram' % family)
+            for (labels, value) in samples:
+                for (bound, count) in value['buckets'] + [ (float('inf'), value['count']) ]:
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (family, labels, _number(bound), count))
+                lines.append('%s_sum{%s} %s' % (family, labels, _number(value['sum'])))
+                lines.append('%s_count{%s} %d' % (family, labels, value['count']))
+
+        else:
+            family = 'pydisplay_%s_total' % name
+            lines.append('# HELP %s %s' % (family, help))
+            lines.append('# TYPE %s counter' % family)
+            for (labels, value) in samples:
+                lines.append('%s{%s} %d' % (family, labels, value))
+
+    return '\n'.join(lines) + '\n'
+
+
+def dump(path, displays=None):
+    """
+    Write the exposition to a file, replacing it in one step so that a
+    collector never reads half of it.
+    """
+    temp = '%s.%d.tmp' % (path, os.getpid())
+    f = open(temp, 'w')
+    try:
+        f.write(exposition(displays))
+    finally:
+        f.close()
+    os.rename(temp, path)
+
+
+def startDump(path, interval=15):
+    """
+    Dump every display's metrics to path every interval seconds, from a
+    background thread.
+    """
+    def _run():
+        while True:
+            try:
+                dump(path)
+            except (IOError, OSError), e:
+                print 'metrics dump failed:', e
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_run)
+    thread.setDaemon(True)
+    thread.start()
+    return thread
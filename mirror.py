@@ -0,0 +1,233 @@
+"""
+One picture on several identical displays, encoded once.
+
+MirrorDisplay takes PyDisplays of the same type and draws on all of them
+together:
+
+    signs = MirrorDisplay([ pydisplay.MakeDisplay('ks0108', dev=0, bus='par'),
+                            pydisplay.MakeDisplay('ks0108', dev=1, bus='par'),
+                            pydisplay.MakeDisplay('ks0108', dev=0, bus='usb') ])
+    signs.text((0, 0), 'Welcome')
+
+Diffing, packing and transposing happen once, on an encoder that records
+the driver calls each refresh makes instead of sending them. The
+recording is then replayed on every real driver, each from its own I/O
+thread, so the displays refresh side by side.
+
+Every display acknowledges the frames it has finished. A display that
+falls more than backlog frames behind, or whose driver fails, has its
+queue dropped. It gets the whole screen again once it has caught up, so a
+slow or reconnecting panel never holds up the others.
+
+Once mirrored, the displays should only be drawn on through the mirror.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import copy
+import threading
+import Queue
+
+import metrics
+
+
+class Recorder(object):
+    """
+    Stands in for the driver of a mirror's encoder. Method calls are
+    recorded for replay; other attributes are read from a real driver.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self._calls = []
+        self.W = driver.W
+        self.H = driver.H
+
+    def __getattr__(self, name):
+        value = getattr(self._driver, name)
+        if not callable(value):
+            return value
+        def record(*args, **kwds):
+            self._calls.append((name, args, kwds))
+        return record
+
+    def take(self):
+        """
+        The calls recorded since the last take().
+        """
+        (calls, self._calls) = (self._calls, [])
+        return calls
+
+
+class Mirror(object):
+    """
+    One of the displays behind a MirrorDisplay, with its own I/O thread.
+    """
+
+    def __init__(self, display, backlog=4):
+        self.display = display
+        self.backlog = backlog
+        self.queued = 0       # the newest frame queued
+        self.acked = 0        # the newest frame on the display
+        self.stale = False    # needs the whole screen sent again
+        self.error = None
+        self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def idle(self):
+        return self.acked == self.queued
+
+    def send(self, frame, calls, resync=False):
+        """
+        Queue a frame's driver calls. Returns False if the display is stale
+        and the frame was dropped.
+        """
+        with self._lock:
+            if resync:
+                self.stale = False
+            elif self.stale:
+                return False
+            elif self.queued - self.acked >= self.backlog:
+                self._drop()
+                return False
+            self.queued = frame
+            self._queue.put((frame, calls))
+            return True
+
+    def flush(self):
+        self._queue.join()
+
+    def stop(self):
+        self._queue.put(None)
+        self.thread.join()
+
+    def _drop(self):
+
+        # forget the queued frames, the next resync covers them
+        self.stale = True
+        while True:
+            try: self._queue.get_nowait()
+            except Queue.Empty: break
+            self._queue.task_done()
+        self.queued = self.acked
+
+    def _run(self):
+
+        driver = self.display.display
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            (frame, calls) = item
+            try:
+                for (name, args, kwds) in calls:
+                    getattr(driver, name)(*args, **kwds)
+            except Exception, e:
+                if self.error is None:
+                    print 'mirror %s failed: %s' % (self.display.__class__.__name__, e)
+                with self._lock:
+                    self.error = e
+                    self._drop()
+            else:
+                with self._lock:
+                    self.error = None
+                    if not self.stale:
+                        self.acked = frame
+            self._queue.task_done()
+
+
+class MirrorDisplay(object):
+
+    def __init__(self, displays, backlog=4):
+        """
+        displays must all be the same type and size. A display may fall
+        backlog frames behind before it is dropped and resent the screen.
+        """
+        template = displays[0]
+        for display in displays:
+            assert display.__class__ is template.__class__, 'mirrored displays must be the same type'
+            assert (display.W, display.H) == (template.W, template.H), 'mirrored displays must be the same size'
+
+        self.mirrors = [ Mirror(display, backlog) for display in displays ]
+        self.frames = 0
+        self._lock = threading.Lock()
+
+        # a copy of the first display with a recorder for its driver, which
+        # does the diffing and packing for all of them
+        self.recorder = Recorder(template.display)
+        encoder = copy.copy(template)
+        encoder.display = self.recorder
+        encoder.metrics = self.recorder.metrics = metrics.Metrics('Mirror' + template.__class__.__name__)
+        encoder._lock = threading.RLock()
+        encoder._pipeline = None
+        encoder._depth = 0
+        encoder._work = None
+        encoder.transmit = self._transmit
+        encoder.clear = self.clear
+        self.encoder = encoder
+        self.clear()
+
+    def __getattr__(self, name):
+        # everything else is the encoder's: drawing, frames, the pipeline
+        return getattr(self.encoder, name)
+
+    def clear(self):
+        encoder = self.encoder
+        with encoder.idle():
+            encoder.__class__.clear(encoder)
+            self._dispatch(encoder.fb)
+
+    def _transmit(self, fb, changes, mixes=()):
+        encoder = self.encoder
+        encoder.__class__.transmit(encoder, fb, changes, mixes)
+        self._dispatch(fb)
+
+    def _dispatch(self, fb):
+
+        with self._lock:
+            calls = self.recorder.take()
+            if calls:
+                self.frames += 1
+                for mirror in self.mirrors:
+                    mirror.send(self.frames, calls)
+
+            # send the whole screen, packed once, to every display that has
+            # been dropped and since caught up
+            stale = [ mirror for mirror in self.mirrors if mirror.stale and mirror.idle() ]
+            if stale:
+                self.encoder.refresh(fb)
+                calls = self.recorder.take()
+                for mirror in stale:
+                    mirror.send(self.frames, calls, resync=True)
+
+    def acks(self):
+        """
+        The newest frame each display has acknowledged, in order, and the
+        newest frame sent.
+        """
+        return ([ mirror.acked for mirror in self.mirrors ], self.frames)
+
+    def flush(self):
+        """
+        Wait until every display has caught up or been dropped.
+        """
+        self.encoder.flush()
+        for mirror in self.mirrors:
+            mirror.flush()
+
+    def stop(self):
+        """
+        Send everything still queued and stop the I/O threads.
+        """
+        self.encoder.stopPipeline()
+        for mirror in self.mirrors:
+            mirror.stop()
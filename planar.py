@@ -28,6 +28,10 @@ DATA3 = 0x08
 
 class EL320_240(object):
     
+    # rough transfer costs in seconds, see cost.py
+    commandCost = 1e-3     # sync pulses for every row, twice
+    byteCost    = 4e-6     # two nibbles, sent twice
+    
     def __init__(self):
 
         self.W = 320
@@ -115,6 +119,10 @@ class EL320_240(object):
 
 class EL640_200SK(object):
     
+    # rough transfer costs in seconds, see cost.py
+    commandCost = 1e-3     # sync pulses for every row, twice
+    byteCost    = 4e-6     # two nibbles, sent twice
+    
     def __init__(self):
 
         self.W = 640
@@ -199,6 +207,10 @@ try:
     
     class EL320_240_USB(EL320_240):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 8e-3     # sync pulses for every row, twice
+        byteCost    = 32e-6    # clocked nibbles, sent twice
+        
         def __init__(self, dev=0):
             
             super(EL320_240USB, self).__init__()
@@ -1,143 +1,107 @@
 #include <linux/ppdev.h>
 #include <linux/parport.h>
 #include <sys/ioctl.h>
+#include <sys/time.h>
+#include <errno.h>
 
 #include <stdio.h>
 
-void gu3900_write(int fd, char* data, int len)
+// bus program instructions, see busprogram.py
+enum
 {
-    // for each byte in the input sequence
-    int i = 0;
-    for (; i < len; ++i)
-    {
-        // write this byte to the data pins
-        char d = data[i];
-        ioctl(fd, PPWDATA, &d);
-                        
-        // wait for RDY
-        int status = PARPORT_STATUS_BUSY;
-        do {
-            ioctl(fd, PPRSTATUS, &status);
-        } while (status & PARPORT_STATUS_BUSY);
-
-        // toggle WR
-        struct ppdev_frob_struct frob = { PARPORT_CONTROL_STROBE, 0 };
-        frob.val  = PARPORT_CONTROL_STROBE;
-        ioctl(fd, PPFCONTROL, &frob);
-        frob.val = 0;
-        ioctl(fd, PPFCONTROL, &frob);
-    }
-}
+    OP_DATA = 1,    // the next input byte to the data pins
+    OP_LITERAL,     // value: a byte to the data pins
+    OP_CONTROL,     // mask, value: set control lines
+    OP_WAIT,        // mask, value: poll the status lines until they match
+    OP_DELAY,       // low, high: spin for some microseconds
+    OP_LOOP,        // start of the part run for each input byte
+    OP_NEXT         // back to OP_LOOP while there's input left
+};
 
-#include <time.h>
+// the operand bytes after each instruction
+static const int operands[] = { 0, 0, 1, 2, 2, 2, 0, 0 };
 
-void ndelay(int delay)
+static void udelay(int us)
 {
-    int spin = 0;
-    while (spin++ < delay/4) {}
+    struct timeval start, now;
+    gettimeofday(&start, 0);
+    do {
+        gettimeofday(&now, 0);
+    } while ((now.tv_sec - start.tv_sec) * 1000000 + (now.tv_usec - start.tv_usec) < us);
 }
 
-#define ndelay(x)
-
-int _delay = 0;//1000;// * 1000;
-
-void sed1330_command(int fd, char cmd)
-{   
-    struct ppdev_frob_struct frob = { 0, 0 };
+int bus_run(int fd, const unsigned char* program, int plen, const unsigned char* data, int len)
+{
+    int pc = 0;         // the next instruction
+    int loop = -1;      // the instruction after OP_LOOP
+    int i = 0;          // the next input byte
 
-    // set CS = 0
-    frob.mask = PARPORT_CONTROL_INIT;
-    frob.val  = 0;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
+    while (pc < plen)
+    {
+        unsigned char op = program[pc++];
+        if (op < OP_DATA || op > OP_NEXT || pc + operands[op] > plen)
+        {
+            errno = EINVAL;
+            return -1;
+        }
+        const unsigned char* arg = program + pc;
+        pc += operands[op];
 
-    // set A0 = 1
-    frob.mask = PARPORT_CONTROL_SELECT;
-    frob.val  = 0;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
-    
-    // write this byte to the data pins
-    char arg = cmd;
-    ioctl(fd, PPWDATA, &arg);
-    ndelay(_delay);
-                    
-    // toggle WR
-    frob.mask = PARPORT_CONTROL_STROBE;
-    frob.val  = PARPORT_CONTROL_STROBE;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
-    
-    frob.val = 0;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
-}
+        switch (op)
+        {
+        case OP_DATA:
+        {
+            if (i >= len)
+            {
+                errno = EINVAL;
+                return -1;
+            }
+            unsigned char d = data[i++];
+            if (ioctl(fd, PPWDATA, &d) < 0) return -1;
+            break;
+        }
+        case OP_LITERAL:
+        {
+            unsigned char d = arg[0];
+            if (ioctl(fd, PPWDATA, &d) < 0) return -1;
+            break;
+        }
+        case OP_CONTROL:
+        {
+            struct ppdev_frob_struct frob = { arg[0], arg[1] };
+            if (ioctl(fd, PPFCONTROL, &frob) < 0) return -1;
+            break;
+        }
+        case OP_WAIT:
+        {
+            unsigned char status;
+            do {
+                if (ioctl(fd, PPRSTATUS, &status) < 0) return -1;
+            } while ((status & arg[0]) != arg[1]);
+            break;
+        }
+        case OP_DELAY:
+            udelay(arg[0] | arg[1] << 8);
+            break;
 
-void sed1330_write(int fd, char* data, int len)
-{
-    struct ppdev_frob_struct frob = { 0, 0 };
-    
-    // set CS = 0
-    frob.mask = PARPORT_CONTROL_INIT;
-    frob.val  = 0;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
+        case OP_LOOP:
+            loop = pc;
+            if (i >= len)
+            {
+                // no input at all: skip the loop
+                while (pc < plen && program[pc] != OP_NEXT)
+                {
+                    unsigned char skip = program[pc];
+                    pc += 1 + (skip <= OP_NEXT ? operands[skip] : 0);
+                }
+                pc++;
+            }
+            break;
 
-    // set A0 = 0
-    frob.mask = PARPORT_CONTROL_SELECT;
-    frob.val  = PARPORT_CONTROL_SELECT;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
-    
-    // for each byte in the input sequence
-    int i = 0;
-    for (; i < len; ++i)
-    {
-        // write this byte to the data pins
-        char arg = data[i];
-        ioctl(fd, PPWDATA, &arg);
-        ndelay(_delay);
-        
-        // toggle WR
-        frob.mask = PARPORT_CONTROL_STROBE;
-        frob.val  = PARPORT_CONTROL_STROBE;
-        ioctl(fd, PPFCONTROL, &frob);
-        ndelay(_delay);
-        
-        frob.val = 0;
-        ioctl(fd, PPFCONTROL, &frob);
-        ndelay(_delay);
+        case OP_NEXT:
+            if (loop >= 0 && i < len) pc = loop;
+            break;
+        }
     }
+    return 0;
 }
-
-void gu300_write(int fd, char* data, int len)
-{
-    struct ppdev_frob_struct frob = { 0, 0 };
-    
-    // set CS = 0
-    frob.mask = PARPORT_CONTROL_AUTOFD;
-    frob.val  = PARPORT_CONTROL_AUTOFD;
-    ioctl(fd, PPFCONTROL, &frob);
-    ndelay(_delay);
-    
-    // for each byte in the input sequence
-    int i = 0;
-    for (; i < len; ++i)
-    {
-        // write this byte to the data pins
-        char arg = data[i];
-        ioctl(fd, PPWDATA, &arg);
-        ndelay(_delay);
-        
-        // toggle WR
-        frob.mask = PARPORT_CONTROL_STROBE;
-        frob.val  = PARPORT_CONTROL_STROBE;
-        ioctl(fd, PPFCONTROL, &frob);
-        ndelay(_delay);
-        
-        frob.val = 0;
-        ioctl(fd, PPFCONTROL, &frob);
-        ndelay(_delay);
-    }    
-}
-
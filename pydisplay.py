@@ -1,81 +1,659 @@
 """
 Graphics interface to supported display types.
 
+MakeDisplay() looks display types up in a registry and only imports the
+driver module for the type asked for, so a program driving one display
+doesn't probe the buses of all the others. Other packages can add their
+own types with register(), or with a 'pydisplay.drivers' setuptools entry
+point.
+
 Copyright (c) 2006 spacemarmot@users.sourceforge.net
 
 This file is released under the GNU Lesser General Public Licence.
 See the file LICENSE for details.
 """
 
+from __future__ import with_statement
+
 import Image
+import ImageChops
 from ImageDraw import ImageDraw, Draw
 import ImageFont
-import ImageChops
 
 print ''
 
-import ks0108
-import t6963c
-import sed1330
-import sed1520
-import noritake
-import planar
-import babcock
-import lcd
+import damage
+import cost
+import metrics
+import bitpack
+import glyphs
+import dither
+import assets
+from framebuffer import Framebuffer, align
 
 import time
+import threading
+import Queue
+import traceback
+
+# the write mix modes of the Noritake GU3900 and GU7000
+(OVER, OR, AND, XOR) = range(4)
 
    
+# display types, each the PyDisplay subclass or its dotted name; the
+# built in types are registered at the bottom of this module
+_drivers = {}
+
+def register(type, driver):
+    """
+    Make a display type available to MakeDisplay(). driver is a PyDisplay
+    subclass, or its dotted name so that its module is only imported when
+    the first display of the type is made:
+    
+        pydisplay.register('ST7920', 'st7920.pydisplay.ST7920')
+    """
+    _drivers[type.upper()] = driver
+
+def drivers():
+    """
+    The registered display types.
+    """
+    return sorted(_drivers.keys())
+
+def _plugin(type):
+
+    # a driver installed as a setuptools entry point, looked for only when
+    # a type isn't registered since pkg_resources is slow to import
+    try:
+        import pkg_resources
+    except ImportError:
+        return None
+    for entry in pkg_resources.iter_entry_points('pydisplay.drivers'):
+        if entry.name.upper() == type:
+            return entry.load()
+    return None
+
 def MakeDisplay(type, *args, **kwds):
     type = type.upper()
-    display = { 'T6963C'     : T6963C,
-                'KS0108'     : KS0108,
-                'HD61202'    : KS0108,
-                'GU3900DMA'  : GU3900DMA,
-                'GU3900'     : GU3900,
-                'GU7000'     : GU7000,
-                'GU311'      : GU311,
-                'GU300'      : GU300,
-                'GU355'      : GU300,
-                'GU372'      : GU300,                
-                'SED1330'    : SED1330,
-                'SED1335'    : SED1330,
-                'SED133x'    : SED1330,
-                'SED1D13305' : SED1330,
-                'SED1520'    : SED1520,
-                'EL320_240'  : EL320_240,
-                'EL640_200SK': EL640_200SK,
-                'GD120C280'  : GD120C280,
-                'LCD4'       : FourBitLcd }
-    
-    return display[type](*args, **kwds)
+    driver = _drivers.get(type) or _plugin(type)
+    if driver is None:
+        raise ValueError('unknown display type %s, not one of %s' % (type, ', '.join(drivers())))
+    if isinstance(driver, basestring):
+        (module, name) = driver.rsplit('.', 1)
+        driver = getattr(__import__(module, {}, {}, [name]), name)
+    _drivers[type] = driver
+    return driver(*args, **kwds)
+
+class Frame(object):
+    """
+    Groups a batch of draw calls into a single refresh:
+    
+        with display.frame():
+            display.text((0, 0), 'hello')
+            display.rectangle((0, 0, 63, 15), outline=1)
+            
+    The frame is discarded if the block raises.
+    """
+    
+    def __init__(self, display):
+        self.display = display
+        
+    def __enter__(self):
+        self.display.begin()
+        return self.display
+    
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.display.commit()
+        else:
+            self.display.abort()
+        return False
+
+
+class Idle(object):
+    """
+    Holds off drawing threads and waits for the pipeline to empty, so the
+    driver can be used directly:
+    
+        with display.idle():
+            display.display.setBrightness(50)
+    """
+    
+    def __init__(self, display):
+        self.display = display
+        
+    def __enter__(self):
+        self.display._lock.acquire()
+        try:
+            self.display.flush()
+        except:
+            self.display._lock.release()
+            raise
+        return self.display
+    
+    def __exit__(self, type, value, traceback):
+        self.display._lock.release()
+        return False
+
+
+class Pipeline(object):
+    """
+    Refreshes a display in the background. The threads that draw and
+    commit frames are the render stage; committed frames then pass through
+    two threads joined by bounded queues:
+    
+        pack     - diffs each frame against the framebuffer and updates it
+        transmit - sends the changes down the bus
+        
+    When the bus falls behind, transmit takes everything waiting in its
+    queue at once and sends the newest framebuffer over all their changes,
+    so the display skips straight to the latest state.
+    """
+    
+    def __init__(self, display, depth=2):
+        self.display = display
+        self.packs = Queue.Queue(depth)
+        self.sends = Queue.Queue(depth)
+        self.threads = [ threading.Thread(target=self._pack),
+                         threading.Thread(target=self._transmit) ]
+        for thread in self.threads:
+            thread.setDaemon(True)
+            thread.start()
+            
+    def flush(self):
+        self.packs.join()
+        self.sends.join()
+        
+    def stop(self):
+        self.packs.put(None)
+        for thread in self.threads:
+            thread.join()
+            
+    def _pack(self):
+        
+        while True:
+            item = self.packs.get()
+            try:
+                if item is None:
+                    self.sends.put(None)
+                    return
+                (updates, mixes) = item
+                changes = self.display.pack(updates, mixes)
+                if changes or mixes:
+                    self.sends.put((self.display.fb.copy(), changes, mixes))
+            except:
+                traceback.print_exc()
+            finally:
+                self.packs.task_done()
+                
+    def _transmit(self):
+        
+        while True:
+            items = [ self.sends.get() ]
+            # anything queued behind it is newer
+            while True:
+                try: items.append(self.sends.get_nowait())
+                except Queue.Empty: break
+                
+            frames = [ item for item in items if item is not None ]
+            try:
+                if frames:
+                    # xors commute, so the mix writes of every frame can
+                    # go ahead of the newest framebuffer
+                    fb = frames[-1][0]
+                    changes = reduce(lambda a, b: a + b, [ c for (f, c, m) in frames ])
+                    mixes = reduce(lambda a, b: a + b, [ m for (f, c, m) in frames ])
+                    self.display.transmit(fb, changes, mixes)
+            except:
+                traceback.print_exc()
+                
+            for item in items:
+                self.sends.task_done()
+            if None in items:
+                return
+
 
 class PyDisplay(object):
     
+    # the direction the display's memory is addressed in, see damage.changes()
+    axis = None
+    
+    # whether the controller can scroll the whole screen itself, across and
+    # down, see scroll(); and the memory position it's showing at top left
+    hscroll = False
+    vscroll = False
+    origin = (0, 0)
+    
+    # screens of display memory, and while double buffered the one being
+    # drawn on and the one shown, see startFlipping()
+    buffers = 1
+    flipping = False
+    page = 0
+    shown = 0
+    
     def __init__(self, display, transpose=False):
         self.W = display.W
         self.H = display.H
         self.display = display
+        self.bus = cost.BusCost.forDevice(display)
+        self.metrics = metrics.Metrics.forDevice(display)
+        self._depth = 0
+        self._work = None
+        self._image = None
+        self._lock = threading.RLock()
+        self._pipeline = None
         self.clear()
         
     def clear(self):
-        self.image = Image.new('1', (self.display.W, self.display.H), color=1)
-        self.refresh(Image.new('1', (self.display.W, self.display.H), color=0))
+        with self.idle():
+            self.fb = Framebuffer(self.display.W, self.display.H)
+            self._image = None
+            self.refresh(self.fb)
+            if self.flipping:
+                # and the page being shown
+                (page, self.page) = (self.page, self.shown)
+                self.refresh(self.fb)
+                self.page = page
+                self._stale = []
+        
+    def getImage(self):
+        # a PIL view of the framebuffer, kept in step with it by commit()
+        if self._image is None:
+            self._image = self.fb.toImage()
+            if self.origin != (0, 0):
+                # the framebuffer holds display memory, scrolled round
+                (x, y) = self.origin
+                self._image = ImageChops.offset(self._image, -x, -y)
+        return self._image
+    
+    image = property(getImage)
+        
+    def frame(self):
+        return Frame(self)
+        
+    def begin(self):
+        """
+        Start a frame. Draw calls up to the matching commit() go to a
+        working image, and are sent to the display all at once. Other
+        threads wait at begin() until the frame is committed.
+        """
+        self._lock.acquire()
+        if self._depth == 0:
+            self._work = self.image
+            self._damage = []
+            self._mixes = []
+            self._aborted = False
+            self._origin = self.origin
+        self._depth += 1
+        
+    def commit(self):
+        """
+        End a frame. The outermost commit() diffs and refreshes once.
+        """
+        assert self._depth > 0, 'commit() without begin()'
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                self._commit()
+        finally:
+            self._lock.release()
+            
+    def _commit(self):
+        
+        image, boxes, mixes = self._work, self._damage, self._mixes
+        self._work = None
+        self._damage = []
+        self._mixes = []
+        
+        # diff only inside the damaged regions, or the whole screen if an
+        # op couldn't say where it drew
+        (W, H) = (self.display.W, self.display.H)
+        if None in boxes:
+            boxes = [ (0, 0, W, H) ]
+        boxes = [ damage.clip(bbox, W, H) for bbox in boxes ]
+        boxes = [ bbox for bbox in boxes if bbox ]
+        
+        if self._aborted:
+            # start again from the framebuffer, once it's caught up, and
+            # undo any scroll
+            self.flush()
+            if self.origin != self._origin:
+                self.origin = self._origin
+                self.setOrigin(*self.origin)
+            self._image = None
+            return
+        
+        if self.origin != (0, 0):
+            # scrolled in hardware: the framebuffer and refreshes are in
+            # display memory coordinates, which wrap round from the origin
+            boxes = sum([ damage.wrap(bbox, self.origin, W, H) for bbox in boxes ], [])
+            image = ImageChops.offset(image, *self.origin)
+            
+        boxes = damage.disjoint([ align(bbox) for bbox in boxes ])
+        
+        # render: take the new pixels out of the working image
+        updates = [ (bbox, image.crop(bbox).tostring()) for bbox in boxes ]
+        
+        if self._pipeline:
+            self._pipeline.packs.put((updates, mixes))
+        else:
+            self.transmit(self.fb, self.pack(updates, mixes), mixes)
+            
+    def pack(self, updates, mixes=()):
+        """
+        Compare (bbox, packed bytes) updates with the framebuffer, bring it
+        up to date, and return the changed boxes. The xors of mixes, see
+        ColumnWiseRefresh.xor(), go into the framebuffer first, as they
+        reach the display first.
+        """
+        for (bbox, packed, columns) in mixes:
+            aligned = align(bbox)
+            size = (aligned[2]-aligned[0], aligned[3]-aligned[1])
+            old = Image.fromstring('1', size, self.fb.get(aligned))
+            new = ImageChops.difference(old, Image.fromstring('1', size, packed))
+            self.fb.put(aligned, new.tostring())
+        changes = []
+        for (bbox, packed) in updates:
+            with self.metrics.timer('diff'):
+                changes += self.fb.changes(bbox, packed, self.axis)
+            self.fb.put(bbox, packed)
+        return changes
+        
+    def transmit(self, fb, changes, mixes=()):
+        """
+        Send the changed boxes of a framebuffer to the display, after the
+        mix writes of any xors.
+        """
+        for (bbox, packed, columns) in mixes:
+            (left, top, right, bottom) = bbox
+            with self.metrics.timer('transfer'):
+                self.mixWrite(columns, left, top/8, right-left, (bottom-top)/8, XOR)
+            self.metrics.count('refreshes')
+            self.metrics.count('bytes', len(columns))
+            self.metrics.count('commands')
+            
+        if self.flipping:
+            # the hidden page is still a frame behind the one shown, so it
+            # gets the changes of that frame as well
+            (changes, self._stale) = (changes + self._stale, changes)
+            
+        regions = self.plan(changes)
+        for bbox in regions:
+            # refresh() times its own packing and bus writes
+            self.refresh(fb, bbox)
+            self.metrics.count('refreshes')
+            self.metrics.count('bytes', self.size(bbox))
+            self.metrics.count('commands', self.commands(bbox))
+        if regions or mixes:
+            self.metrics.frame()
+            
+        if self.flipping and regions:
+            (self.shown, self.page) = (self.page, self.shown)
+            self.showPage(self.shown)
+            self.metrics.count('commands')
+        
+    def plan(self, changes):
+        """
+        Choose the cheapest set of writes covering the changed boxes: the
+        spans of the changes merged wherever that pays off, a single span
+        around all of them, or the whole screen.
+        """
+        if not changes:
+            return []
+        
+        spans = [ self.span(bbox) for bbox in changes ]
+        options = ( damage.coalesce(spans, self.cost),
+                    [ self.span(reduce(damage.union, spans)) ],
+                    [ self.span((0, 0, self.display.W, self.display.H)) ] )
+        
+        return min(options, key=lambda regions: sum(map(self.cost, regions)))
+        
+    def cost(self, bbox):
+        """
+        Estimated seconds to refresh a region already widened by span().
+        """
+        return self.bus.estimate(self.size(bbox), self.commands(bbox))
+        
+    def size(self, bbox):
+        """
+        Bytes of pixel data sent to refresh a region.
+        """
+        return damage.area(bbox) / 8
+        
+    def commands(self, bbox):
+        """
+        Separate writes needed to refresh a region.
+        """
+        return 1
+        
+    def calibrate(self, rounds=4):
+        """
+        Measure the bus by resending parts of the current screen, which
+        leaves the picture unchanged, and fit the cost model to the timings.
+        """
+        (W, H) = (self.display.W, self.display.H)
+        regions = [ self.span((0, 0, 8, 8)), self.span((0, 0, W, H)) ]
+        
+        with self.idle():
+            self.bus.reset()
+            for i in xrange(rounds):
+                for bbox in regions:
+                    t = time.time()
+                    self.refresh(self.fb, bbox)
+                    self.bus.record(self.size(bbox), self.commands(bbox), time.time() - t)
+                
+        return self.bus.calibrate()
+        
+    def abort(self):
+        """
+        End a frame and throw away everything drawn since begin().
+        """
+        assert self._depth > 0, 'abort() without begin()'
+        self._aborted = True
+        self.commit()
+        
+    def span(self, bbox):
+        """
+        Widen a changed box to the region a refresh of it actually rewrites.
+        """
+        return bbox
+        
+    def startPipeline(self, depth=2):
+        """
+        Refresh in the background, see Pipeline. commit() returns as soon
+        as the frame is queued, unless depth frames are already waiting.
+        """
+        with self._lock:
+            if not self._pipeline:
+                self._pipeline = Pipeline(self, depth)
+                
+    def stopPipeline(self):
+        """
+        Send everything still queued and go back to refreshing in commit().
+        """
+        with self._lock:
+            if self._pipeline:
+                self._pipeline.stop()
+                self._pipeline = None
+                
+    def startFlipping(self):
+        """
+        Double buffer, on controllers with more than one screen of memory:
+        each frame is written to a page that isn't shown, which is shown
+        once the frame is all there, so nothing appears half drawn. The
+        page that was shown then catches up on that frame's changes as
+        part of the next one.
+        """
+        assert self.buffers > 1, '%s has no offscreen memory' % self.__class__.__name__
+        with self.idle():
+            if self.flipping:
+                return
+            if self.origin != (0, 0):
+                # pages are shown from the top left, so undo any scroll
+                image = self.image
+                self.origin = (0, 0)
+                self.setOrigin(0, 0)
+                self.fb = Framebuffer.fromImage(image)
+                self.refresh(self.fb)
+            # the hidden page starts out as a copy
+            (self.flipping, self.shown, self.page) = (True, 0, 1)
+            self._stale = []
+            self.refresh(self.fb)
+            
+    def stopFlipping(self):
+        """
+        Go back to drawing on the page shown.
+        """
+        with self.idle():
+            if not self.flipping:
+                return
+            # the hidden page catches up, so both pages hold the frame:
+            # single buffered drawing may go to either of them
+            for bbox in self.plan(self._stale):
+                self.refresh(self.fb, bbox)
+            self._stale = []
+            if self.shown != 0:
+                # finish on the first page, where single buffered drawing goes
+                self.shown = 0
+                self.showPage(0)
+            (self.flipping, self.page) = (False, 0)
+            
+    def showPage(self, page):
+        """
+        Show a page of display memory, for controllers with buffers > 1.
+        """
+        raise NotImplementedError
+        
+    def flush(self):
+        """
+        Wait until every committed frame has reached the display.
+        """
+        if self._pipeline:
+            self._pipeline.flush()
+            
+    def idle(self):
+        return Idle(self)
+        
+    def invalidate(self, bbox=None):
+        """
+        Mark a region of the working image as changed, None for unknown.
+        """
+        self._damage.append(bbox)
              
     def bitmap(self, xy, bitmap, fill=None):
-        t = time.time();
-        image = self.image.copy()
-        image.paste(bitmap, xy)
+        if isinstance(bitmap, assets.Asset):
+            if self._blit(xy, bitmap):
+                return
+            bitmap = bitmap.image
+        elif bitmap.mode != '1':
+            # a photo or a grey icon
+            bitmap = dither.dither(bitmap)
         (x, y) = xy
         (w, h) = bitmap.size
-        self.refresh( image, (x, y, x+w, y+h) )
-        #print 'bitmap: ', 1.0 / (time.time() - t)
+        with self.frame():
+            self.invalidate( (x, y, x+w, y+h) )
+            self._work.paste(bitmap, xy)
+        
+    def _blit(self, xy, asset):
+        
+        # an asset's rows go straight into the framebuffer, if they fall on
+        # whole bytes of it and no frame is being drawn
+        (x, y) = xy
+        (w, h) = asset.size
+        bbox = (x, y, x+w, y+h)
+        with self._lock:
+            if self._depth or self._pipeline or self.origin != (0, 0):
+                return False
+            if x % 8 or w % 8 or damage.clip(bbox, self.W, self.H) != bbox:
+                return False
+            with self.metrics.timer('diff'):
+                changes = self.fb.changes(bbox, asset.rows, self.axis)
+            self.fb.put(bbox, asset.rows)
+            self._image = None
+            self.transmit(self.fb, changes)
+        return True
+        
+    def xor(self, xy, bitmap):
+        """
+        Exclusive-or a bitmap onto the screen. Doing it again puts back
+        what was there.
+        """
+        (x, y) = xy
+        (w, h) = bitmap.size
+        bbox = (x, y, x+w, y+h)
+        with self.frame():
+            self.invalidate(bbox)
+            self._work.paste(ImageChops.difference(self._work.crop(bbox), bitmap), xy)
+        
+    def scroll(self, dx=0, dy=0, bbox=None, fill=0):
+        """
+        Move the screen, or a box of it, dx pixels right and dy down, and
+        fill the strips uncovered with fill. The controller scrolls the
+        whole screen itself where it can, see setOrigin(), and only the
+        strips are sent; otherwise the box is redrawn. That needs nothing
+        drawn yet in the frame, so scroll first and then draw what comes in:
+        
+            with display.frame():
+                display.scroll(0, -8)
+                display.text((0, display.H-8), line)
+        """
+        (W, H) = (self.display.W, self.display.H)
+        if bbox is None:
+            bbox = (0, 0, W, H)
+        bbox = damage.clip(bbox, W, H)
+        if not bbox or (dx, dy) == (0, 0):
+            return
+        (left, top, right, bottom) = bbox
+        
+        with self._lock:
+            fresh = (self._depth == 0 or not (self._damage or self._mixes))
+            hardware = ( fresh and not self.flipping and bbox == (0, 0, W, H) and
+                         abs(dx) < W and abs(dy) < H and
+                         (self.hscroll or not dx) and (self.vscroll or not dy) )
+            if hardware:
+                with self.idle():
+                    (x, y) = self.origin
+                    self.origin = ((x - dx) % W, (y - dy) % H)
+                    self.setOrigin(*self.origin)
+                    self.metrics.count('commands')
+                    # what scrolled off one edge is now at the other
+                    self._image = ImageChops.offset(self.image, dx, dy)
+                    if self._depth:
+                        self._work = self._image
+                    
+            with self.frame():
+                if hardware:
+                    strips = [ (0, 0, dx, H), (W+dx, 0, W, H), (0, 0, W, dy), (0, H+dy, W, H) ]
+                else:
+                    moved = Image.new('1', (right-left, bottom-top), fill)
+                    moved.paste(self._work.crop(bbox), (dx, dy))
+                    self._work.paste(moved, (left, top))
+                    strips = [ bbox ]
+                for strip in strips:
+                    strip = damage.clip(strip, W, H)
+                    if strip:
+                        if hardware:
+                            self._work.paste(fill, strip)
+                        self.invalidate(strip)
+                        
+    def setOrigin(self, x, y):
+        """
+        Show display memory from (x, y) at the top left of the screen, for
+        controllers with hscroll or vscroll set.
+        """
+        raise NotImplementedError
         
     def text(self, xy, text, fill=None, font=None, anchor=None):
         #text = text.replace(' ','_') # nasty workaround for PIL bug on amd64
-        image = self.image.copy()
-        Draw(image).text(xy, text, fill, font, anchor)
-        self.refresh(image)
+        with self.frame():
+            draw = Draw(self._work)
+            if font is None:
+                font = draw.getfont()
+            bbox = glyphs.getbbox(text, font, anchor)
+            if bbox:
+                (x, y) = xy
+                self.invalidate( (x+bbox[0], y+bbox[1], x+bbox[2], y+bbox[3]) )
+            glyphs.text(draw, xy, text, font, fill, anchor)
         
     _imageop = ( 'arc', 'chord', 'line', 'shape', 'pieslice', 'point', 'polygon',
                  'rectangle', 'ellipse')
@@ -84,15 +662,17 @@ class PyDisplay(object):
         exec "def %s(self, *args, **keys): self.imageop(ImageDraw.%s, *args, **keys) " % (op, op)
 
     def imageop(self, op, *args, **keys):
-        t = time.time();
-        image = self.image.copy()
-        op(Draw(image), *args, **keys)
-        self.refresh(image)
-        #print str(op), 1.0 / (time.time() - t)
+        if args: xy = args[0]
+        else: xy = keys.get('xy')
+        with self.frame():
+            self.invalidate( damage.extent(xy, keys.get('width')) )
+            op(Draw(self._work), *args, **keys)
+
 
 class FourBitLcd(PyDisplay):
     
     def __init__(self, W=320, H=240, dev=0, bus='usb'):
+        import lcd
         if bus == 'usb' :
             display = lcd.FourBitLcdUsb(W, H, dev)
         elif bus == 'par' :
@@ -102,46 +682,59 @@ class FourBitLcd(PyDisplay):
     def write(self, data, address=0):
         self.display.write(data)
         
-    def bitmap(self, xy, bitmap, fill=None):
-        t = time.time();
-        image = self.image.copy()
-        image.paste(bitmap, xy)
-        self.refresh(image)
+    def span(self, bbox):
+        return (0, 0, self.display.W, self.display.H)
         
-    def refresh(self, image, bbox=None):
-
-        # send the updated rows    
-        update = image.tostring()
-        self.write(update)
+    def refresh(self, fb, bbox=None):
 
-        # update the framebuffer
-        self.image = image    
+        # send the whole frame
+        update = fb.rows(0, self.display.H)
+        with self.metrics.timer('transfer'):
+            self.write(update)
 
         
 class RowWiseRefresh(PyDisplay):
     
-    def refresh(self, image, bbox=None):
+    axis = 'rows'
+    
+    def span(self, bbox):
+        (left, top, right, bottom) = bbox
+        return (0, top, self.display.W, bottom)
+        
+    def refresh(self, fb, bbox=None):
 
-        if bbox == None:        
-            # find the difference from the current framebuffer
-            bbox = ImageChops.difference(image, self.image).getbbox()
-            
-        if bbox != None:
+        if bbox == None:
+            bbox = (0, 0, self.display.W, self.display.H)
             
-            (left, top, right, bottom) = bbox
+        (left, top, right, bottom) = bbox
 
-            # send the updated rows    
-            update = image.crop((0,top,self.display.W,bottom))
-            update = update.tostring()
-            self.write(update, top*self.display.W/8) 
-
-            # update the framebuffer
-            self.image = image
+        # send the updated rows, which the framebuffer already holds in
+        # the display's own format
+        update = fb.rows(top, bottom)
+        with self.metrics.timer('transfer'):
+            self.write(update, top*fb.stride)
             
             
+class Virtual(RowWiseRefresh):
+    
+    def __init__(self, W=128, H=64):
+        import virtual
+        display = virtual.VirtualDevice(W, H)
+        PyDisplay.__init__(self, display)
+        
+    vscroll = True
+        
+    def write(self, data, address):
+        self.display.write(data, address)
+        
+    def setOrigin(self, x, y):
+        self.display.setStartLine(y)
+        
+        
 class T6963C(RowWiseRefresh):
 
     def __init__(self, W=320, H=240, dev=0):
+        import t6963c
         display = t6963c.T6963C(W, H, dev)
         PyDisplay.__init__(self, display)
         
@@ -153,24 +746,43 @@ class T6963C(RowWiseRefresh):
 class SED1330(RowWiseRefresh):
     
     def __init__(self, W=320, H=240, OSC=10000000, dev=0, bus='par'):
+        import sed1330
         if bus == 'usb' :
             display = sed1330.SED1330UBW(W, H, OSC, dev)
         elif bus == 'par' :
             display = sed1330.SED1330Par(W, H, OSC, dev)
         PyDisplay.__init__(self, display)
         
+    # the first layer can be split in two screen blocks, and moved to the
+    # third screen of memory, past the second layer's
+    vscroll = True
+    buffers = 2
+        
     def clear(self):
-        self.write('\x00' * 0x8000, 0)
-        PyDisplay.clear(self)
+        with self.idle():
+            self.display.setCursorAddress(0)
+            self.display.writeDisplayMemory('\x00' * 0x8000)
+            PyDisplay.clear(self)
         
     def write(self, data, address):
-        self.display.setCursorAddress(address)
+        self.display.setCursorAddress((0, self.display.sl2)[self.page] + address)
         self.display.writeDisplayMemory(data)
+        
+    def showPage(self, page):
+        (W, H) = (self.display.W, self.display.H)
+        base = (0, self.display.sl2)[page]
+        self.display.scroll(base, H, self.display.sl1, H, 0, 0)
+        
+    def setOrigin(self, x, y):
+        # block 1 shows the rows from y down, block 3 the rows above it
+        (W, H) = (self.display.W, self.display.H)
+        self.display.scroll(y*W/8, H-y, self.display.sl1, H, 0, 0)
             
 
 class EL320_240(RowWiseRefresh):
     
     def __init__(self, dev=0, bus='usb'):
+        import planar
         if bus == 'par':
             display = planar.EL320_240_Par(dev)
         elif bus == 'usb':
@@ -183,6 +795,7 @@ class EL320_240(RowWiseRefresh):
 class EL640_200SK(RowWiseRefresh):
     
     def __init__(self, dev=0, bus='usb'):
+        import planar
         if bus == 'par':
             display = planar.EL640_200SK_Par(dev)
         elif bus == 'usb':
@@ -192,79 +805,117 @@ class EL640_200SK(RowWiseRefresh):
     def write(self, data, address):
         self.display.write(data, address)
 
-    def refresh(self, image, bbox=None):
+    def span(self, bbox):
+        # every update is clocked in from the top of the screen
+        (left, top, right, bottom) = bbox
+        return (0, 0, self.display.W, bottom)
+        
+    def refresh(self, fb, bbox=None):
 
-        if bbox == None:        
-            # find the difference from the current framebuffer
-            bbox = ImageChops.difference(image, self.image).getbbox()
-            
-        if bbox != None:
+        if bbox == None:
+            bbox = (0, 0, self.display.W, self.display.H)
             
-            (left, top, right, bottom) = bbox
+        (left, top, right, bottom) = bbox
 
-            # send the updated rows    
-            update = image.crop((0,0,self.display.W,bottom))
-            update = update.tostring()
+        # send the updated rows    
+        update = fb.rows(0, bottom)
+        with self.metrics.timer('transfer'):
             self.write(update, 0) 
-
-            # update the framebuffer
-            self.image = image        
         
 class ColumnWiseRefresh(PyDisplay):
 
-    def clear(self):
+    axis = 'columns'
+    
+    def span(self, bbox):
+        (left, top, right, bottom) = bbox
+        return ((left/8)*8, 0, right, self.display.H)
         
-        self.write('\x00' * (self.display.W/8) * self.display.H, 0)
-        PyDisplay.clear(self)
+    def clear(self):
+        with self.idle():
+            self.write('\x00' * (self.display.W/8) * self.display.H, 0)
+            PyDisplay.clear(self)
         
-    def refresh(self, image, bbox=None):
+    def refresh(self, fb, bbox=None):
         
-        # find the difference from the current framebuffer
         if bbox == None:
-            bbox = ImageChops.difference(image, self.image).getbbox()
+            bbox = (0, 0, self.display.W, self.display.H)
             
-        if bbox != None:
-            
-            (left, top, right, bottom) = bbox
-            left /= 8; left *= 8
-            right *= 8; right /= 8
-
-            # get the pixels to be updated
-            update = image.crop((left,0,right,self.display.H))
-            # rotate the update into the display's vertical address orientation
-            update = update.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
-            # send the update
-            update = update.tostring()
+        (left, top, right, bottom) = bbox
+        left /= 8; left *= 8
+
+        # get the updated columns in the display's vertical address orientation
+        with self.metrics.timer('pack'):
+            update = fb.columns(left, right)
+        # send the update
+        with self.metrics.timer('transfer'):
             self.write(update, left*(self.display.H/8))
             
-            # update the framebuffer
-            self.image = image
+    def xor(self, xy, bitmap):
+        
+        # without a write mix mode, or while pages or a scroll move the
+        # screen about in memory, diff and refresh as usual
+        if not hasattr(self, 'mixWrite') or self.flipping or self.origin != (0, 0):
+            return PyDisplay.xor(self, xy, bitmap)
+        
+        (x, y) = xy
+        (w, h) = bitmap.size
+        bbox = damage.clip((x, y, x+w, y+h), self.display.W, self.display.H)
+        if not bbox:
+            return
+        
+        # the whole pages around the bitmap, widened to whole bytes for the
+        # framebuffer; xor leaves the padding alone
+        (left, top, right, bottom) = bbox
+        (top, bottom) = ((top/8)*8, ((bottom+7)/8)*8)
+        region = (left, top, right, bottom)
+        (l, t, r, b) = align(region)
+        delta = Image.new('1', (r-l, b-t))
+        delta.paste(bitmap, (x-l, y-t))
+        delta.paste(0, (right-l, 0, r-l, b-t))
+        packed = delta.tostring()
+        with self.metrics.timer('pack'):
+            pages = (b-t)/8
+            columns = bitpack.columns(packed, r-l, b-t)[(left-l)*pages:(right-l)*pages]
+        
+        with self.frame():
+            # commit() sends the mix write ahead of the rest of the frame,
+            # and anything drawn under it since is diffed as usual
+            self._work.paste(ImageChops.difference(self._work.crop((l, t, r, b)), delta), (l, t))
+            self._mixes.append((region, packed, columns))
             
             
 class GD120C280(ColumnWiseRefresh):
 
     def __init__(self, dev=0, bus='par'):
+        import babcock
         if bus == 'par' :
             display = babcock.GD120C280Par(dev)
         elif bus == 'usb' :
             display = babcock.GD120C280USB(dev)
         PyDisplay.__init__(self, display)
-        self.page = 0
         
-    def bitmap(self, xy, bitmap, fill=None):
-        t = time.time();
-        image = self.image.copy()
-        image.paste(bitmap, xy)
-        (x, y) = xy
-        (w, h) = bitmap.size
-        self.refresh(image)
-        #print 'bitmap: ', 1.0 / (time.time() - t)
+    buffers = 2
         
-    def write(self, data, address):
+    def size(self, bbox):
+        # both pages are written, unless flipping
+        return (2, 1)[self.flipping] * ColumnWiseRefresh.size(self, bbox)
+        
+    def commands(self, bbox):
+        # a cursor move for each column on each page written
+        (left, top, right, bottom) = bbox
+        return (2, 1)[self.flipping] * (right - left)
+        
+    def write(self, data, address, pages=None):
         
         display = self.display
+        
+        # each page in turn, showing it once it's written, or when double
+        # buffered just the hidden one
+        if pages is None:
+            pages = [0,1]
+            if self.flipping: pages = [ self.page ]
 
-        for page in [0,1]:
+        for page in pages:
             
             display.selectOffscreenPage(page)
             display.setCursorMode(1)
@@ -273,29 +924,61 @@ class GD120C280(ColumnWiseRefresh):
             display.setCursorPosition(col, row)
             display.writePixels(data)
             
-            display.selectDisplayPage(page)
+            if not self.flipping:
+                display.selectDisplayPage(page)
+                
+    def showPage(self, page):
+        self.display.selectDisplayPage(page)
         
     def clear(self):
-        self.write('\x00' * (280*15), 0)
-        self.image = Image.new('1', (self.display.W, self.display.H), color=0)
+        with self.idle():
+            self.write('\x00' * (280*15), 0, [0,1])
+            self.fb = Framebuffer(self.display.W, self.display.H)
+            self._image = None
        
     
 class GU3900DMA(ColumnWiseRefresh):
     
     def __init__(self, W=256, H=64, dev=0):
-        display = noritake.GU3900DMAParallel(W, H, dev)
+        import gu3900dma
+        display = gu3900dma.GU3900DMAParallel(W, H, dev)
+        self.hscroll = (W*H/4 <= 0x1000)
+        self.buffers = 1 + (W*H/4 <= 0x1000)
+        self.mirrored = False
         PyDisplay.__init__(self, display)
         
     def clear(self):
-        self.write('\x00' * (self.W*self.H/4), 0)
-        PyDisplay.clear(self)
+        with self.idle():
+            self.display.writeBitImage('\x00' * (self.W*self.H/4), 0)
+            PyDisplay.clear(self)
         
     def bitmap(self, xy, bitmap, fill=None):
-        self.setDisplayStartAddress(0)
+        with self.idle():
+            self.setDisplayStartAddress(self._start())
         super(GU3900DMA, self).bitmap(xy, bitmap, fill)
         
+    def _start(self):
+        # the address of the top left pixel shown
+        return (self.shown*self.W + self.origin[0]) * self.H/8
+        
     def write(self, data, address):
-        self.display.writeBitImage(data, address)
+        self.display.writeBitImage(data, self.page*self.W*self.H/8 + address)
+        if self.mirrored and not self.flipping:
+            # and to the copy the screen runs on into, see setOrigin()
+            self.display.writeBitImage(data, address + self.W*self.H/8)
+            
+    def setOrigin(self, x, y):
+        if not self.mirrored:
+            # the screen runs on past the last column into the second page,
+            # which from now on holds a copy of the first
+            self.mirrored = True
+            self.display.writeBitImage(self.fb.columns(0, self.W), self.W*self.H/8)
+        self.display.setDisplayStartAddress(self._start())
+        
+    def showPage(self, page):
+        # the second page no longer holds a copy of the first
+        self.mirrored = False
+        self.display.setDisplayStartAddress(self._start())
 
     def setDisplayStartAddress(self, *args, **kwds):
         self.display.setDisplayStartAddress(*args, **kwds)
@@ -303,17 +986,19 @@ class GU3900DMA(ColumnWiseRefresh):
 class GU3900(ColumnWiseRefresh):
     
     def __init__(self, W=256, H=64, dev=0, bus='par'):
+        import gu3900
         if bus == 'par' :
-            display = noritake.GU3900Par(W, H, dev)
+            display = gu3900.GU3900Par(W, H, dev)
         elif bus == 'ser' :
-            display = noritake.GU3900Ser(W, H, dev)
+            display = gu3900.GU3900Ser(W, H, dev)
         elif bus == 'usb' :
-            display = noritake.GU3900USB(W, H, dev)
+            display = gu3900.GU3900USB(W, H, dev)
         PyDisplay.__init__(self, display)
 
     def clear(self):
-        self.display.clear()
-        PyDisplay.clear(self)
+        with self.idle():
+            self.display.clear()
+            PyDisplay.clear(self)
         
     def write(self, data, address):
         W = len(data) / 8
@@ -321,18 +1006,25 @@ class GU3900(ColumnWiseRefresh):
         arg = '%c%c%s%s' % ( W%256, W/256, '\x08\x00\x01', data )
         self.display._display_rt_bit_image(arg)
 
+    def mixWrite(self, data, x, page, w, pages, mode):
+        # columns of pages, combined with the screen by the write mix mode
+        self.display.setWriteMode(mode)
+        self.display.drawImage(x, page, w, pages, data)
+        self.display.setWriteMode(OVER)
+
     def setDisplayStartAddress(self, *args, **kwds):
         self.display.setDisplayStartAddress(*args, **kwds)
         
 class GU7000(ColumnWiseRefresh):
     
     def __init__(self, W=140, H=16, dev=0, bus='usb'):
+        import gu7000
         if bus == 'par' :
-            display = noritake.GU7000Par(W, H, dev)
+            display = gu7000.GU7000Par(W, H, dev)
         elif bus == 'ser' :
-            display = noritake.GU7000Ser(W, H, dev)
+            display = gu7000.GU7000Ser(W, H, dev)
         elif bus == 'usb' :
-            display = noritake.GU7000USB(W, H, dev)
+            display = gu7000.GU7000USB(W, H, dev)
         PyDisplay.__init__(self, display)
         
     def write(self, data, address):
@@ -341,6 +1033,12 @@ class GU7000(ColumnWiseRefresh):
         self.display.setCursor(address/H,address%H)
         self.display.displayBitImage(W, H, data)
 
+    def mixWrite(self, data, x, page, w, pages, mode):
+        self.display.setWriteMixMode(mode)
+        self.display.setCursor(x, page)
+        self.display.displayBitImage(w, pages, data)
+        self.display.setWriteMixMode(OVER)
+
     def setDisplayStartAddress(self, *args, **kwds):
         pass
     
@@ -349,217 +1047,219 @@ class GU300(ColumnWiseRefresh):
     def __init__(self, W=256, H=64, dev=0, fastwrite=True):
         self.W = W
         self.H = H
-        display = noritake.GU300Parallel(W, H, dev, fastwrite)
+        import gu300
+        display = gu300.GU300Parallel(W, H, dev, fastwrite)
+        # screen 1 and a copy of it, or a second page, have to fit below
+        # screen 2
+        self.hscroll = (W*H/4 <= 0x1000)
+        self.buffers = 1 + (W*H/4 <= 0x1000)
+        self.mirrored = False
         PyDisplay.__init__(self, display)
 
     def clear(self):
-        self.write('\x00' * 0x2000, 0)
-        PyDisplay.clear(self)
+        with self.idle():
+            self.display.setCursorAddress(0)
+            self.display.writeData('\x00' * 0x2000)
+            PyDisplay.clear(self)
         
     def write(self, data, address):
-        self.display.setCursorAddress(address)
+        self.display.setCursorAddress(self.page*self.W*self.H/8 + address)
         self.display.writeData(data)
+        if self.mirrored and not self.flipping:
+            # and to the copy the screen runs on into, see setOrigin()
+            self.display.setCursorAddress(address + self.W*self.H/8)
+            self.display.writeData(data)
+            
+    def setOrigin(self, x, y):
+        if not self.mirrored:
+            # screen 1 runs on past its last column, so from now on keep a
+            # copy of it there
+            self.mirrored = True
+            self.display.setCursorAddress(self.W*self.H/8)
+            self.display.writeData(self.fb.columns(0, self.W))
+        self.display.setDisplayStartAddress(screen1=x*self.H/8, screen2=0x1000)
+        
+    def showPage(self, page):
+        # the second page no longer holds a copy of the first
+        self.mirrored = False
+        self.display.setDisplayStartAddress(screen1=page*self.W*self.H/8, screen2=0x1000)
         
     def setDisplayStartAddress(self, *args, **kwds):
         self.display.setDisplayStartAddress(*args, **kwds)
 
             
-class GU311(PyDisplay):
+class PageWiseRefresh(PyDisplay):
+    
+    axis = 'pages'
+    
+    def span(self, bbox):
+        # whole 8-pixel pages
+        (left, top, right, bottom) = bbox
+        return (left, (top/8)*8, right, ((bottom+7)/8)*8)
+        
+    def commands(self, bbox):
+        # one write per page
+        (left, top, right, bottom) = bbox
+        return (bottom - top + 7) / 8
+        
+    def pages(self, fb, bbox):
+        # the pages covering a region, first page number and page bytes
+        (left, top, right, bottom) = self.span(bbox)
+        right = min(right, self.display.W)
+        with self.metrics.timer('pack'):
+            return (top/8, fb.pages((left, top, right, bottom)))
+        
+        
+class GU311(PageWiseRefresh):
     
     def __init__(self, dev=0):
-        display = noritake.GU311(dev)
+        import gu311
+        display = gu311.GU311(dev)
         display.W = 128
         display.H = 32
         PyDisplay.__init__(self, display)
     
     def clear(self):
-        self.display.clear()
-        PyDisplay.clear(self)
+        with self.idle():
+            self.display.clear()
+            PyDisplay.clear(self)
         
-    def refresh(self, image, bbox=None):
+    def refresh(self, fb, bbox=None):
         
-        # find the difference from the current framebuffer
-        bbox = ImageChops.difference(image, self.image).getbbox()
-        if bbox != None:
-            
-            (left, top, right, bottom) = bbox
-            right *= 8; right /= 8
-            left /= 8; left *= 8
-            top /= 8;
-            bottom += 7; bottom /= 8;
-            
-            # for each Nx8 row segment
-            for row in xrange(top, bottom):        
-                y = row * 8
-                update = ''
-                # build a horizontal array of 8-bit vertical stripes
-                for x in xrange(left, right, 8):
-                    # get an 8x8 chunk and rotate into the display's vertical address orientation
-                    chunk = image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270)
-                    # add this 8x8 chunk to the update
-                    update += chunk.tostring()
-                
-                # write out the update for this Nx8 row
-                self.display.graphicWrite(update, left*4 + row)
-                    
-            # update the framebuffer
-            self.image = image
-
+        if bbox == None:
+            bbox = (0, 0, self.display.W, self.display.H)
+        (left, top, right, bottom) = bbox
+        
+        (first, pages) = self.pages(fb, bbox)
         
-class KS0108(PyDisplay):
+        # the address of column x of a page is x*4 + page, so each page is
+        # a write of its own
+        with self.metrics.timer('transfer'):
+            for (row, update) in enumerate(pages):
+                self.display.graphicWrite(update, left*4 + first + row)
+
+
+class KS0108(PageWiseRefresh):
     
     def __init__(self, W=128, H=64, dev=0, bus='usb'):
+        import ks0108
         if bus == 'par' :
             display = ks0108.KS0108Par(W, H, dev)
         elif bus == 'usb' :
             display = ks0108.KS0108UBW(W, H, dev)
+        # the start line turns the 64 lines of RAM round
+        self.vscroll = (H == 64)
         PyDisplay.__init__(self, display)
+        
+    def setOrigin(self, x, y):
+        for chip in (1, 2):
+            self.display.setCS1(chip == 1)
+            self.display.setCS2(chip == 2)
+            self.display.setDisplayStartLine(y)
+
+    def commands(self, bbox):
+        # one write per page on each chip the region touches
+        (left, top, right, bottom) = bbox
+        chips = (left < 64) + (right > 64)
+        return chips * PageWiseRefresh.commands(self, bbox)
 
     def write(self, data):
         self.display.writeDisplayData([ ord(c) for c in data ])
 
-    def refresh(self, image, bbox=None):
+    def refresh(self, fb, bbox=None):
         
-        # find the difference from the current framebuffer
         if bbox == None:
-            bbox = ImageChops.difference(image, self.image).getbbox()
+            bbox = (0, 0, self.display.W, self.display.H)
+        (left, top, right, bottom) = bbox
+        right = min(right, self.display.W)
+        
+        (first, pages) = self.pages(fb, bbox)
+        
+        with self.metrics.timer('transfer'):
             
-        if bbox != None:
+            # each chip drives 64 columns
+            for (chip, start, stop) in [ (1, max(left, 0), min(right, 64)),
+                                         (2, max(left, 64), min(right, 128)) ]:
                 
-            (left, top, right, bottom) = bbox
-            right *= 8; right /= 8
-            left /= 8; left *= 8
-            top /= 8;
-            bottom += 7; bottom /= 8;
-            
-            # for each Nx8 row segment
-            for page in xrange(top, bottom):
+                if start >= stop: continue
                 
-                # if there's something to paint on chip 1
-                if left < 64:
-        
-                    # select chip 1
-                    self.display.setCS1(1)
-                    self.display.setCS2(0)
-                    
-                    # reset the cursor
-                    self.display.setPage(page)
-                    self.display.setAddress(left)
-                    
-                    start = left
-                    stop = 64
-                    if (right < 64): stop = right
-                    
-                    # add each 8x8 chunk to the update region
-                    segment = ''
-                    for x in xrange(start,stop,8):
-                        y = page*8
-                        # get an 8x8 chunk and rotate it into the display's vertical pixel format
-                        chunk = image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270)
-                        # add this 8x8 chunk to the update
-                        segment += chunk.tostring()
-                        
-                    # send the update for this segment
-                    self.write(segment)
-    
-                # if there's something to paint on chip 2
-                if right > 63:
+                # select the chip
+                self.display.setCS1(chip == 1)
+                self.display.setCS2(chip == 2)
                 
-                    # select chip 2
-                    self.display.setCS1(0)
-                    self.display.setCS2(1)
-                    
-                    start = 64
-                    if (left > 64): start = left
-                    stop = right
+                for (page, update) in enumerate(pages):
                     
                     # reset the cursor
-                    self.display.setPage(page)
-                    self.display.setAddress(start-64)
-            
-                    # add each 8x8 chunk to the update region
-                    segment = ''
-                    for x in xrange(start,stop,8):
-                        y = page*8
-                        # get an 8x8 chunk and rotate it into the display's vertical pixel format
-                        chunk = image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270)
-                        # add this 8x8 chunk to the update
-                        segment += chunk.tostring()
+                    self.display.setPage(first + page)
+                    self.display.setAddress(start % 64)
                     
-                    # send the update for this segment
-                    self.write(segment)
-                
-            # update the framebuffer
-            self.image = image
+                    # send this chip's part of the page
+                    self.write(update[start-left:stop-left])
+            
 
-class SED1520(PyDisplay):
+class SED1520(PageWiseRefresh):
     
     def __init__(self, dev=0):
+        import sed1520
         display = sed1520.SED1520(dev)
         PyDisplay.__init__(self, display)
         
-    def refresh(self, image, bbox=None):
+    def commands(self, bbox):
+        (left, top, right, bottom) = bbox
+        chips = (left < 61) + (right > 61)
+        return chips * PageWiseRefresh.commands(self, bbox)
+        
+    def refresh(self, fb, bbox=None):
         
-        # find the difference from the current framebuffer
         if bbox == None:
-            bbox = ImageChops.difference(image, self.image).getbbox()
-            
-        if bbox != None:
-            
-            (left, top, right, bottom) = bbox
-            right *= 8; right /= 8
-            left /= 8; left *= 8
-            top /= 8;
-            bottom += 7; bottom /= 8;
+            bbox = (0, 0, self.display.W, self.display.H)
+        (left, top, right, bottom) = bbox
+        right = min(right, self.display.W)
+        
+        (first, pages) = self.pages(fb, bbox)
+        
+        with self.metrics.timer('transfer'):
             
-            # for each Nx8 row segment
-            for page in xrange(top, bottom):
+            # each chip drives 61 columns, numbered from its right hand edge
+            for (chip, start, stop) in [ (1, max(left, 0), min(right, 61)),
+                                         (2, max(left, 61), min(right, 122)) ]:
                 
-                # if there's something to paint on chip 1
-                if left < 64:
-        
-                    # select chip 1
-                    self.display.selectChip(1)
-                    
-                    # reset the cursor
-                    self.display.setPageAddress(page)
-                    self.display.setColumnAddress(0)
-                    
-                    # add each 8x8 chunk to the update region
-                    segment = ''
-                    for x in xrange(0,64,8):
-                        
-                        y = page*8
-                        # get an 8x8 chunk and rotate it into the display's vertical pixel format
-                        chunk = image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270)
-                        # add this 8x8 chunk to the update
-                        segment += chunk.tostring()
-                        
-                    # send the update for this segment
-                    self.display.writeDisplayData(segment[:61][::-1])
-    
-                # if there's something to paint on chip 2
-                if right > 60:
+                if start >= stop: continue
+                
+                # select the chip
+                self.display.selectChip(chip)
                 
-                    # select chip 2
-                    self.display.selectChip(2)
+                for (page, update) in enumerate(pages):
                     
-                    # reset the cursor
-                    self.display.setPageAddress(page)
-                    self.display.setColumnAddress(0)
-            
-                    # add each 8x8 chunk to the update region
-                    segment = ''
-                    for x in xrange(61,61+64,8):
-                        
-                        y = page*8
-                        # get an 8x8 chunk and rotate it into the display's vertical pixel format
-                        chunk = image.crop((x, y, x+8, y+8)).transpose(Image.ROTATE_270)
-                        # add this 8x8 chunk to the update
-                        segment += chunk.tostring()
+                    # reset the cursor to the rightmost column
+                    self.display.setPageAddress(first + page)
+                    self.display.setColumnAddress(61*chip - stop)
                     
-                    # send the update for this segment
-                    self.display.writeDisplayData(segment[:61][::-1])
-                
-            # update the framebuffer
-            self.image = image
\ No newline at end of file
+                    # send this chip's part of the page, right to left
+                    self.display.writeDisplayData(update[start-left:stop-left][::-1])
+
+
+#____ built in display types _____________________________________________________
+
+for (name, driver) in [ ('T6963C',      T6963C),
+                        ('KS0108',      KS0108),
+                        ('HD61202',     KS0108),
+                        ('GU3900DMA',   GU3900DMA),
+                        ('GU3900',      GU3900),
+                        ('GU7000',      GU7000),
+                        ('GU311',       GU311),
+                        ('GU300',       GU300),
+                        ('GU355',       GU300),
+                        ('GU372',       GU300),
+                        ('SED1330',     SED1330),
+                        ('SED1335',     SED1330),
+                        ('SED133x',     SED1330),
+                        ('SED1D13305',  SED1330),
+                        ('SED1520',     SED1520),
+                        ('EL320_240',   EL320_240),
+                        ('EL640_200SK', EL640_200SK),
+                        ('GD120C280',   GD120C280),
+                        ('LCD4',        FourBitLcd),
+                        ('VIRTUAL',     Virtual) ]:
+    register(name, driver)
+del name, driver
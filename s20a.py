@@ -21,6 +21,7 @@ ESC = '\x1B'
 try:
 
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class S20A(object):
         
@@ -40,8 +41,28 @@ try:
             
             self.RD = 1
             
+            # run the byte loop in C if the library is installed
+            try:
+                self.write = self.program(p).bind()
+                print 's20a: using fast I/O library'
+            except:
+                print 's20a: fast I/O library not available, using pyparallel'
+            
             self.init()
             
+        def program(self, p):
+            
+            program = busprogram.Program(p)
+            program.set(self.setCS, 0)
+            program.set(self.setA0, 0)
+            program.loop()
+            program.data(self.setData)
+            program.pulse(self.setWR, 0)
+            program.delay(5)    # the write cycle, padded out with calls below
+            program.next()
+            program.set(self.setCS, 1)
+            return program
+            
         def write(self, s):
             
             self.setCS(0)
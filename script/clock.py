@@ -21,6 +21,9 @@ import re
 import urllib
 import threading
 
+import fonts
+import assets
+
 
 class Widget(object):
     
@@ -51,11 +54,7 @@ class Clock(Widget):
 
         Widget.__init__(self, scheduler, rect)        
         
-        draw = Draw(Image.new('1', (0,0)))
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            (w,h) = draw.textsize('12:55', self.font)
-            if w < self.W: break
+        self.font = fonts.fit('trebuc.ttf', '12:55', width=self.W, largest=100)
         
     def render(self):
         
@@ -78,11 +77,7 @@ class Date(Widget):
 
         Widget.__init__(self, scheduler, rect)        
         
-        draw = Draw(Image.new('1', (0,0)))
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            (w,h) = draw.textsize('Wednesday', self.font)
-            if w < self.W: break
+        self.font = fonts.fit('trebuc.ttf', 'Wednesday', width=self.W, largest=100)
         
     def render(self):
         
@@ -102,15 +97,11 @@ class Mail(Widget):
         
         Widget.__init__(self, scheduler, rect)        
         
-        draw = Draw(Image.new('1', (0,0)))
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            (w,h) = draw.textsize('7', self.font)
-            if w < self.W-32: break
+        self.font = fonts.fit('trebuc.ttf', '7', width=self.W-32, largest=100)
 
         if mail == None: mail = gmail.GmailStatus()
         self.mail = mail
-        self.mailicon = Image.open('mail.gif').convert('L').point(lambda x: 255-x, mode='1')
+        self.mailicon = assets.load('mail.gif', method='none', invert=True).image
         
         self.update()
         
@@ -145,11 +136,7 @@ class Weather(Widget):
         
         Widget.__init__(self, scheduler, rect)        
 
-        draw = Draw(Image.new('1', (0,0)))
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            (w,h) = draw.textsize('77', self.font)
-            if w < self.W-36: break
+        self.font = fonts.fit('trebuc.ttf', '77', width=self.W-36, largest=100)
     
         # regexes for parsing weather reports
         self.icontag = re.compile('<icon_url_name>(.+).jpg</icon_url_name>')
@@ -188,7 +175,7 @@ class Weather(Widget):
             X = 30 + w
             draw.ellipse((X-2,2,X+2,6), outline=1, fill=0)
             
-            icon = Image.open(self.icon+'.gif').convert('L').point(lambda x: 255-x, mode='1')
+            icon = assets.load(self.icon+'.gif', method='none', invert=True).image
             draw.bitmap((0,2), icon, fill=1)
             
         except: pass
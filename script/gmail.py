@@ -51,6 +51,8 @@ import Image
 from ImageDraw import ImageDraw, Draw
 import ImageFont
 
+import fonts
+
 import threading
 
 class GmailAlert(Alert):
@@ -95,13 +97,9 @@ class GmailAlert(Alert):
         text = 'you have %d new messages' % self.newmail
         if self.newmail == 1: text = 'you have 1 new message'
         
-        font = None
-        (w,h) = (0,0)
-        
-        for size in xrange(100):
-            font = ImageFont.truetype('trebuc.ttf', 100-size)
-            (w,h) = font.getsize(text)
-            if w < W - 36: break
+        # remembered for each message count, so only the first alert measures
+        font = fonts.fit('trebuc.ttf', text, width=W-36, largest=100)
+        (w,h) = font.getsize(text)
             
         draw.text((h+6,(H-h)/2), text, font=font, fill=1)
 
@@ -28,6 +28,8 @@ font16 = ImageFont.truetype('DejaVuSans.ttf', 16)
 font9  = ImageFont.truetype('DejaVuSans.ttf', 9)
 
 import pydisplay
+import sprites
+import fonts
 display = pydisplay.MakeDisplay('el320_240', dev=2, bus='par')
 #display = pydisplay.MakeDisplay('el640_200SK', dev=2, bus='par')
 
@@ -63,20 +65,14 @@ class Mail(Widget):
             text = 'you have %d new messages' % newmail
             if newmail == 1: text = 'you have 1 new message'
             
-            font = None
-            (w,h) = (0,0)
-            
-            for size in xrange(100):
-                font = ImageFont.truetype('trebuc.ttf', 100-size)
-                (w,h) = font.getsize(text)
-                if w < self.W - (self.H+8): break
+            font = fonts.fit('trebuc.ttf', text, width=self.W-(self.H+8), largest=100)
+            (w,h) = font.getsize(text)
                 
             draw.text((self.H+8,(self.H-h)/2), text, font=font, fill=1)
     
             self.icon = Image.open('mail.gif').resize((self.H,self.H))
             draw.bitmap((0,0), self.icon, fill=1)
             
-            del font
 
             
 mail = Mail(scheduler, (0,0,320,33))
@@ -241,20 +237,22 @@ def randomPenguin(interval=0):
     
     penguin = Image.open('tux.jpg')
     _,_,w,h = penguin.getbbox()
+    bitmap = Image.new('1', penguin.size)
+    Draw(bitmap).bitmap((0,0), penguin, fill=1)
+    
+    # an empty screen, and tux wandering about as a sprite on it
+    (W,H) = (display.W, display.H)
+    display.bitmap((0,0), Image.new('1', (W,H)))
+    tux = sprites.Sprites(display).add(bitmap)
     
     for i in xrange(interval*2):
         
-        (W,H) = (display.W, display.H)
-        image = Image.new('1', (W,H))
-        
-        draw = Draw(image)
         Px += random.randint(-2,2)
         Px = max(Px,0); Px = min(Px,W-w)
         Py += random.randint(-2,2)
         Py = max(Py,0); Py = min(Py,H-h)
-        draw.bitmap((Px,Py), penguin, fill=1)
+        tux.show((Px,Py))
         
-        display.bitmap((0,0), image)
         time.sleep(0.5)
     
 def showStats(s):
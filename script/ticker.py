@@ -8,6 +8,8 @@ This file is released under the GNU Lesser General Public Licence.
 See the file LICENSE for details.
 """
 
+from __future__ import with_statement
+
 import Image
 from ImageDraw import ImageDraw, Draw
 import ImageFont
@@ -18,6 +20,9 @@ import time
 
 from widget import Widget
 import pydisplay
+import bitpack
+import glyphs
+import fonts
 
 def MakeTicker(display, *args, **kwds):
     
@@ -36,7 +41,7 @@ def MakeTicker(display, *args, **kwds):
     if isinstance(display, pydisplay.EL320_240):
         return EL320_240(display, *args, **kwds)
 
-    assert False
+    return Scroller(display, *args, **kwds)
 
 class RssTicker(Widget): 
 
@@ -52,23 +57,21 @@ class RssTicker(Widget):
         self.display = display
         self.ticker = MakeTicker(display, scheduler, rect)
 
-        for size in xrange(200,0,-1):
-            self.font = ImageFont.truetype('DejaVuSans.ttf', size)
-            w,h = self.font.getsize('qgjy9')
-            if h < self.H: break        
+        self.font = fonts.fit('DejaVuSans.ttf', 'qgjy9', height=self.H)
         
 
     # build a bitmap of a font-rendered string
     def render(self, text, font):
         
         # calculate the buffer size for the ticker text
-        image = Image.new('1', (0,0))
-        W,_ = Draw(image).textsize(text=text, font=font)
+        # the pen advance, so trailing spaces count, or the ink if it's wider
+        (l,t,r,b) = glyphs.getbbox(text, font) or (0,0,0,0)
+        W = max(r, glyphs.cache.advance(font, text))
         H = self.H
         
-        # render the ticker
+        # render the ticker from the text cache, the feed repeats itself
         image = Image.new('1', (W,H), color=0)
-        Draw(image).text((0,0), text=text, font=font, fill=0xff)
+        glyphs.text(Draw(image), (0,0), text, font, fill=0xff)
         #image.show(command='display')
         
         return image
@@ -124,6 +127,39 @@ class RssTicker(Widget):
             
 class Ticker(Widget): pass
 
+# any other display goes through the scroll() api, which the controller does
+# itself when the ticker is the whole screen and it can
+
+class Scroller(Ticker):
+
+    def __init__(self, display, scheduler, rect):
+        
+        super(Scroller, self).__init__(scheduler, rect)
+        
+        self.display = display
+        self.ticker = Image.new('1', (0,0))
+        
+        
+    def setTicker(self, ticker):
+        
+        t,l,r,b = ticker.getbbox()
+        W,H = r-l, self.H
+        image = Image.new('1', (W+self.W*2,H), color=0)
+        image.paste(ticker, (self.W,0))
+        self.ticker = image
+        
+        
+    def draw(self, offset):
+        
+        # move the band a column left, and draw the column that comes in,
+        # as one frame so the display shows them together
+        box = (self.X, self.Y, self.X+self.W, self.Y+self.H)
+        column = self.ticker.crop((offset+self.W-1, 0, offset+self.W, self.H))
+        with self.display.frame():
+            self.display.scroll(-1, 0, box)
+            self.display.bitmap((self.X+self.W-1, self.Y), column)
+        
+
 # code for rendering the clock graphics to the display is very device-specific
 #
 # here is a good example for a display that has overlayed graphics planes and
@@ -146,8 +182,8 @@ class GU300(Ticker):
         t,l,r,b = ticker.getbbox()
         image = Image.new('1', (r-l, self.display.H))
         image.paste(ticker, (0,self.Y))
-        ticker = image.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
-        self.ticker = ticker.tostring() + '\x00'*8*self.display.W
+        ticker = bitpack.columns(image.tostring(), r-l, self.display.H)
+        self.ticker = ticker + '\x00'*8*self.display.W
 
         
     # smoothly scroll a long bitmap through a circular frame buffer
@@ -206,8 +242,7 @@ class GU3900DMA(Ticker):
             image = self.display.image.copy()
             ticker = self.ticker.crop((offset,0,offset+self.W,self.H))
             image.paste(ticker, (self.X,self.Y))
-            image = image.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
-            image = image.tostring()
+            image = bitpack.columns(image.tostring(), *image.size)
                 
             # draw the clock to the framebuffer
             self.display.write(image, self.framebuffer)
@@ -244,8 +279,7 @@ class GU3900(Ticker):
         
         bbox = image.getbbox()
         image = image.crop((0, 0, bbox[2], 24))
-        image = image.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
-        self.ticker = image.tostring() + '\x00'*3*self.W
+        self.ticker = bitpack.columns(image.tostring(), bbox[2], 24) + '\x00'*3*self.W
         
         
     def draw(self, offset):
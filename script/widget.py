@@ -21,6 +21,10 @@ import re
 import urllib
 import threading
 
+import glyphs
+import fonts
+import assets
+
 
 class Alert(object): 
 
@@ -99,10 +103,7 @@ class Clock(Widget):
 
         Widget.__init__(self, scheduler, rect)        
         
-        for size in xrange(100,0,-1):
-            self.font = ImageFont.truetype('trebuc.ttf', size)
-            l,t,r,b = self.font.getmask('0123456789', '1').getbbox()
-            if (b-t) < self.H: break
+        self.font = fonts.fit('trebuc.ttf', '0123456789', height=self.H, ink=True, largest=100)
         
     def render(self, draw):
         
@@ -110,9 +111,9 @@ class Clock(Widget):
         hour = t.tm_hour%12
         if hour == 0: hour = 12
         text = '%d:%02d' % (hour, t.tm_min)
-        l,t,r,b = self.font.getmask(text, '1').getbbox()
+        l,t,r,b = glyphs.getbbox(text, self.font)
         self.W,self.H = (r-l), (b-t)
-        draw.text((-l,-t), text=text, font=self.font, fill=1)
+        glyphs.text(draw, (-l,-t), text, self.font, fill=1)
         
         
 class Date(Widget):
@@ -121,16 +122,13 @@ class Date(Widget):
 
         Widget.__init__(self, scheduler, rect)        
         
-        for size in xrange(100):
-            self.font = ImageFont.truetype('DejaVuSans.ttf', 100-size)
-            (w,h) = self.font.getsize('27 Www 2077')
-            if w < self.W: break
+        self.font = fonts.fit('DejaVuSans.ttf', '27 Www 2077', width=self.W, largest=100)
         
     def render(self, draw):
         
         (a,d) = self.font.getmetrics()
-        draw.text((0,d/2), time.strftime('%A'), font=self.font, fill=1)
-        draw.text((0,self.H*5/11), time.strftime('%d %b %Y'), font=self.font, fill=1)
+        glyphs.text(draw, (0,d/2), time.strftime('%A'), self.font, fill=1)
+        glyphs.text(draw, (0,self.H*5/11), time.strftime('%d %b %Y'), self.font, fill=1)
             
         
 class Mail(Widget):
@@ -139,10 +137,7 @@ class Mail(Widget):
         
         Widget.__init__(self, scheduler, rect)        
         
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            l,t,r,b = self.font.getmask('0123456789', '1').getbbox()
-            if (b-t) < self.H: break
+        self.font = fonts.fit('trebuc.ttf', '0123456789', height=self.H, ink=True, largest=100)
 
         if mail == None: mail = gmail.GmailStatus()
         self.mail = mail
@@ -165,8 +160,8 @@ class Mail(Widget):
             draw.bitmap((0,0), self.icon, fill=1)
            
             text = '%d' % newmail
-            l,t,r,b = self.font.getmask(text, '1').getbbox()
-            draw.text((self.H+2,-t), text=text, font=self.font, fill=1)
+            l,t,r,b = glyphs.getbbox(text, self.font)
+            glyphs.text(draw, (self.H+2,-t), text, self.font, fill=1)
             self.W = self.H + 6 + (r-l)
             self.H = b-t
             
@@ -177,10 +172,7 @@ class Weather(Widget):
         
         Widget.__init__(self, scheduler, rect)        
 
-        for size in xrange(100):
-            self.font = ImageFont.truetype('trebuc.ttf', 100-size)
-            l,t,r,b = self.font.getmask('0123456789', '1').getbbox()
-            if (b-t) < self.H: break
+        self.font = fonts.fit('trebuc.ttf', '0123456789', height=self.H, ink=True, largest=100)
     
         # regexes for parsing weather reports
         self.icontag = re.compile('<icon_url_name>(.+).jpg</icon_url_name>')
@@ -214,7 +206,7 @@ class Weather(Widget):
         
         try:
             
-            icon = Image.open(self.icon+'.gif').resize((self.H,self.H)).convert('L').point(lambda x: 255-x, mode='1')
+            icon = assets.load(self.icon+'.gif', (self.H,self.H), Image.NEAREST, method='none', invert=True).image
             draw.bitmap((X,0), icon, fill=1)
             X = self.H
             
@@ -222,9 +214,8 @@ class Weather(Widget):
         
         try:
             text = self.tempf
-            (w,h) = self.font.getsize(text)
-            l,t,r,b = self.font.getmask(text, '1').getbbox()
-            draw.text((X,-t), text, font=self.font, fill=1)
+            l,t,r,b = glyphs.getbbox(text, self.font)
+            glyphs.text(draw, (X,-t), text, self.font, fill=1)
             self.H = b-t
             X += 6+r-l
             
@@ -259,6 +250,7 @@ if __name__ == '__main__':
     #Mail(scheduler, (160-64, 40, 0, 36), gmail).start(display)
     
     display = pydisplay.MakeDisplay('ks0108', W=128, H=64, dev=0)
+    display.startPipeline()
     Clock(scheduler, (0, 0, 0, 30)).start(display)
     Date(scheduler, (80, 0, 48, 30)).start(display)
     Weather(scheduler, (0, 34, 0, 30)).start(display)
@@ -187,9 +187,14 @@ class SED1330(object):
 try:
 
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
 
     class SED1330Par(SED1330):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 120e-6   # CSRW and MWRITE with pyparallel
+        byteCost    = 12e-6    # three port writes per byte
+        
         def __init__(self, W, H, OSC=10000000, dev=0):
             
             p = parallel.Parallel(dev)
@@ -207,15 +212,14 @@ try:
             
             self.setData = p.setData        # pins 2-9
             
-            # enable the fast write if using the default wiring and the C library is installed
+            # run the byte loops in C if the library is installed
             try:
-                assert self.setWR == p.setDataStrobe
-                from ctypes import cdll
-                from sys import prefix
-                self._pydisplay = cdll.LoadLibrary(prefix + '/lib/python/site-packages/_pydisplay.so')
+                self._write = self.program(p, 0).bind()
+                self._command = self.program(p, 1).bind()
                 self.sendData    = self.fastWrite
                 self.sendCommand = self.fastCommand
-                self.fd = p._fd
+                self.commandCost = 15e-6
+                self.byteCost    = 3e-6
                 print 'sed1330: using fast I/O library'
             except:
                 self.sendData    = self.slowWrite
@@ -227,6 +231,17 @@ try:
             
             self.init()
             
+        def program(self, p, A0):
+            
+            program = busprogram.Program(p)
+            program.set(self.setCS, 0)
+            program.set(self.setA0, A0)
+            program.loop()
+            program.data(self.setData)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+            
         def slowCommand(self, cmd):
     
             self.setCS(0)
@@ -237,7 +252,7 @@ try:
             
         def fastCommand(self, cmd):
     
-            self._pydisplay.sed1330_command(self.fd, cmd)
+            self._command(chr(cmd))
         
         def slowWrite(self, data):
     
@@ -250,7 +265,7 @@ try:
                 
         def fastWrite(self, data):
     
-            self._pydisplay.sed1330_write(self.fd, data, len(data))
+            self._write(data)
 
 except: print 'SED1330 parallel not available'
 
@@ -260,6 +275,10 @@ try:
 
     class SED1330UBW(SED1330):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 12e-3    # four USB round trips per write
+        byteCost    = 25e-6    # hex encoded bulk writes
+        
         def __init__(self, W, H, OSC=10000000, dev=0):
             
             self.W = W
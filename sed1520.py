@@ -11,9 +11,14 @@ See the file LICENSE for details.
 try:
     
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class SED1520(object):
         
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 50e-6    # page and column address
+        byteCost    = 12e-6    # three port writes per byte
+        
         def __init__(self, dev = 0):
             
             p = parallel.Parallel(dev)
@@ -27,6 +32,20 @@ try:
             self.W = 122
             self.H = 32
             
+            # run the byte loops in C if the library is installed, a
+            # command and a write program for each chip
+            try:
+                self._programs = {}
+                for (chip, setE) in ((1, self.setE1), (2, self.setE2)):
+                    self._programs[chip] = (self.program(p, setE, 0).bind(),
+                                            self.program(p, setE, 1).bind())
+                self.sendCommand = self.fastCommand
+                self.writeDisplayData = self.fastWrite
+                self.byteCost = 3e-6
+                print 'sed1520: using fast I/O library'
+            except:
+                print 'sed1520: fast I/O library not available, using pyparallel'
+            
             self.init()
             
         def init(self):
@@ -49,8 +68,19 @@ try:
                 self.setPageAddress(0)
                 self.setColumnAddress(0)
     
+        def program(self, p, setE, A0):
+            
+            program = busprogram.Program(p)
+            program.set(self.setA0, A0)
+            program.loop()
+            program.data(self.setData)
+            program.pulse(setE, 1)
+            program.next()
+            return program
+            
         def selectChip(self, chip):
             
+            self.chip = chip
             self.setE = (self.setE1, self.setE2)[chip-1]
             
         def sendCommand(self, cmd):
@@ -86,6 +116,14 @@ try:
                 self.setE(1)
                 self.setE(0)
         
+        def fastCommand(self, cmd):
+            
+            self._programs[self.chip][0](chr(cmd))
+            
+        def fastWrite(self, data):
+            
+            self._programs[self.chip][1](data)
+            
         def reset(self):
             
             self.sendCommand(0xE2)
@@ -10,5 +10,6 @@ setup(name='pydisplay',                                                   \
     ext_modules=ext_modules,      \
     py_modules=[ 'noritake', 'gu311', 'gu300', 'gu3900', 'gu3900dma', 'gu7000',\
                  't20a', 's20a', 'sed1330', 'sed1520', 't6963c',          \
-                 'ftdi', 'planar', 'lcd', 'babcock', 'ubw', 'ks0108', 'pydisplay' ])
+                 'ftdi', 'planar', 'lcd', 'babcock', 'ubw', 'ks0108', 'damage', 'cost',\
+                 'bitpack', 'framebuffer', 'metrics', 'virtual', 'pydisplay', 'aiodisplay', 'tiled', 'mirror', 'layers', 'sprites', 'glyphs', 'fonts', 'dither', 'animation', 'assets', 'busprogram' ])
 
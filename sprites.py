@@ -0,0 +1,153 @@
+"""
+Sprites: bitmaps moved around the screen with the least redrawing.
+
+    sprites = Sprites(display)
+    ball = sprites.add(Image.open('ball.png').convert('1'))
+    ball.show((10, 10))
+    ball.moveBy(2, 1)
+
+Sprites works in one of two ways. Given a PyDisplay, sprites are xor'ed
+onto the screen: a move xors the sprite out of its old place and into its
+new one in a single write over the two boxes, and anything under a sprite
+comes back as it was. Drivers with a write mix mode, the GU3900 and
+GU7000, do the xor themselves, so only the sprite's columns are sent.
+
+Given a layers.LayerStack, sprites are drawn on a layer of their own on
+top of the stack, and a move restores what's below from the layers
+underneath, so sprites can be solid. The pixels of a sprite's mask, by
+default those set in its bitmap, are drawn; the rest show through.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import Image
+import ImageChops
+
+import damage
+from layers import LayerStack
+
+
+class Sprite(object):
+
+    def __init__(self, sprites, bitmap, mask=None):
+        self.sprites = sprites
+        self.bitmap = bitmap
+        if mask is None:
+            mask = bitmap
+        self.mask = mask
+        self.size = bitmap.size
+        self.xy = None   # None while hidden
+
+    def box(self, xy=None):
+        """
+        The box covered at xy, by default where the sprite is.
+        """
+        if xy is None:
+            xy = self.xy
+        if xy is None:
+            return None
+        (x, y) = xy
+        (w, h) = self.size
+        return (x, y, x+w, y+h)
+
+    def move(self, xy):
+        self.sprites._move(self, tuple(xy))
+
+    def moveBy(self, dx, dy):
+        (x, y) = self.xy
+        self.move((x+dx, y+dy))
+
+    def show(self, xy=None):
+        if xy is None:
+            xy = self.xy or (0, 0)
+        self.move(xy)
+
+    def hide(self):
+        self.sprites._move(self, None)
+
+
+class Sprites(object):
+
+    def __init__(self, display):
+        """
+        display is a PyDisplay, to xor sprites onto, or a LayerStack to
+        draw them on a layer of their own.
+        """
+        self.display = display
+        self.sprites = []
+        if isinstance(display, LayerStack):
+            self.layer = display.add()
+        else:
+            self.layer = None
+
+    def add(self, bitmap, mask=None):
+        """
+        A new sprite, hidden until shown.
+        """
+        sprite = Sprite(self, bitmap, mask)
+        self.sprites.append(sprite)
+        return sprite
+
+    def remove(self, sprite):
+        sprite.hide()
+        self.sprites.remove(sprite)
+
+    def frame(self):
+        """
+        Group the moves of several sprites into a single refresh.
+        """
+        return self.display.frame()
+
+    def _move(self, sprite, xy):
+
+        if xy == sprite.xy:
+            return
+        (old, new) = (sprite.box(), None)
+        if xy is not None:
+            new = sprite.box(xy)
+        with self.display.frame():
+            if self.layer is None:
+                self._xor(sprite, old, new)
+            else:
+                self._restore(sprite, old, new)
+        sprite.xy = xy
+
+    def _xor(self, sprite, old, new):
+
+        boxes = [ bbox for bbox in (old, new) if bbox ]
+
+        # far apart, two small writes beat one over the space between
+        if len(boxes) == 2 and not damage.intersects(old, new):
+            boxes = [ (old, old), (new, new) ]
+        else:
+            boxes = [ (reduce(damage.union, boxes), old, new) ]
+
+        for item in boxes:
+            (bbox, places) = (item[0], [ place for place in item[1:] if place ])
+            (left, top, right, bottom) = bbox
+            delta = Image.new('1', (right-left, bottom-top))
+            for place in places:
+                (x, y) = (place[0]-left, place[1]-top)
+                (w, h) = sprite.size
+                delta.paste(ImageChops.difference(delta.crop((x, y, x+w, y+h)), sprite.bitmap), (x, y))
+            self.display.xor((left, top), delta)
+
+    def _restore(self, sprite, old, new):
+
+        layer = self.layer
+        if old:
+            layer.erase(old)
+        # redraw, in order, every sprite in the boxes that changed
+        boxes = [ bbox for bbox in (old, new) if bbox ]
+        for other in self.sprites:
+            if other is sprite:
+                place = new
+            else:
+                place = other.box()
+            if place and [ bbox for bbox in boxes if damage.intersects(place, bbox) ]:
+                layer.bitmap(place[:2], other.bitmap, mask=other.mask)
@@ -63,6 +63,7 @@ class T20A(object):
 try:
     
     import parallel
+    import busprogram
     
     class T20APar(T20A):
         
@@ -78,8 +79,25 @@ try:
             
             self.W = W
             
+            # run the byte loop in C if the library is installed
+            try:
+                self.write = self.program(p).bind()
+                print 't20a: using fast I/O library'
+            except:
+                print 't20a: fast I/O library not available, using pyparallel'
+            
             self.init()
             
+        def program(self, p):
+            
+            program = busprogram.Program(p)
+            program.loop()
+            program.data(self.setData)
+            program.wait(self.getBusy, False)
+            program.pulse(self.setWR, 0)
+            program.next()
+            return program
+            
         def write(self, data):
             
             #self.setCS(0)
@@ -21,9 +21,14 @@ DISPLAY_MODE_GRAPHICS     = 0x98
 try:
     
     import parallel # http://pyserial.sourceforge.net/pyparallel
+    import busprogram
     
     class T6963C(object):
-    
+        
+        # rough transfer costs in seconds, see cost.py
+        commandCost = 150e-6   # address pointer and auto write
+        byteCost    = 20e-6    # five port writes per byte
+        
         def __init__(self, W=128, H=64, dev=0):
             
             p = parallel.Parallel(dev)
@@ -38,9 +43,32 @@ try:
             
             self.W = W
             self.H = H
+            
+            # run the byte loops in C if the library is installed
+            try:
+                self._command = self.program(p, 1).bind()
+                self.sendData = self.program(p, 0).bind()
+                self.sendCommand = self.fastCommand
+                self.byteCost = 5e-6
+                print 't6963c: using fast I/O library'
+            except:
+                print 't6963c: fast I/O library not available, using pyparallel'
     
             self.init()
             
+        def program(self, p, CD):
+            
+            program = busprogram.Program(p)
+            program.set(self.setCD, CD)
+            program.loop()
+            program.set(self.setCE, 0)
+            program.set(self.setWR, 0)
+            program.data(self.setData)
+            program.set(self.setWR, 1)
+            program.set(self.setCE, 1)
+            program.next()
+            return program
+            
         def init(self):
             
             self.setRD(1)
@@ -74,6 +102,9 @@ try:
                 self.setData(ord(c))
                 self.setWR(1)
                 self.setCE(1)
+                
+        def fastCommand(self, cmd):
+            self._command(chr(cmd))
         
         def startAutoWrite(self):
             self.sendCommand(0xB0)
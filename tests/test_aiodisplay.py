@@ -0,0 +1,118 @@
+"""
+AsyncDisplay sending through the event loop, and handing a serial driver
+back in close().
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import os
+import unittest
+
+try:
+    import pty
+    import tty
+    import fcntl
+except ImportError:
+    pty = None # not on Windows
+
+import pydisplay
+import aiodisplay
+
+
+class Port(object):
+
+    # the end of a pty, standing in for a pySerial port
+    port = '/dev/test'
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+
+class Device(object):
+
+    # a write-only serial driver
+    W = 64
+    H = 32
+
+    def __init__(self, fd):
+        self._ser = Port(fd)
+
+    def write(self, data):
+        os.write(self._ser.fd, data)
+
+
+class Display(pydisplay.ColumnWiseRefresh):
+
+    def __init__(self, fd):
+        pydisplay.PyDisplay.__init__(self, Device(fd))
+
+    def write(self, data, address):
+        self.display.write(data)
+
+
+class AsyncDisplayTest(unittest.TestCase):
+
+    def setUp(self):
+        if pty is None or aiodisplay.asyncio is None or aiodisplay.ThreadPoolExecutor is None:
+            self.skipTest('needs a pty, asyncio and concurrent.futures')
+        (self.master, self.slave) = pty.openpty()
+        tty.setraw(self.slave)
+        self.loop = aiodisplay.asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def received(self):
+        result = []
+        fcntl.fcntl(self.master, fcntl.F_SETFL, os.O_NONBLOCK)
+        while True:
+            try:
+                result.append(os.read(self.master, 65536))
+            except OSError:
+                return ''.join(result)
+
+    def blocking(self):
+        return not fcntl.fcntl(self.slave, fcntl.F_GETFL) & os.O_NONBLOCK
+
+    def test_close_hands_back_the_driver(self):
+        display = Display(self.slave)
+        device = display.display
+        self.received()
+
+        wrapped = aiodisplay.AsyncDisplay(display, self.loop)
+        self.assertTrue('write' in device.__dict__)
+        self.assertFalse(self.blocking())
+
+        self.loop.run_until_complete(wrapped.rectangle((0, 0, 15, 15), fill=1))
+        self.assertEqual(len(self.received()), 16 * 4)
+
+        wrapped.close()
+        self.assertFalse('write' in device.__dict__)
+        self.assertTrue(self.blocking())
+
+        # drawing directly works again, without the event loop
+        display.rectangle((32, 0, 47, 15), fill=1)
+        self.assertEqual(len(self.received()), 16 * 4)
+
+    def test_close_sends_what_is_queued(self):
+        display = Display(self.slave)
+        wrapped = aiodisplay.AsyncDisplay(display, self.loop)
+        self.received()
+        display.display.write('queued')
+        wrapped.close()
+        self.assertEqual(self.received(), 'queued')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Animations: recorded once and replayed, on single and double buffered
+displays, and drawn the usual way after skips and other drawing.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import Image
+from ImageDraw import Draw
+
+import bitpack
+import pydisplay
+import animation
+
+
+class GD120C280Memory(object):
+
+    # two pages of display memory, each a column of 15 bytes after another
+    W = 280
+    H = 120
+    commandCost = 100e-6
+    byteCost = 10e-6
+
+    def __init__(self):
+        self.pages = [ bytearray(280*15), bytearray(280*15) ]
+        self.offscreen = 0
+        self.shown = 0
+        self.cursor = 0
+
+    def selectOffscreenPage(self, page):
+        self.offscreen = page
+
+    def selectDisplayPage(self, page):
+        self.shown = page
+
+    def setCursorMode(self, mode):
+        pass
+
+    def setCursorPosition(self, col, row):
+        self.cursor = col*15 + row
+
+    def writePixels(self, data):
+        self.pages[self.offscreen][self.cursor:self.cursor+len(data)] = data
+        self.cursor += len(data)
+
+    def screen(self):
+        return str(self.pages[self.shown])
+
+
+class GD120C280(pydisplay.GD120C280):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GD120C280Memory())
+
+
+def frames(n):
+    # a ball crossing the box
+    result = []
+    for i in xrange(n):
+        image = Image.new('L', (80, 40))
+        x = i * 60 / n
+        Draw(image).ellipse((x, 5, x+20, 25), fill=255)
+        result.append(image)
+    return result
+
+
+XY = (10, 10)
+
+
+class AnimationTest(unittest.TestCase):
+
+    def make(self, display, n):
+        self.display = display
+        self.reference = Image.new('1', (display.W, display.H))
+        self.draw((0, 0, 5, 5))
+        self.animation = animation.Animation(display, frames(n), xy=XY)
+        self.encodes = 0
+        encode = self.animation.encode
+        def counted(first=0):
+            self.encodes += 1
+            encode(first)
+        self.animation.encode = counted
+
+    def draw(self, box):
+        self.display.rectangle(box, fill=1)
+        Draw(self.reference).rectangle(box, fill=1)
+
+    def screen(self):
+        device = self.display.display
+        if isinstance(device, GD120C280Memory):
+            return device.screen()
+        return device.toImage().tostring()
+
+    def expected(self, k):
+        self.reference.paste(self.animation.frames[k], XY)
+        if isinstance(self.display.display, GD120C280Memory):
+            return bitpack.columns(self.reference.tostring(), 280, 120)
+        return self.reference.tostring()
+
+    def play(self, ks, last=None):
+        for k in ks:
+            self.animation.show(k, last)
+            self.assertEqual(self.screen(), self.expected(k), 'frame %d' % k)
+            last = k
+        return last
+
+    def test_replayed(self):
+        self.make(pydisplay.MakeDisplay('virtual', W=128, H=64), 5)
+        self.play(range(5) * 4)
+        self.assertEqual(self.encodes, 1)
+
+    def test_flipping_odd(self):
+        # seven frames alternate pages from one loop to the next
+        self.make(GD120C280(), 7)
+        self.display.startFlipping()
+        self.play(range(7) * 4)
+        self.assertEqual(self.encodes, 1)
+        self.assertEqual(len(self.animation._steps), 14)
+
+    def test_flipping_even(self):
+        self.make(GD120C280(), 6)
+        self.display.startFlipping()
+        self.play(range(6) * 4)
+        self.assertEqual(self.encodes, 1)
+
+    def test_skip(self):
+        self.make(GD120C280(), 7)
+        self.display.startFlipping()
+        last = self.play(range(7))
+        last = self.play([ 2, 3, 4, 6, 0, 1 ], last)
+        encodes = self.encodes
+        self.play(range(2, 7) + range(7) * 2, last)
+        self.assertEqual(self.encodes, encodes)
+
+    def test_drawn_over(self):
+        self.make(pydisplay.MakeDisplay('virtual', W=128, H=64), 5)
+        last = self.play(range(5))
+        self.draw((100, 50, 120, 60))
+        self.play(range(5) * 2, last)
+        self.assertEqual(self.encodes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
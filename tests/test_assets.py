@@ -0,0 +1,175 @@
+"""
+Assets: drawn straight into the framebuffer the same as their image, and
+kept in the asset file.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import Image
+
+import bitpack
+import pydisplay
+import assets
+
+
+class GD120C280Memory(object):
+
+    # two pages of display memory, each a column of 15 bytes after another
+    W = 280
+    H = 120
+    commandCost = 100e-6
+    byteCost = 10e-6
+
+    def __init__(self):
+        self.pages = [ bytearray(280*15), bytearray(280*15) ]
+        self.offscreen = 0
+        self.shown = 0
+        self.cursor = 0
+
+    def selectOffscreenPage(self, page):
+        self.offscreen = page
+
+    def selectDisplayPage(self, page):
+        self.shown = page
+
+    def setCursorMode(self, mode):
+        pass
+
+    def setCursorPosition(self, col, row):
+        self.cursor = col*15 + row
+
+    def writePixels(self, data):
+        self.pages[self.offscreen][self.cursor:self.cursor+len(data)] = data
+        self.cursor += len(data)
+
+    def memory(self):
+        return str(self.pages[0]) + str(self.pages[1])
+
+
+class GD120C280(pydisplay.GD120C280):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GD120C280Memory())
+
+
+def memory(display):
+    device = display.display
+    if isinstance(device, GD120C280Memory):
+        return device.memory()
+    return str(device.memory)
+
+
+class AssetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saved = (assets.CACHE, assets._assets)
+        assets.CACHE = os.path.join(self.directory, 'assets')
+        assets._assets = None
+        self.icons = [ self.icon('icon%d.png' % i, (24, 16), i) for i in xrange(3) ]
+
+    def tearDown(self):
+        (assets.CACHE, assets._assets) = self.saved
+        shutil.rmtree(self.directory)
+
+    def icon(self, name, size, seed):
+        random.seed(seed)
+        image = Image.new('L', size)
+        image.putdata([ random.randint(0, 255) for i in xrange(size[0] * size[1]) ])
+        path = os.path.join(self.directory, name)
+        image.save(path)
+        return path
+
+    def displays(self):
+        return [ pydisplay.MakeDisplay('virtual', W=128, H=64), GD120C280() ]
+
+    def check(self, xy):
+        asset = assets.load(self.icons[0])
+        for (blitted, drawn) in zip(self.displays(), self.displays()):
+            for display in (blitted, drawn):
+                display.rectangle((0, 0, 40, 20), fill=1)
+            blitted.bitmap(xy, asset)
+            drawn.bitmap(xy, asset.image)
+            self.assertEqual(blitted.image.tostring(), drawn.image.tostring())
+            self.assertEqual(memory(blitted), memory(drawn))
+
+    def test_blit(self):
+        self.check((16, 8))
+
+    def test_unaligned(self):
+        self.check((3, 5))
+
+    def test_blit_or_not(self):
+        asset = assets.load(self.icons[0])
+        display = pydisplay.MakeDisplay('virtual', W=128, H=64)
+        self.assertTrue(display._blit((16, 8), asset))
+        self.assertFalse(display._blit((3, 8), asset))
+        self.assertFalse(display._blit((120, 8), asset))
+        with display.frame():
+            self.assertFalse(display._blit((16, 8), asset))
+
+    def test_layouts(self):
+        asset = assets.load(self.icons[1])
+        data = asset.image.tostring()
+        self.assertEqual(str(asset.rows), data)
+        self.assertEqual(str(asset.columns), bitpack.columns(data, 24, 16))
+        self.assertEqual(map(str, asset.pages), bitpack.pages(data, 24, 16))
+
+    def test_appended(self):
+        first = assets.load(self.icons[0])
+        size = os.path.getsize(assets.CACHE)
+        with open(assets.CACHE, 'rb') as f:
+            offset = assets._index(f).values()[0][2]
+        assets.load(self.icons[1])
+        self.assertTrue(os.path.getsize(assets.CACHE) > size)
+        with open(assets.CACHE, 'rb') as f:
+            index = assets._index(f)
+        self.assertEqual(len(index), 2)
+        # what was there already stays where it was
+        self.assertTrue(offset in [ entry[2] for entry in index.values() ])
+
+        # and comes back from the file
+        assets._assets = None
+        again = assets.load(self.icons[0])
+        self.assertFalse(again is first)
+        self.assertEqual(str(again.rows), str(first.rows))
+        self.assertEqual(len(assets._assets), 2)
+
+    def test_options(self):
+        plain = assets.load(self.icons[2])
+        inverted = assets.load(self.icons[2], invert=True)
+        nearest = assets.load(self.icons[2], (12, 8), Image.NEAREST, method='none')
+        self.assertNotEqual(str(plain.rows), str(inverted.rows))
+        self.assertEqual(nearest.size, (12, 8))
+        self.assertTrue(assets.load(self.icons[2], invert=True) is inverted)
+
+    def test_changed(self):
+        first = assets.load(self.icons[2])
+        os.utime(self.icons[2], (0, 0))
+        self.assertFalse(assets.load(self.icons[2]) is first)
+
+    def test_broken_file(self):
+        with open(assets.CACHE, 'wb') as f:
+            f.write('not assets')
+        assets._assets = {}
+        assets.load(self.icons[0])
+        assets._assets = None
+        assets.load(self.icons[1])
+        with open(assets.CACHE, 'rb') as f:
+            self.assertEqual(len(assets._index(f)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
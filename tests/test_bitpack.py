@@ -0,0 +1,132 @@
+"""
+bitpack layouts against a pixel by pixel reference from PIL, with NumPy
+and without.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import random
+import unittest
+
+import Image
+
+import bitpack
+import pydisplay
+
+
+def noise(W, H, seed):
+    random.seed(seed)
+    image = Image.new('1', (W, H))
+    image.putdata([ random.randint(0, 1) for i in xrange(W*H) ])
+    return image
+
+
+def referenceColumns(image):
+    # for each column, (H+7)/8 bytes top down, top pixel in the top bit
+    (W, H) = image.size
+    result = []
+    for x in xrange(W):
+        for page in xrange((H + 7) / 8):
+            byte = 0
+            for bit in xrange(8):
+                y = page*8 + bit
+                if y < H and image.getpixel((x, y)):
+                    byte |= 0x80 >> bit
+            result.append(chr(byte))
+    return ''.join(result)
+
+
+def referencePages(image):
+    # (H+7)/8 strings top down, each a byte per column, top pixel in bit 0
+    (W, H) = image.size
+    result = []
+    for page in xrange((H + 7) / 8):
+        row = []
+        for x in xrange(W):
+            byte = 0
+            for bit in xrange(8):
+                y = page*8 + bit
+                if y < H and image.getpixel((x, y)):
+                    byte |= 1 << bit
+            row.append(chr(byte))
+        result.append(''.join(row))
+    return result
+
+
+SIZES = [ (8, 8), (16, 24), (13, 7), (130, 20), (1, 9), (64, 1) ]
+
+
+class GU311Memory(object):
+
+    # the GU311's display memory, column x of page p at x*4 + p, with the
+    # address stepping a column for each byte written
+    W = 128
+    H = 32
+
+    def __init__(self):
+        self.memory = {}
+        self.writes = []
+
+    def graphicWrite(self, data, address, mode='S'):
+        self.writes.append((address, len(data)))
+        for c in data:
+            self.memory[address % 512] = c
+            address += 4
+
+    def clear(self):
+        self.memory = {}
+
+
+class GU311(pydisplay.GU311):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GU311Memory())
+
+
+class LayoutTest(unittest.TestCase):
+
+    def check(self):
+        for (i, (W, H)) in enumerate(SIZES):
+            image = noise(W, H, i)
+            self.assertEqual(bitpack.columns(image.tostring(), W, H), referenceColumns(image),
+                             'columns of %dx%d' % (W, H))
+            self.assertEqual(bitpack.pages(image.tostring(), W, H), referencePages(image),
+                             'pages of %dx%d' % (W, H))
+
+    def test_numpy(self):
+        if bitpack.numpy is None:
+            return
+        self.check()
+
+    def test_pil(self):
+        saved = bitpack.numpy
+        bitpack.numpy = None
+        try:
+            self.check()
+        finally:
+            bitpack.numpy = saved
+
+
+class GU311Test(unittest.TestCase):
+
+    def test_full_screen_pages(self):
+        display = GU311()
+        image = noise(128, 32, 7)
+        display.bitmap((0, 0), image)
+        pages = referencePages(image)
+        memory = display.display.memory
+        for x in xrange(128):
+            for page in xrange(4):
+                self.assertEqual(memory.get(x*4 + page, '\x00'), pages[page][x])
+        # one write per page
+        self.assertEqual(display.commands((0, 0, 128, 32)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
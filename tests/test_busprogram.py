@@ -0,0 +1,238 @@
+"""
+Bus programs: compiled from the drivers' pin maps, they wiggle the lines
+of the virtual port just as the drivers' pyparallel loops do, and bus_run()
+in the C library runs them as the reference interpreter here does.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import busprogram
+from busprogram import DATA, LITERAL, CONTROL, WAIT, DELAY, LOOP, NEXT
+
+import ks0108
+import sed1520
+import t6963c
+import t20a
+
+# the operand bytes after each instruction, as in pydisplay.c
+OPERANDS = [ 0, 0, 1, 2, 2, 2, 0, 0 ]
+
+# the lines by register bit, from linux/parport.h, and whether pyparallel
+# reads or sets them inverted: kept apart from busprogram's own tables
+CONTROLS = { 0x01: ('setDataStrobe', True), 0x02: ('setAutoFeed', True),
+             0x04: ('setInitOut', False), 0x08: ('setSelect', True) }
+STATUS = { 0x08: ('getInError', False), 0x10: ('getInSelected', False),
+           0x20: ('getInPaperOut', False), 0x40: ('getInAcknowledge', False),
+           0x80: ('getInBusy', True) }
+
+
+def run(code, port, data):
+    """
+    Run a compiled program as bus_run() does, on the port's pyparallel
+    methods, or on no port at all, when any port access fails. Returns
+    0, or -1 where bus_run() would fail.
+    """
+    code = map(ord, code)
+    (pc, loop, i) = (0, -1, 0)
+    while pc < len(code):
+        op = code[pc]
+        pc += 1
+        if not DATA <= op <= NEXT or pc + OPERANDS[op] > len(code):
+            return -1
+        arg = code[pc:pc + OPERANDS[op]]
+        pc += OPERANDS[op]
+
+        if op in (DATA, LITERAL, CONTROL, WAIT) and port is None:
+            return -1
+        if op == DATA:
+            if i >= len(data):
+                return -1
+            port.setData(ord(data[i]))
+            i += 1
+        elif op == LITERAL:
+            port.setData(arg[0])
+        elif op == CONTROL:
+            (name, level) = line(CONTROLS, arg)
+            getattr(port, name)(level)
+        elif op == WAIT:
+            (name, level) = line(STATUS, arg)
+            while bool(getattr(port, name)()) != level:
+                pass
+        elif op == LOOP:
+            loop = pc
+            if i >= len(data):
+                # no input at all: skip the loop
+                while pc < len(code) and code[pc] != NEXT:
+                    pc += 1 + (code[pc] <= NEXT and OPERANDS[code[pc]] or 0)
+                pc += 1
+        elif op == NEXT:
+            if loop >= 0 and i < len(data):
+                pc = loop
+    return 0
+
+
+def line(lines, (mask, value)):
+
+    # the pyparallel method for a register bit, and the level it's set to
+    (name, inverted) = lines[mask]
+    return (name, bool(value) != inverted)
+
+
+def events(port):
+
+    # the line changes and data writes, without their times
+    return [ (event, int(value)) for (t, event, value) in port.log ]
+
+
+class ProgramTest(unittest.TestCase):
+
+    def setUp(self):
+        self.port = virtual.Parallel()
+        self.program = busprogram.Program(self.port)
+
+    def test_compiled(self):
+        program = self.program
+        program.set(self.port.setDataStrobe, 0)
+        program.set(self.port.setInitOut, 1)
+        program.literal(self.port.setData, 0x1FF)
+        program.loop()
+        program.data(self.port.setData)
+        program.wait(self.port.getInBusy, False)
+        program.pulse(self.port.setSelect, 1)
+        program.delay(0x1234)
+        program.next()
+        self.assertEqual(program.tostring(), ''.join(map(chr,
+            [ CONTROL, 0x01, 0x01,
+              CONTROL, 0x04, 0x04,
+              LITERAL, 0xFF,
+              LOOP,
+              DATA,
+              WAIT, 0x80, 0x80,
+              CONTROL, 0x08, 0x00, CONTROL, 0x08, 0x08,
+              DELAY, 0x34, 0x12,
+              NEXT ])))
+
+    def test_not_a_line(self):
+        other = virtual.Parallel()
+        self.assertRaises(ValueError, self.program.set, other.setAutoFeed, 1)
+        self.assertRaises(ValueError, self.program.set, self.port.getInBusy, 1)
+        self.assertRaises(ValueError, self.program.wait, self.port.setAutoFeed, 1)
+        self.assertRaises(ValueError, self.program.data, self.port.setSelect)
+        self.assertRaises(ValueError, self.program.literal, other.setData, 0)
+        self.assertEqual(self.program.code, [])
+
+    def test_unbound(self):
+        # neither the library nor a ppdev descriptor here: the drivers
+        # carry on with pyparallel
+        self.assertRaises(Exception, self.program.bind)
+
+
+class DriverTest(unittest.TestCase):
+
+    # each driver's programs, against the loop each of them replaces
+
+    def compare(self, p, program, loop, data):
+        p.reset()
+        loop()
+        expected = events(p)
+        p.reset()
+        self.assertEqual(run(program.tostring(), p, data), 0)
+        self.assertEqual(events(p), expected)
+        self.assertTrue(expected)
+
+    def test_ks0108(self):
+        display = ks0108.KS0108Par()
+        p = virtual.transports[-1]
+        data = '\x00\x81\xFF\x42'
+        self.compare(p, display.program(p, 1), lambda: display.writeDisplayData(map(ord, data)), data)
+        self.compare(p, display.program(p, 0), lambda: display.sendCommand(0xB8, 3), chr(0xBB))
+
+    def test_sed1520(self):
+        display = sed1520.SED1520()
+        p = virtual.transports[-1]
+        for chip in (1, 2):
+            display.selectChip(chip)
+            self.compare(p, display.program(p, display.setE, 1), lambda: display.writeDisplayData('\x01\x02\x80'), '\x01\x02\x80')
+            self.compare(p, display.program(p, display.setE, 0), lambda: display.sendCommand(0xAF), chr(0xAF))
+
+    def test_t6963c(self):
+        display = t6963c.T6963C()
+        p = virtual.transports[-1]
+        self.compare(p, display.program(p, 0), lambda: display.sendData('\x10\x00'), '\x10\x00')
+        self.compare(p, display.program(p, 1), lambda: display.sendCommand(0x24), chr(0x24))
+
+    def test_t20a(self):
+        # waits on BUSY between bytes
+        display = t20a.T20APar()
+        p = virtual.transports[-1]
+        self.compare(p, display.program(p), lambda: display.write('hello'), 'hello')
+
+    def test_no_data(self):
+        # an empty string skips the loop, but not what comes before it
+        display = ks0108.KS0108Par()
+        p = virtual.transports[-1]
+        p.reset()
+        self.assertEqual(run(display.program(p, 1).tostring(), p, ''), 0)
+        self.assertEqual(events(p), [ ('select', 1) ])
+
+
+class LibraryTest(unittest.TestCase):
+
+    # bus_run() on a descriptor that isn't a port fails on its first
+    # access to the port, so what it returns shows how far it got; the
+    # reference interpreter has to agree for every program and string
+
+    def setUp(self):
+        try:
+            self.bus_run = busprogram.library().bus_run
+        except (OSError, ImportError):
+            raise unittest.SkipTest('the _pydisplay library is not installed')
+
+    def programs(self):
+        port = virtual.Parallel()
+        program = busprogram.Program(port)
+        program.delay(1)
+        program.loop()
+        program.delay(2)
+        program.data(port.setData)
+        program.next()
+        yield program.tostring()
+        yield chr(LOOP) + chr(DATA) + chr(DELAY) + '\x01\x00' + chr(NEXT)
+        yield chr(DATA)
+        yield chr(DELAY) + '\x01'
+        yield chr(NEXT) + chr(DELAY) + '\x00\x00'
+        yield chr(LOOP) + chr(DATA) + chr(NEXT) + chr(CONTROL) + '\x01\x01'
+        yield chr(LOOP) + chr(LITERAL) + '\x00' + chr(DATA) + chr(NEXT)
+        yield '\x00'
+        yield chr(NEXT + 1)
+        yield ''
+        program = busprogram.Program(port)
+        program.loop()
+        program.data(port.setData)
+        program.wait(port.getInBusy, False)
+        program.pulse(port.setDataStrobe, 0)
+        program.next()
+        yield program.tostring()
+
+    def test_same_as_python(self):
+        for code in self.programs():
+            for data in ('', 'a', 'ab'):
+                self.assertEqual(self.bus_run(-1, code, len(code), data, len(data)), run(code, None, data),
+                                 repr((code, data)))
+
+    def test_delays(self):
+        # a program that never touches the port runs through to the end
+        code = ''.join(map(chr, [ DELAY, 0, 0, LOOP, DELAY, 1, 0, NEXT ]))
+        self.assertEqual(self.bus_run(-1, code, len(code), '', 0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Damage rectangles: wrapping round a scrolled origin, and merging.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import unittest
+
+import damage
+
+
+def pixels(boxes):
+    # every pixel the boxes cover, counting overlaps
+    result = []
+    for (left, top, right, bottom) in boxes:
+        result += [ (x, y) for x in xrange(left, right) for y in xrange(top, bottom) ]
+    return sorted(result)
+
+
+class WrapTest(unittest.TestCase):
+
+    def test_no_origin(self):
+        self.assertEqual(damage.wrap((3, 4, 10, 12), (0, 0), 64, 32), [ (3, 4, 10, 12) ])
+
+    def test_moved_without_wrapping(self):
+        self.assertEqual(damage.wrap((3, 4, 10, 12), (5, 2), 64, 32), [ (8, 6, 15, 14) ])
+
+    def test_past_the_edge(self):
+        # wholly past the right and bottom edges comes round to the start
+        self.assertEqual(damage.wrap((60, 30, 64, 32), (10, 4), 64, 32), [ (6, 2, 10, 4) ])
+
+    def test_across_both_edges(self):
+        boxes = damage.wrap((50, 20, 64, 32), (10, 8), 64, 32)
+        self.assertEqual(len(boxes), 4)
+        # the same number of pixels, each moved by the origin modulo the size
+        expected = sorted([ ((x + 10) % 64, (y + 8) % 32) for x in xrange(50, 64) for y in xrange(20, 32) ])
+        self.assertEqual(pixels(boxes), expected)
+
+    def test_whole_screen(self):
+        boxes = damage.wrap((0, 0, 64, 32), (17, 5), 64, 32)
+        self.assertEqual(pixels(boxes), pixels([ (0, 0, 64, 32) ]))
+
+
+class CoalesceTest(unittest.TestCase):
+
+    def test_neighbours_merge(self):
+        self.assertEqual(damage.coalesce([ (0, 0, 8, 8), (8, 0, 16, 8) ]), [ (0, 0, 16, 8) ])
+
+    def test_distant_boxes_stay_apart(self):
+        boxes = [ (0, 0, 8, 8), (100, 100, 108, 108) ]
+        self.assertEqual(sorted(damage.coalesce(boxes)), boxes)
+
+    def test_command_cost_pays_for_the_gap(self):
+        # with a high cost per write, one write of the union is cheaper
+        boxes = [ (0, 0, 8, 8), (100, 100, 108, 108) ]
+        cost = lambda bbox: 10000 + damage.area(bbox) / 8
+        self.assertEqual(damage.coalesce(boxes, cost), [ (0, 0, 108, 108) ])
+
+    def test_covers_every_box(self):
+        boxes = [ (0, 0, 8, 8), (4, 4, 20, 10), (40, 0, 48, 8), (16, 30, 24, 40) ]
+        merged = damage.coalesce(boxes)
+        for bbox in boxes:
+            self.assertTrue([ m for m in merged if damage.union(m, bbox) == m ])
+
+    def test_disjoint(self):
+        boxes = damage.disjoint([ (0, 0, 8, 8), (4, 4, 12, 12), (20, 20, 24, 24) ])
+        self.assertEqual(sorted(boxes), [ (0, 0, 12, 12), (20, 20, 24, 24) ])
+        for i in xrange(len(boxes)):
+            for j in xrange(i+1, len(boxes)):
+                self.assertFalse(damage.intersects(boxes[i], boxes[j]))
+
+    def test_clip(self):
+        self.assertEqual(damage.clip((-5, -5, 10, 10), 64, 32), (0, 0, 10, 10))
+        self.assertEqual(damage.clip((70, 0, 80, 10), 64, 32), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Dithering: the NumPy wavefront Floyd-Steinberg against going pixel by
+pixel, and the cache.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import random
+import unittest
+
+import Image
+
+import bitpack
+import dither
+
+
+def floyd(values, W, H):
+    # Floyd-Steinberg in raster order, values a list of rows of floats
+    rows = [ list(row) + [0.0] for row in values ] + [ [0.0] * (W + 1) ]
+    bits = []
+    for y in xrange(H):
+        for x in xrange(W):
+            v = rows[y][x]
+            on = v >= 0.5
+            bits.append(on)
+            error = v - on
+            rows[y][x+1] += error * (7/16.0)
+            if x > 0:
+                rows[y+1][x-1] += error * (3/16.0)
+            rows[y+1][x] += error * (5/16.0)
+            rows[y+1][x+1] += error * (1/16.0)
+    return bits
+
+
+def grey(W, H, seed):
+    # noise over a gradient, the hardest case for error diffusion
+    random.seed(seed)
+    image = Image.new('L', (W, H))
+    image.putdata([ min(255, x*255/max(W-1, 1)/2 + random.randint(0, 127)) for y in xrange(H) for x in xrange(W) ])
+    return image
+
+
+SIZES = [ (1, 1), (7, 3), (16, 16), (33, 9), (3, 40), (128, 64) ]
+
+
+class FloydTest(unittest.TestCase):
+
+    def setUp(self):
+        if dither.numpy is None:
+            self.skipTest('needs NumPy')
+
+    def test_wavefront(self):
+        numpy = dither.numpy
+        for (i, (W, H)) in enumerate(SIZES):
+            image = grey(W, H, i)
+            data = [ ord(c) / 255.0 for c in image.tostring() ]
+            rows = [ data[y*W:(y+1)*W] for y in xrange(H) ]
+            values = numpy.array(rows).reshape(H, W)
+            self.assertEqual(list(dither._floyd(values).flatten()), floyd(rows, W, H),
+                             'floyd of %dx%d' % (W, H))
+
+    def test_flat_grey(self):
+        # a flat middle grey comes out half on
+        bitmap = dither.dither(Image.new('L', (64, 64), 128))
+        on = sum(bitmap.convert('L').histogram()[255:])
+        self.assertTrue(abs(on - 64*32) < 64)
+
+
+class DitherTest(unittest.TestCase):
+
+    def setUp(self):
+        dither.clear()
+
+    def test_cached(self):
+        image = grey(32, 16, 1)
+        first = dither.dither(image)
+        second = dither.dither(image.copy())
+        self.assertEqual(first.tostring(), second.tostring())
+        self.assertFalse(first is second)
+        self.assertEqual(len(dither._cache), 1)
+
+    def test_methods(self):
+        image = grey(32, 16, 2)
+        for method in dither.METHODS:
+            bitmap = dither.dither(image, method)
+            self.assertEqual((bitmap.mode, bitmap.size), ('1', (32, 16)))
+
+    def test_threshold(self):
+        image = Image.new('L', (16, 1))
+        image.putdata([ 16*x for x in xrange(16) ])
+        bitmap = dither.dither(image, 'none')
+        self.assertEqual(list(bitmap.getdata()), [ 0 ] * 8 + [ 255 ] * 8)
+
+    def test_pack(self):
+        image = grey(24, 16, 3)
+        data = dither.dither(image).tostring()
+        self.assertEqual(dither.pack(image, 'columns'), bitpack.columns(data, 24, 16))
+        self.assertEqual(dither.pack(image, 'pages'), ''.join(bitpack.pages(data, 24, 16)))
+        self.assertEqual(dither.pack(image), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
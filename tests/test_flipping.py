@@ -0,0 +1,124 @@
+"""
+Page flipping: the page shown always holds the last frame, and stopping
+leaves both pages the same.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import Image
+from ImageDraw import Draw
+
+import bitpack
+import pydisplay
+
+
+class GD120C280Memory(object):
+
+    # two pages of display memory, each a column of 15 bytes after another
+    W = 280
+    H = 120
+    commandCost = 100e-6
+    byteCost = 10e-6
+
+    def __init__(self):
+        self.pages = [ bytearray(280*15), bytearray(280*15) ]
+        self.offscreen = 0
+        self.shown = 0
+        self.cursor = 0
+
+    def selectOffscreenPage(self, page):
+        self.offscreen = page
+
+    def selectDisplayPage(self, page):
+        self.shown = page
+
+    def setCursorMode(self, mode):
+        pass
+
+    def setCursorPosition(self, col, row):
+        self.cursor = col*15 + row
+
+    def writePixels(self, data):
+        self.pages[self.offscreen][self.cursor:self.cursor+len(data)] = data
+        self.cursor += len(data)
+
+    def page(self, page):
+        return str(self.pages[page])
+
+
+class GD120C280(pydisplay.GD120C280):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GD120C280Memory())
+
+
+class FlippingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.display = GD120C280()
+        self.memory = self.display.display
+        self.reference = Image.new('1', (280, 120))
+
+    def draw(self, box):
+        self.display.rectangle(box, fill=1)
+        Draw(self.reference).rectangle(box, fill=1)
+
+    def expected(self):
+        return bitpack.columns(self.reference.tostring(), 280, 120)
+
+    def test_frames(self):
+        self.draw((0, 0, 20, 20))
+        self.display.startFlipping()
+        for i in xrange(5):
+            self.draw((i*30 + 30, 40, i*30 + 50, 60))
+            self.assertEqual(self.memory.page(self.memory.shown), self.expected())
+        self.assertEqual(self.memory.shown, self.display.shown)
+        self.display.stopFlipping()
+
+    def test_stop_after_odd_frames(self):
+        self.display.startFlipping()
+        self.draw((0, 0, 20, 20))
+        self.draw((40, 0, 60, 20))
+        self.draw((80, 0, 100, 20))
+        self.display.stopFlipping()
+        self.assertEqual(self.memory.page(0), self.expected())
+        self.assertEqual(self.memory.page(1), self.expected())
+        self.assertEqual(self.display.shown, 0)
+
+        self.draw((120, 0, 140, 20))
+        self.assertEqual(self.memory.page(self.memory.shown), self.expected())
+        self.assertEqual(self.memory.page(0), self.memory.page(1))
+
+    def test_stop_after_even_frames(self):
+        self.display.startFlipping()
+        self.draw((0, 0, 20, 20))
+        self.draw((40, 0, 60, 20))
+        self.display.stopFlipping()
+        self.assertEqual(self.memory.page(0), self.expected())
+        self.assertEqual(self.memory.page(1), self.expected())
+        self.draw((80, 0, 100, 20))
+        self.assertEqual(self.memory.page(self.memory.shown), self.expected())
+
+    def test_start_again(self):
+        self.display.startFlipping()
+        self.draw((0, 0, 20, 20))
+        self.display.stopFlipping()
+        self.draw((40, 0, 60, 20))
+        self.display.startFlipping()
+        self.draw((80, 0, 100, 20))
+        self.assertEqual(self.memory.page(self.memory.shown), self.expected())
+        self.display.stopFlipping()
+        self.assertEqual(self.memory.page(0), self.expected())
+        self.assertEqual(self.memory.page(1), self.expected())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Fitted font sizes: the binary search against trying every size, and the
+sizes kept in the font file cache until the font changes.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import fonts
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'script')
+
+BOXES = [ ('0123456789', None, 16, True), ('0123456789', 100, None, False),
+          ('Wednesday', 80, 30, False), ('Hg', 50, 20, True) ]
+
+
+class FitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.saved = (fonts.CACHE, fonts._sizes, fonts.load)
+        fonts.CACHE = os.path.join(self.directory, 'fonts')
+        fonts._sizes = None
+        self.font = os.path.join(self.directory, 'font.ttf')
+        shutil.copy(os.path.join(SCRIPT, 'DejaVuSans.ttf'), self.font)
+
+        # count the sizes tried
+        self.loads = 0
+        load = fonts.load
+        def counted(path, size):
+            self.loads += 1
+            return load(path, size)
+        fonts.load = counted
+
+    def tearDown(self):
+        (fonts.CACHE, fonts._sizes, fonts.load) = self.saved
+        shutil.rmtree(self.directory)
+
+    def fits(self, sample, width, height, ink, size):
+        font = fonts.glyphs.truetype(self.font, size)
+        if ink:
+            bbox = font.getmask(sample, '1').getbbox() or (0, 0, 0, 0)
+            (w, h) = (bbox[2]-bbox[0], bbox[3]-bbox[1])
+        else:
+            (w, h) = font.getsize(sample)
+        return (width is None or w < width) and (height is None or h < height)
+
+    def test_search(self):
+        for (sample, width, height, ink) in BOXES:
+            expected = max([ size for size in xrange(1, 61) if self.fits(sample, width, height, ink, size) ] or [ 1 ])
+            self.loads = 0
+            self.assertEqual(fonts.fitSize(self.font, sample, width, height, ink, 60), expected,
+                             repr((sample, width, height, ink)))
+            # a binary search over the sizes
+            self.assertTrue(self.loads <= 6)
+
+    def test_nothing_fits(self):
+        self.assertEqual(fonts.fitSize(self.font, 'Wide', width=1), 1)
+
+    def test_remembered(self):
+        size = fonts.fitSize(self.font, '12:30', height=20)
+        self.assertTrue(os.path.exists(fonts.CACHE))
+
+        # by the next run, from the file
+        fonts._sizes = None
+        self.loads = 0
+        self.assertEqual(fonts.fitSize(self.font, '12:30', height=20), size)
+        self.assertEqual(self.loads, 0)
+        self.assertEqual(fonts.fit(self.font, '12:30', height=20).size, size)
+
+    def test_font_changed(self):
+        fonts.fitSize(self.font, '12:30', height=20)
+        fonts._sizes = None
+
+        # a different font under the same name is fitted afresh
+        shutil.copy(os.path.join(SCRIPT, 'DejaVuSansCondensed.ttf'), self.font)
+        os.utime(self.font, (0, 0))
+        self.loads = 0
+        fonts.fitSize(self.font, '12:30', height=20)
+        self.assertTrue(self.loads > 0)
+        self.assertEqual(len(fonts._sizes), 2)
+
+    def test_no_file(self):
+        fonts.CACHE = None
+        fonts.fitSize(self.font, '12:30', height=20)
+        self.assertEqual(os.listdir(self.directory), [ 'font.ttf' ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Frame transactions: begin(), commit() and abort() on the virtual display.
+
+    python -m unittest discover tests
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import pydisplay
+
+
+class FrameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.display = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        self.device = self.display.display
+
+    def screen(self):
+        return self.device.toImage().tostring()
+
+    def test_nested_frames_send_once(self):
+        self.device.reset()
+        frames = self.display.metrics.counters.get('frames', 0)
+        with self.display.frame():
+            self.display.rectangle((0, 0, 9, 9), fill=1)
+            with self.display.frame():
+                self.display.line((20, 0, 30, 20), fill=1)
+            self.assertEqual(self.device.written(), '')
+        self.assertEqual(self.display._depth, 0)
+        self.assertEqual(self.display.metrics.counters['frames'], frames + 1)
+        self.assertEqual(self.screen(), self.display.image.tostring())
+
+    def test_abort_discards_the_frame(self):
+        self.display.rectangle((0, 0, 9, 9), fill=1)
+        before = self.display.image.tostring()
+        self.device.reset()
+
+        self.display.begin()
+        self.display.rectangle((20, 0, 40, 20), fill=1)
+        with self.display.frame():
+            self.display.text((0, 16), 'gone', fill=1)
+        self.display.abort()
+
+        self.assertEqual(self.display._depth, 0)
+        self.assertEqual(self.device.written(), '')
+        self.assertEqual(self.display.image.tostring(), before)
+        self.assertEqual(self.screen(), before)
+
+    def test_inner_abort_discards_the_outer_frame(self):
+        before = self.display.image.tostring()
+        self.display.begin()
+        self.display.rectangle((0, 0, 9, 9), fill=1)
+        self.display.begin()
+        self.display.abort()
+        self.assertEqual(self.display._depth, 1)
+        self.display.commit()
+        self.assertEqual(self.display._depth, 0)
+        self.assertEqual(self.display.image.tostring(), before)
+
+    def test_exception_aborts(self):
+        before = self.display.image.tostring()
+        try:
+            with self.display.frame():
+                self.display.rectangle((0, 0, 9, 9), fill=1)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.display._depth, 0)
+        self.assertEqual(self.screen(), before)
+        # and the lock is free again
+        self.display.rectangle((0, 0, 9, 9), fill=1)
+        self.assertEqual(self.screen(), self.display.image.tostring())
+
+    def test_unbalanced(self):
+        self.assertRaises(AssertionError, self.display.commit)
+        self.assertRaises(AssertionError, self.display.abort)
+
+
+if __name__ == '__main__':
+    unittest.main()
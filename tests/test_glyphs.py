@@ -0,0 +1,114 @@
+"""
+Cached text against PIL drawing the same strings, and the cache hit by
+strings that change.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import os
+import unittest
+
+import Image
+import ImageFont
+from ImageDraw import Draw
+
+import glyphs
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'script')
+
+FONTS = [ 'DejaVuSans.ttf', 'verdana.ttf' ]
+SIZES = [ 9, 16, 30 ]
+STRINGS = [ 'Hello World', 'Wednesday 14 Oct', 'AVAWAY To', '12:30', '09:41:57', 'fj', ' x  y ', '' ]
+
+
+def clock(second):
+    return '%02d:%02d:%02d' % (second / 3600 % 24, second / 60 % 60, second % 60)
+
+
+class GlyphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = glyphs.GlyphCache()
+
+    def check(self, font, text, anchor=None):
+        (w, h) = font.getsize(text or 'x')
+        size = (3*w + 20, 3*h + 20)
+        xy = (w + 10, h + 10)
+        expected = Image.new('1', size)
+        actual = expected.copy()
+        if anchor is None:
+            Draw(expected).text(xy, text, 1, font)
+        else:
+            Draw(expected).text(xy, text, 1, font, anchor)
+        self.cache.text(Draw(actual), xy, text, font, 1, anchor)
+        self.assertEqual(actual.tostring(), expected.tostring(), repr((text, anchor)))
+
+        bbox = self.cache.getbbox(text, font, anchor)
+        if bbox is None:
+            self.assertEqual(expected.getbbox(), None)
+        else:
+            (left, top, right, bottom) = bbox
+            (x, y) = xy
+            self.assertEqual(expected.getbbox(), (x+left, y+top, x+right, y+bottom))
+
+    def test_truetype(self):
+        for name in FONTS:
+            for size in SIZES:
+                font = self.cache.truetype(os.path.join(SCRIPT, name), size)
+                for text in STRINGS:
+                    self.check(font, text)
+
+    def test_anchor(self):
+        font = self.cache.truetype(os.path.join(SCRIPT, 'verdana.ttf'), 16)
+        for anchor in ('la', 'mm', 'rb', 'ls'):
+            self.check(font, 'AVAWAY To', anchor)
+
+    def test_default_font(self):
+        # the bitmap font's characters overhang the one before
+        for text in ('Hello 123', ' W', 'AVATAR'):
+            self.check(ImageFont.load_default(), text)
+
+    def test_cached(self):
+        font = self.cache.truetype(os.path.join(SCRIPT, 'DejaVuSans.ttf'), 16)
+        self.assertTrue(self.cache.glyph(font, '1') is self.cache.glyph(font, '1'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.glyph(font, '1').advance, font.getsize('1')[0])
+        self.assertEqual(self.cache.advance(font, '12:30'), font.getsize('12:30')[0])
+
+    def test_changing(self):
+        # a clock draws a new string every second, from the same glyphs
+        font = self.cache.truetype(os.path.join(SCRIPT, 'DejaVuSans.ttf'), 30)
+        image = Image.new('1', font.getsize('00:00:00'))
+        for second in xrange(3600):
+            self.cache.text(Draw(image), (0, 0), clock(second), font, 1)
+        self.assertTrue(self.cache.misses < 200)
+        self.assertTrue(self.cache.hits > 3600 * 15)
+
+        # after an hour it has seen every character and pair it needs
+        misses = self.cache.misses
+        for second in xrange(3600, 86400, 997):
+            self.check(font, clock(second))
+        self.assertEqual(self.cache.misses, misses)
+
+    def test_kerned(self):
+        # a kerned pair doesn't come out as its glyphs, so the string is
+        # drawn whole
+        font = self.cache.truetype(os.path.join(SCRIPT, 'DejaVuSans.ttf'), 30)
+        self.assertEqual(self.cache.step(font, 'A', 'V'), None)
+        self.assertEqual(self.cache.layout(font, 'HAVE'), None)
+        self.check(font, 'HAVE')
+        self.assertEqual(self.cache.advance(font, 'HAVE'), font.getsize('HAVE')[0])
+
+    def test_budget(self):
+        self.cache.budget = 4096
+        font = self.cache.truetype(os.path.join(SCRIPT, 'DejaVuSans.ttf'), 30)
+        for i in xrange(33, 127):
+            self.cache.glyph(font, chr(i))
+        self.assertTrue(self.cache.bytes <= self.cache.budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
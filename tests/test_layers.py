@@ -0,0 +1,89 @@
+"""
+Layer stacks: compositing, and frames that commit or abort.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import Image
+import ImageChops
+
+import pydisplay
+import layers
+
+
+class LayerStackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.display = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        self.stack = layers.LayerStack(self.display)
+        self.background = self.stack.add()
+        self.background.rectangle((0, 0, 31, 31), fill=1)
+        self.top = self.stack.add('xor')
+        self.top.rectangle((16, 8, 47, 23), fill=1)
+
+    def screen(self):
+        return self.display.display.toImage().tostring()
+
+    def state(self):
+        return [ (layer, layer._image.tostring(), layer.mask.tostring(), layer.visible, layer.mode)
+                 for layer in self.stack.layers ]
+
+    def test_composite(self):
+        expected = Image.new('1', (64, 32))
+        expected.paste(1, (0, 0, 32, 32))
+        square = Image.new('1', (64, 32))
+        square.paste(1, (16, 8, 48, 24))
+        expected = ImageChops.difference(expected, square)
+        self.assertEqual(self.stack.composite((0, 0, 64, 32)).tostring(), expected.tostring())
+        self.assertEqual(self.screen(), expected.tostring())
+
+    def test_frame_sends_once(self):
+        frames = self.display.metrics.snapshot()['frames']
+        with self.stack.frame():
+            self.background.rectangle((40, 0, 50, 5), fill=1)
+            self.top.rectangle((0, 26, 10, 31), fill=1)
+        self.assertEqual(self.display.metrics.snapshot()['frames'], frames + 1)
+        self.assertEqual(self.screen(), self.stack.composite((0, 0, 64, 32)).tostring())
+
+    def test_abort(self):
+        screen = self.screen()
+        state = self.state()
+        self.stack.begin()
+        self.background.rectangle((40, 0, 50, 5), fill=1)
+        self.top.hide()
+        self.top.setMode('or')
+        self.stack.move(self.top, 0)
+        self.stack.add().rectangle((0, 0, 63, 31), fill=1)
+        self.stack.abort()
+        self.assertEqual(self.screen(), screen)
+        self.assertEqual(self.state(), state)
+        self.assertEqual(self.stack.composite((0, 0, 64, 32)).tostring(), screen)
+
+    def test_layer_abort(self):
+        screen = self.screen()
+        state = self.state()
+        self.top.begin()
+        self.top.rectangle((0, 0, 63, 31), fill=1)
+        self.top.abort()
+        self.assertEqual(self.screen(), screen)
+        self.assertEqual(self.state(), state)
+
+    def test_changes_after_abort(self):
+        self.stack.begin()
+        self.top.hide()
+        self.stack.abort()
+        self.top.hide()
+        self.assertEqual(self.screen(), self.stack.composite((0, 0, 64, 32)).tostring())
+        self.assertEqual(self.display.display.toImage().getbbox(), (0, 0, 32, 32))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Refresh metrics: transfer timing and the frame rate.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import time
+import unittest
+
+import pydisplay
+import metrics
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_transfer_timed_per_refresh(self):
+        display = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        before = display.metrics.snapshot()
+        for i in xrange(5):
+            display.rectangle((i*8, 0, i*8+3, 3), fill=1)
+        after = display.metrics.snapshot()
+        refreshes = after['refreshes'] - before.get('refreshes', 0)
+        self.assertEqual(after['transfer']['count'] - before['transfer']['count'], refreshes)
+        self.assertTrue(after['transfer']['sum'] >= before['transfer']['sum'])
+
+    def test_transfer_leaves_out_packing(self):
+        # packing observed on the same metrics, as drivers do, isn't taken
+        # off the transfer time
+        display = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        write = display.display.write
+        def slow(data, address=0):
+            display.metrics.observe('pack', 1.0)
+            write(data, address)
+        display.display.write = slow
+        display.rectangle((0, 0, 7, 7), fill=1)
+        transfer = display.metrics.snapshot()['transfer']
+        self.assertTrue(transfer['sum'] >= 0)
+        self.assertTrue(transfer['sum'] < 1.0)
+
+    def test_fps_before_a_full_window(self):
+        m = metrics.Metrics('Test')
+        m.started = time.time() - 2.0
+        for i in xrange(10):
+            m.frame()
+        # ten frames in the two seconds so far, not over ten seconds
+        self.assertTrue(4.0 < m.fps() <= 5.0)
+
+    def test_fps_over_the_window(self):
+        m = metrics.Metrics('Test')
+        m.started = time.time() - 100
+        for i in xrange(20):
+            m.frame()
+        self.assertEqual(m.fps(), 20 / metrics.FPS_WINDOW)
+
+    def test_no_frames(self):
+        self.assertEqual(metrics.Metrics('Test').fps(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
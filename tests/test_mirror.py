@@ -0,0 +1,166 @@
+"""
+MirrorDisplay: every display gets the same picture, mix writes included,
+and one that falls behind is dropped and sent the whole screen again.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import threading
+import unittest
+
+import Image
+import ImageChops
+from ImageDraw import Draw
+
+import bitpack
+import pydisplay
+import mirror
+
+
+class GU3900Memory(object):
+
+    # display memory a column of 8 bytes after another, written at the
+    # cursor, or combined with what's there by the write mix mode
+    W = 256
+    H = 64
+
+    def __init__(self):
+        self.memory = bytearray(256*8)
+        self.cursor = 0
+        self.mode = pydisplay.OVER
+        self.gate = None
+
+    def clear(self):
+        self.memory = bytearray(256*8)
+
+    def moveCursor(self, x, page):
+        self.cursor = x*8 + page
+
+    def _display_rt_bit_image(self, arg):
+        if self.gate is not None:
+            self.gate.wait()
+        data = arg[5:]
+        self.memory[self.cursor:self.cursor+len(data)] = data
+
+    def setWriteMode(self, mode):
+        self.mode = mode
+
+    def drawImage(self, x, page, w, pages, data):
+        for i in xrange(w):
+            for j in xrange(pages):
+                k = (x+i)*8 + page + j
+                (old, new) = (self.memory[k], ord(data[i*pages + j]))
+                self.memory[k] = (new, old | new, old & new, old ^ new)[self.mode]
+
+    def setDisplayStartAddress(self, *args):
+        pass
+
+
+class GU3900(pydisplay.GU3900):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GU3900Memory())
+
+
+def sprite():
+    image = Image.new('1', (12, 10))
+    Draw(image).ellipse((0, 0, 11, 9), fill=1)
+    return image
+
+
+class RecorderTest(unittest.TestCase):
+
+    def test_recorded(self):
+        device = GU3900Memory()
+        recorder = mirror.Recorder(device)
+        self.assertEqual((recorder.W, recorder.H), (256, 64))
+        recorder.setWriteMode(pydisplay.XOR)
+        recorder.moveCursor(3, 1)
+        self.assertEqual(recorder.mode, pydisplay.OVER)
+        self.assertEqual(recorder.take(), [ ('setWriteMode', (pydisplay.XOR,), {}), ('moveCursor', (3, 1), {}) ])
+        self.assertEqual(recorder.take(), [])
+        # nothing reached the driver
+        self.assertEqual((device.mode, device.cursor), (pydisplay.OVER, 0))
+
+
+class MirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.displays = [ GU3900(), GU3900() ]
+        self.mirror = mirror.MirrorDisplay(self.displays, backlog=2)
+        self.reference = Image.new('1', (256, 64))
+
+    def tearDown(self):
+        for display in self.displays:
+            display.display.gate = None
+        self.mirror.stop()
+
+    def draw(self, box):
+        self.mirror.rectangle(box, fill=1)
+        Draw(self.reference).rectangle(box, fill=1)
+
+    def xor(self, xy, bitmap):
+        self.mirror.xor(xy, bitmap)
+        (w, h) = bitmap.size
+        box = (xy[0], xy[1], xy[0]+w, xy[1]+h)
+        self.reference.paste(ImageChops.difference(self.reference.crop(box), bitmap), box)
+
+    def check(self):
+        self.mirror.flush()
+        expected = bitpack.columns(self.reference.tostring(), 256, 64)
+        for display in self.displays:
+            self.assertEqual(str(display.display.memory), expected)
+        self.assertEqual(self.mirror.acks(), ([ self.mirror.frames ] * 2, self.mirror.frames))
+
+    def test_same_picture(self):
+        self.draw((10, 10, 60, 40))
+        with self.mirror.frame():
+            self.draw((100, 0, 120, 63))
+            self.draw((200, 20, 250, 30))
+        self.check()
+
+    def test_xor(self):
+        # the mix write is recorded with its write mode, and goes out with
+        # whatever else the frame drew
+        self.draw((0, 0, 40, 40))
+        self.xor((30, 20), sprite())
+        with self.mirror.frame():
+            self.draw((100, 10, 110, 20))
+            self.xor((104, 13), sprite())
+        self.check()
+        for display in self.displays:
+            self.assertEqual(display.display.mode, pydisplay.OVER)
+
+    def test_dropped_and_resent(self):
+        slow = self.mirror.mirrors[1]
+        self.drops = 0
+        drop = slow._drop
+        def counted():
+            self.drops += 1
+            drop()
+        slow._drop = counted
+
+        # hold up the second display while frames pile up behind it
+        self.mirror.flush()
+        gate = threading.Event()
+        self.displays[1].display.gate = gate
+        for i in xrange(6):
+            self.draw((i*20, 0, i*20 + 10, 10))
+        self.mirror.mirrors[0].flush()
+        self.assertTrue(self.drops > 0)
+
+        # once it catches up the next frame sends it the whole screen
+        gate.set()
+        slow.flush()
+        self.draw((200, 40, 210, 50))
+        self.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
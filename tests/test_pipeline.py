@@ -0,0 +1,180 @@
+"""
+The refresh pipeline: the same picture as refreshing in commit(), frames
+waiting behind a slow bus sent as one, and aborted frames and scrolls.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import threading
+import unittest
+
+import Image
+from ImageDraw import Draw
+
+import bitpack
+import pydisplay
+
+
+class GU3900Memory(object):
+
+    # display memory a column of 8 bytes after another, written at the
+    # cursor, or combined with what's there by the write mix mode; writes
+    # can be held up at a gate, as on a slow bus
+    W = 256
+    H = 64
+
+    def __init__(self):
+        self.memory = bytearray(256*8)
+        self.cursor = 0
+        self.mode = pydisplay.OVER
+        self.gate = None
+        self.waiting = threading.Event()
+
+    def clear(self):
+        self.memory = bytearray(256*8)
+
+    def moveCursor(self, x, page):
+        self.cursor = x*8 + page
+
+    def _display_rt_bit_image(self, arg):
+        if self.gate is not None:
+            self.waiting.set()
+            self.gate.wait()
+        data = arg[5:]
+        self.memory[self.cursor:self.cursor+len(data)] = data
+
+    def setWriteMode(self, mode):
+        self.mode = mode
+
+    def drawImage(self, x, page, w, pages, data):
+        for i in xrange(w):
+            for j in xrange(pages):
+                k = (x+i)*8 + page + j
+                (old, new) = (self.memory[k], ord(data[i*pages + j]))
+                self.memory[k] = (new, old | new, old & new, old ^ new)[self.mode]
+
+    def setDisplayStartAddress(self, *args):
+        pass
+
+
+class GU3900(pydisplay.GU3900):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GU3900Memory())
+
+
+def screen(display):
+    device = display.display
+    if isinstance(device, GU3900Memory):
+        return str(device.memory)
+    return device.toImage().tostring()
+
+
+def draw(display):
+    # frames of drawing, xors and scrolls
+    display.rectangle((0, 0, 40, 30), fill=1)
+    with display.frame():
+        display.ellipse((50, 10, 90, 40), fill=1)
+        display.rectangle((20, 20, 60, 25), fill=0)
+    sprite = Image.new('1', (16, 12))
+    Draw(sprite).ellipse((0, 0, 15, 11), fill=1)
+    display.xor((30, 5), sprite)
+    with display.frame():
+        display.scroll(0, -8)
+        display.rectangle((0, display.H-8, 100, display.H-1), fill=1)
+    display.scroll(-4, 0, (10, 10, 70, 40))
+    with display.frame():
+        display.xor((100, 30), sprite)
+        display.line((0, 63, 120, 0), fill=1)
+
+
+class PipelineTest(unittest.TestCase):
+
+    def displays(self):
+        return [ pydisplay.MakeDisplay('virtual', W=128, H=64), GU3900() ]
+
+    def test_same_picture(self):
+        for (direct, piped) in zip(self.displays(), self.displays()):
+            piped.startPipeline()
+            for display in (direct, piped):
+                draw(display)
+            piped.flush()
+            self.assertEqual(screen(piped), screen(direct))
+            self.assertEqual(piped.image.tostring(), direct.image.tostring())
+            piped.stopPipeline()
+
+    def test_latest_frame(self):
+        display = GU3900()
+        device = display.display
+        sent = []
+        transmit = display.transmit
+        def counted(fb, changes, mixes=()):
+            sent.append(len(changes))
+            transmit(fb, changes, mixes)
+        display.transmit = counted
+        display.startPipeline()
+        try:
+            # hold the bus up on the first frame, and queue two behind it
+            device.gate = threading.Event()
+            display.rectangle((0, 0, 10, 10), fill=1)
+            device.waiting.wait(5)
+            self.assertTrue(device.waiting.isSet())
+            display.rectangle((100, 0, 110, 10), fill=1)
+            display.rectangle((200, 0, 210, 10), fill=1)
+            display._pipeline.packs.join()
+            device.gate.set()
+            display.flush()
+        finally:
+            device.gate.set()
+            display.stopPipeline()
+
+        # the two waiting went out together, with both their changes
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(sent[1], 2)
+        reference = Image.new('1', (256, 64))
+        for x in (0, 100, 200):
+            Draw(reference).rectangle((x, 0, x+10, 10), fill=1)
+        self.assertEqual(screen(display), bitpack.columns(reference.tostring(), 256, 64))
+
+    def test_abort(self):
+        for (direct, piped) in zip(self.displays(), self.displays()):
+            piped.startPipeline()
+            for display in (direct, piped):
+                draw(display)
+                before = display.image.tostring()
+                origin = display.origin
+                display.begin()
+                display.scroll(0, -8)
+                display.rectangle((0, 0, 60, 60), fill=1)
+                display.abort()
+                self.assertEqual(display.image.tostring(), before)
+                self.assertEqual(display.origin, origin)
+                # and carries on from where it was
+                with display.frame():
+                    display.scroll(0, 8)
+                    display.rectangle((5, 0, 25, 8), fill=1)
+            piped.flush()
+            self.assertEqual(screen(piped), screen(direct))
+            self.assertEqual(piped.image.tostring(), direct.image.tostring())
+            piped.stopPipeline()
+
+    def test_stop(self):
+        # stopping sends whatever is still queued
+        (direct, piped) = (pydisplay.MakeDisplay('virtual', W=128, H=64),
+                           pydisplay.MakeDisplay('virtual', W=128, H=64))
+        piped.startPipeline(depth=1)
+        for display in (direct, piped):
+            for i in xrange(10):
+                display.rectangle((i*10, i*5, i*10 + 8, i*5 + 4), fill=1)
+        piped.stopPipeline()
+        self.assertEqual(screen(piped), screen(direct))
+
+
+if __name__ == '__main__':
+    unittest.main()
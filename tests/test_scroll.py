@@ -0,0 +1,118 @@
+"""
+Scrolling on the virtual display, in hardware through the start line and
+by redrawing, against the same moves made on a PIL image.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import random
+import unittest
+
+import Image
+from ImageDraw import Draw
+
+import pydisplay
+
+
+def scrolled(image, dx, dy, bbox, fill):
+    # the reference: the box moved, and what's uncovered filled
+    (left, top, right, bottom) = bbox
+    moved = Image.new('1', (right-left, bottom-top), fill)
+    moved.paste(image.crop(bbox), (dx, dy))
+    image = image.copy()
+    image.paste(moved, (left, top))
+    return image
+
+
+class ScrollTest(unittest.TestCase):
+
+    def setUp(self):
+        self.display = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        self.device = self.display.display
+        self.reference = Image.new('1', (64, 32))
+        random.seed(3)
+        for i in xrange(12):
+            x = random.randint(0, 60)
+            y = random.randint(0, 28)
+            self.draw((x, y, x+random.randint(1, 12), y+random.randint(1, 6)))
+
+    def draw(self, box):
+        self.display.rectangle(box, fill=1)
+        Draw(self.reference).rectangle(box, fill=1)
+
+    def scroll(self, dx, dy, bbox=None, fill=0):
+        self.display.scroll(dx, dy, bbox, fill)
+        self.reference = scrolled(self.reference, dx, dy, bbox or (0, 0, 64, 32), fill)
+
+    def check(self):
+        self.display.flush()
+        self.assertEqual(self.display.image.tostring(), self.reference.tostring())
+        self.assertEqual(self.device.toImage().tostring(), self.reference.tostring())
+
+    def test_hardware(self):
+        for dy in (-8, -3, 5, -31, 12):
+            self.scroll(0, dy)
+            self.check()
+        self.assertNotEqual(self.display.origin, (0, 0))
+        self.assertEqual(self.device.start, self.display.origin[1])
+
+    def test_sends_only_the_strip(self):
+        self.device.reset()
+        self.scroll(0, -8)
+        self.check()
+        # eight rows of eight bytes, and the start line
+        self.assertEqual(len(self.device.written()), 8 * 8)
+
+    def test_draw_after_scroll(self):
+        for i in xrange(6):
+            with self.display.frame():
+                self.scroll(0, -4)
+                self.draw((i*8, 28, i*8+5, 31))
+            self.check()
+
+    def test_fill(self):
+        self.scroll(0, 6, fill=1)
+        self.check()
+
+    def test_software(self):
+        # across, and part of the screen, the virtual display redraws
+        self.scroll(5, 0)
+        self.check()
+        self.scroll(0, -2, (8, 8, 40, 24))
+        self.check()
+        self.assertEqual(self.device.start, 0)
+
+    def test_mixed(self):
+        self.scroll(0, -10)
+        self.scroll(-3, 0)
+        self.scroll(0, 4, (0, 0, 32, 32), fill=1)
+        self.draw((50, 0, 63, 31))
+        self.scroll(0, 7)
+        self.check()
+
+    def test_abort(self):
+        self.scroll(0, -5)
+        self.check()
+        origin = self.display.origin
+        self.display.begin()
+        self.display.scroll(0, -9)
+        self.display.rectangle((0, 0, 63, 31), fill=1)
+        self.display.abort()
+        self.assertEqual(self.display.origin, origin)
+        self.check()
+
+    def test_clear(self):
+        self.scroll(0, -11)
+        self.display.clear()
+        self.reference = Image.new('1', (64, 32))
+        self.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
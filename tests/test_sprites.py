@@ -0,0 +1,235 @@
+"""
+Sprites: xor'ed onto a display, with and without a write mix mode, and
+drawn solid on a layer stack; moved, overlapping, hidden, and a frame of
+moves sent as one refresh.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import unittest
+
+import Image
+import ImageChops
+from ImageDraw import Draw
+
+import bitpack
+import pydisplay
+import layers
+import sprites
+
+
+class GU3900Memory(object):
+
+    # display memory a column of 8 bytes after another, written at the
+    # cursor, or combined with what's there by the write mix mode
+    W = 256
+    H = 64
+
+    def __init__(self):
+        self.memory = bytearray(256*8)
+        self.cursor = 0
+        self.mode = pydisplay.OVER
+        self.mixes = 0
+
+    def clear(self):
+        self.memory = bytearray(256*8)
+
+    def moveCursor(self, x, page):
+        self.cursor = x*8 + page
+
+    def _display_rt_bit_image(self, arg):
+        data = arg[5:]
+        self.memory[self.cursor:self.cursor+len(data)] = data
+
+    def setWriteMode(self, mode):
+        self.mode = mode
+
+    def drawImage(self, x, page, w, pages, data):
+        self.mixes += 1
+        for i in xrange(w):
+            for j in xrange(pages):
+                k = (x+i)*8 + page + j
+                (old, new) = (self.memory[k], ord(data[i*pages + j]))
+                self.memory[k] = (new, old | new, old & new, old ^ new)[self.mode]
+
+    def setDisplayStartAddress(self, *args):
+        pass
+
+
+class GU3900(pydisplay.GU3900):
+
+    def __init__(self):
+        pydisplay.PyDisplay.__init__(self, GU3900Memory())
+
+
+def ball(size=(12, 10)):
+    image = Image.new('1', size)
+    Draw(image).ellipse((0, 0, size[0]-1, size[1]-1), fill=1)
+    return image
+
+
+class XorTest(unittest.TestCase):
+
+    def make(self, display):
+        self.display = display
+        self.background = Image.new('1', (display.W, display.H))
+        self.draw((0, 0, 40, 30))
+        self.draw((60, 20, 61, 60))
+        self.sprites = sprites.Sprites(display)
+        self.ball = self.sprites.add(ball())
+        self.other = self.sprites.add(ball((8, 8)))
+
+    def draw(self, box):
+        self.display.rectangle(box, fill=1)
+        Draw(self.background).rectangle(box, fill=1)
+
+    def expected(self):
+        # the background with every sprite shown xor'ed in
+        image = self.background.copy()
+        for sprite in self.sprites.sprites:
+            box = sprite.box()
+            if box:
+                image.paste(ImageChops.difference(image.crop(box), sprite.bitmap), box)
+        return image
+
+    def check(self):
+        expected = self.expected()
+        self.assertEqual(self.display.image.tostring(), expected.tostring())
+        device = self.display.display
+        if isinstance(device, GU3900Memory):
+            self.assertEqual(str(device.memory), bitpack.columns(expected.tostring(), device.W, device.H))
+        else:
+            self.assertEqual(device.toImage().tostring(), expected.tostring())
+
+    def displays(self):
+        return [ pydisplay.MakeDisplay('virtual', W=128, H=64), GU3900() ]
+
+    def test_move(self):
+        for display in self.displays():
+            self.make(display)
+            self.ball.show((30, 20))
+            self.check()
+            self.ball.moveBy(3, 2)
+            self.check()
+            # far enough to go as two writes
+            self.ball.move((90, 40))
+            self.check()
+            self.ball.hide()
+            self.check()
+
+    def test_overlap(self):
+        for display in self.displays():
+            self.make(display)
+            self.ball.show((20, 20))
+            self.other.show((26, 24))
+            self.check()
+            self.ball.moveBy(2, 1)
+            self.check()
+            self.other.hide()
+            self.ball.hide()
+            self.check()
+
+    def test_mix_write(self):
+        # only the sprite's columns go to a display with a write mix mode
+        self.make(GU3900())
+        device = self.display.display
+        self.ball.show((30, 20))
+        self.ball.moveBy(1, 0)
+        self.assertEqual(device.mixes, 2)
+        self.assertEqual(device.mode, pydisplay.OVER)
+        self.check()
+
+    def test_frame(self):
+        for display in self.displays():
+            self.make(display)
+            self.ball.show((10, 10))
+            self.other.show((50, 10))
+            frames = display.metrics.snapshot()['frames']
+            with self.sprites.frame():
+                self.ball.moveBy(4, 4)
+                self.other.moveBy(-4, 4)
+            self.assertEqual(display.metrics.snapshot()['frames'], frames + 1)
+            self.check()
+
+    def test_drawn_in_the_frame(self):
+        # drawing and a move in one frame both reach the screen
+        for display in self.displays():
+            self.make(display)
+            self.ball.show((10, 10))
+            frames = display.metrics.snapshot()['frames']
+            with self.sprites.frame():
+                self.draw((80, 0, 100, 8))
+                self.ball.moveBy(5, 0)
+                self.draw((12, 12, 14, 14))
+            self.assertEqual(display.metrics.snapshot()['frames'], frames + 1)
+            self.check()
+
+
+class LayerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.display = pydisplay.MakeDisplay('virtual', W=128, H=64)
+        self.stack = layers.LayerStack(self.display)
+        self.layer = self.stack.add()
+        self.boxes = []
+        self.draw((0, 0, 40, 30))
+        self.sprites = sprites.Sprites(self.stack)
+        # solid: its mask is the whole box
+        self.ball = self.sprites.add(ball(), Image.new('1', (12, 10), 1))
+        self.other = self.sprites.add(ball((8, 8)))
+
+    def draw(self, box):
+        self.layer.rectangle(box, fill=1)
+        self.boxes.append(box)
+
+    def expected(self):
+        # the layer, with the sprites on top in the order they were added
+        image = Image.new('1', (128, 64))
+        for box in self.boxes:
+            Draw(image).rectangle(box, fill=1)
+        for sprite in self.sprites.sprites:
+            if sprite.xy:
+                image.paste(sprite.bitmap, sprite.xy, sprite.mask)
+        return image.tostring()
+
+    def check(self):
+        self.assertEqual(self.display.display.toImage().tostring(), self.expected())
+
+    def test_move(self):
+        self.ball.show((35, 25))
+        self.check()
+        self.ball.moveBy(2, 2)
+        self.check()
+        self.ball.hide()
+        self.check()
+
+    def test_overlap(self):
+        # the sprite added later stays on top
+        self.ball.show((50, 20))
+        self.other.show((55, 22))
+        self.check()
+        self.ball.moveBy(1, 1)
+        self.check()
+        self.other.hide()
+        self.check()
+
+    def test_frame(self):
+        self.ball.show((10, 10))
+        self.other.show((60, 40))
+        frames = self.display.metrics.snapshot()['frames']
+        with self.sprites.frame():
+            self.ball.moveBy(4, 4)
+            self.other.moveBy(-4, 4)
+            self.draw((100, 0, 110, 10))
+        self.assertEqual(self.display.metrics.snapshot()['frames'], frames + 1)
+        self.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+A TiledDisplay over virtual displays.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import virtual
+virtual.install()
+
+import os
+import tempfile
+import unittest
+
+import Image
+from ImageDraw import Draw
+
+import pydisplay
+import tiled
+import assets
+
+
+class TiledTest(unittest.TestCase):
+
+    def setUp(self):
+        self.left = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        self.right = pydisplay.MakeDisplay('virtual', W=64, H=32)
+        self.wall = tiled.TiledDisplay([ (self.left, (0, 0)), (self.right, (64, 0)) ])
+
+    def tearDown(self):
+        self.wall.stop()
+
+    def check(self, reference):
+        self.wall.flush()
+        for (display, x) in ((self.left, 0), (self.right, 64)):
+            expected = reference.crop((x, 0, x+64, 32)).tostring()
+            self.assertEqual(display.display.toImage().tostring(), expected)
+
+    def test_across_the_join(self):
+        reference = Image.new('1', (128, 32))
+        self.wall.rectangle((50, 4, 80, 20), fill=1)
+        Draw(reference).rectangle((50, 4, 80, 20), fill=1)
+        self.check(reference)
+
+    def test_asset(self):
+        (handle, path) = tempfile.mkstemp('.png')
+        os.close(handle)
+        saved = assets.CACHE
+        assets.CACHE = None
+        try:
+            icon = Image.new('L', (16, 16))
+            icon.paste(255, (4, 4, 12, 12))
+            icon.save(path)
+            asset = assets.load(path)
+            self.wall.bitmap((56, 8), asset)
+            reference = Image.new('1', (128, 32))
+            reference.paste(asset.image, (56, 8))
+            self.check(reference)
+        finally:
+            assets.CACHE = saved
+            os.remove(path)
+
+    def test_cost(self):
+        bbox = (60, 0, 70, 8)
+        parts = self.left.cost(self.left.span((60, 0, 64, 8))) + \
+                self.right.cost(self.right.span((0, 0, 6, 8)))
+        # the virtual displays share no bus, so they send side by side
+        self.assertTrue(self.wall.cost(bbox) < parts)
+        self.assertEqual(self.wall.size(bbox), 2 * 64)
+        self.assertEqual(self.wall.commands(bbox), 2)
+
+    def test_calibrate(self):
+        self.assertEqual(len(self.wall.calibrate(2)), 2)
+
+    def test_no_framebuffer(self):
+        self.assertRaises(NotImplementedError, self.wall.plan, [ (0, 0, 8, 8) ])
+        self.assertRaises(NotImplementedError, self.wall.pack, [])
+        self.assertRaises(NotImplementedError, self.wall.refresh, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
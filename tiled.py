@@ -0,0 +1,279 @@
+"""
+Several displays side by side, drawn as one large display.
+
+TiledDisplay places PyDisplays on a shared canvas, each at its own origin,
+and draws on them as a single display:
+
+    wall = TiledDisplay([ (pydisplay.MakeDisplay('ks0108', bus='par'), (0, 0)),
+                          (pydisplay.MakeDisplay('ks0108', bus='usb'), (128, 0)) ])
+    wall.text((100, 20), 'across the join')
+
+Each frame's damage is split between the displays it touches, and every
+bus has an I/O thread of its own, so the displays refresh at the same time
+and a frame takes about as long as the slowest of them rather than the sum.
+commit() returns once the frame is queued. With barrier=True it waits until
+every display has the frame, and the transfers only start once all of the
+displays have packed their part, so the panels change together.
+
+The displays may use different drivers and buses. Parts of the canvas no
+display covers can be drawn on but are never shown.
+
+A TiledDisplay has no framebuffer or bus of its own: each display packs
+and sends its part itself. cost(), size() and commands() add up the parts,
+calibrate() calibrates each display, and pack(), transmit(), refresh()
+and plan() raise NotImplementedError.
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+from __future__ import with_statement
+
+import threading
+import Queue
+import traceback
+
+import Image
+
+import damage
+from framebuffer import align
+from pydisplay import PyDisplay
+from aiodisplay import busOf
+
+
+class Barrier(object):
+    """
+    Holds threads in wait() until all of the parties have arrived.
+    """
+
+    def __init__(self, parties):
+        self.parties = parties
+        self.arrived = 0
+        self._cond = threading.Condition()
+
+    def wait(self):
+        with self._cond:
+            self.arrived += 1
+            if self.arrived >= self.parties:
+                self._cond.notifyAll()
+            while self.arrived < self.parties:
+                self._cond.wait()
+
+
+class Worker(object):
+    """
+    The I/O thread for the displays on one bus. Each job is a list of
+    (display, updates) and an optional barrier to meet between packing
+    and sending.
+    """
+
+    def __init__(self, bus, depth=2):
+        self.bus = bus
+        self.queue = Queue.Queue(depth)
+        self.thread = threading.Thread(target=self._run, name='tile %s' % (bus,))
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def flush(self):
+        self.queue.join()
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                return
+            (parts, gate) = job
+            try:
+                sends = []
+                for (display, updates) in parts:
+                    with display.idle():
+                        _paste(display.image, updates)
+                        sends.append((display, display.pack(updates)))
+
+                # wait for the other buses to be ready to send too
+                if gate:
+                    gate.wait()
+                    gate = None
+
+                for (display, changes) in sends:
+                    with display.idle():
+                        display.transmit(display.fb, changes)
+            except:
+                traceback.print_exc()
+            # don't hold up the other buses if this one failed
+            if gate:
+                gate.wait()
+            self.queue.task_done()
+
+
+def _paste(image, updates):
+
+    # keep a display's own image in step with its framebuffer
+    for (bbox, packed) in updates:
+        (left, top, right, bottom) = bbox
+        image.paste(Image.fromstring('1', (right-left, bottom-top), packed), (left, top))
+
+
+class TiledDisplay(PyDisplay):
+
+    def __init__(self, tiles, barrier=False, depth=2):
+        """
+        tiles is a list of (display, (x, y)), the origin of each display on
+        the canvas. depth frames may queue up for each bus before commit()
+        waits.
+        """
+        self.tiles = [ (display, tuple(xy)) for (display, xy) in tiles ]
+        self.W = max([ x + display.W for (display, (x, y)) in self.tiles ])
+        self.H = max([ y + display.H for (display, (x, y)) in self.tiles ])
+        self.barrier = barrier
+        self.display = self # there's no one driver underneath
+        self._depth = 0
+        self._work = None
+        self._image = Image.new('1', (self.W, self.H))
+        self._lock = threading.RLock()
+        self._pipeline = None
+
+        # one I/O thread per bus, shared by the displays on it
+        self.workers = {}
+        self._workerOf = {}
+        for (display, xy) in self.tiles:
+            bus = busOf(display.display)
+            if bus not in self.workers:
+                self.workers[bus] = Worker(bus, depth)
+            self._workerOf[id(display)] = self.workers[bus]
+
+    def clear(self):
+        with self.idle():
+            self._image = Image.new('1', (self.W, self.H))
+            for (display, xy) in self.tiles:
+                display.clear()
+
+    def flush(self):
+        """
+        Wait until every committed frame has reached every display.
+        """
+        for worker in self.workers.values():
+            worker.flush()
+
+    def stop(self):
+        """
+        Send everything still queued and stop the I/O threads.
+        """
+        with self._lock:
+            for worker in self.workers.values():
+                worker.stop()
+            self.workers = {}
+
+    def _parts(self, bbox):
+
+        # each display a box touches, and the part of it in the display's
+        # own coordinates
+        (l, t, r, b) = bbox
+        for (display, (x, y)) in self.tiles:
+            part = damage.clip((l-x, t-y, r-x, b-y), display.W, display.H)
+            if part:
+                yield (display, part)
+
+    def cost(self, bbox):
+        """
+        Estimated seconds to refresh a region: the displays on each bus
+        take turns, and the buses run side by side.
+        """
+        buses = {}
+        for (display, part) in self._parts(bbox):
+            worker = self._workerOf[id(display)]
+            buses[worker] = buses.get(worker, 0.0) + display.cost(display.span(part))
+        return max(buses.values() + [ 0.0 ])
+
+    def size(self, bbox):
+        return sum([ display.size(display.span(part)) for (display, part) in self._parts(bbox) ])
+
+    def commands(self, bbox):
+        return sum([ display.commands(display.span(part)) for (display, part) in self._parts(bbox) ])
+
+    def calibrate(self, rounds=4):
+        """
+        Calibrate each display's bus. Returns whether each fit, in order.
+        """
+        self.flush()
+        return [ display.calibrate(rounds) for (display, xy) in self.tiles ]
+
+    def pack(self, updates, mixes=()):
+        raise NotImplementedError('each display of a TiledDisplay packs its own part')
+
+    def transmit(self, fb, changes, mixes=()):
+        raise NotImplementedError('each display of a TiledDisplay sends its own part')
+
+    def refresh(self, fb, bbox=None):
+        raise NotImplementedError('each display of a TiledDisplay sends its own part')
+
+    def plan(self, changes):
+        raise NotImplementedError('each display of a TiledDisplay plans its own refreshes')
+
+    def _blit(self, xy, asset):
+        # there's no framebuffer to put an asset in, so it's drawn on the
+        # canvas like any other bitmap
+        return False
+
+    def startPipeline(self, depth=2):
+        # already refreshing in the background
+        pass
+
+    def stopPipeline(self):
+        pass
+
+    def _commit(self):
+
+        image, boxes = self._work, self._damage
+        self._work = None
+        self._damage = []
+
+        if None in boxes:
+            boxes = [ (0, 0, self.W, self.H) ]
+        boxes = [ damage.clip(bbox, self.W, self.H) for bbox in boxes ]
+        boxes = [ bbox for bbox in boxes if bbox ]
+
+        if self._aborted:
+            # put the canvas back the way the displays have it
+            self.flush()
+            for (display, (x, y)) in self.tiles:
+                image.paste(display.image, (x, y))
+            return
+
+        # split the damage between the displays, in their own coordinates
+        jobs = {}
+        for (display, (x, y)) in self.tiles:
+            (w, h) = (display.W, display.H)
+            parts = [ damage.clip((l-x, t-y, r-x, b-y), w, h) for (l, t, r, b) in boxes ]
+            parts = damage.disjoint([ align(part) for part in parts if part ])
+            if not parts:
+                continue
+
+            updates = []
+            for (l, t, r, b) in parts:
+                # the aligned box may run past the display's right hand edge,
+                # where the framebuffer expects padding, not the next display
+                crop = image.crop((x+l, y+t, x+min(r, w), y+b))
+                if r > w:
+                    padded = Image.new('1', (r-l, b-t))
+                    padded.paste(crop, (0, 0))
+                    crop = padded
+                updates.append(((l, t, r, b), crop.tostring()))
+            jobs.setdefault(self._workerOf[id(display)], []).append((display, updates))
+
+        gate = None
+        if self.barrier and len(jobs) > 1:
+            gate = Barrier(len(jobs))
+        for (worker, parts) in jobs.items():
+            worker.queue.put((parts, gate))
+
+        if self.barrier:
+            self.flush()
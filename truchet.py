@@ -14,21 +14,24 @@ import random
 import time
 
 
+# some truchet tile patterns, each a pair of 8x8 tiles
+pattern = '\x08\x04\x02\x01\x80\x40\x20\x10'
+squaretile = ( pattern, pattern[::-1] )
+pattern = '\x08\x08\x04\x03\xc0\x20\x10\x10'
+roundtile = ( pattern, pattern[::-1] )
+binary = ( '\x00\x10\x10\x10\x10\x10\x10\x00', '\x00\x18\x24\x24\x24\x24\x18\x00' )
+dots0  = ( '\x00\x00\x00\x18\x18\x00\x00\x00', '\x00\x00\x18\x3c\x3c\x18\x00\x00' )
+dots1  = ( '\x00\x06\x06\x00\x00\x00\x00\x00', '\x06\x0F\x0F\x06\x00\x00\x00\x00' )
+dots2  = ( '\x00\x00\x00\x00\x00\x06\x06\x00', '\x00\x00\x00\x00\x06\x0F\x0F\x06' )
+dots3  = ( '\x00\x60\x60\x00\x00\x00\x00\x00', '\x60\xF0\xF0\x60\x00\x00\x00\x00' )
+dots4  = ( '\x00\x00\x00\x00\x00\x60\x60\x00', '\x00\x00\x00\x00\x60\xF0\xF0\x60' )
+empty  = ( '\x00\x00\x00\x00\x00\x00\x00\x00', '\x01\x00\x00\x00\x00\x00\x00\x00' )
+
+patterns = [binary, dots0, dots1, dots2, dots3, dots4, roundtile, squaretile]
+
+
 def Truchet(display,W,H):
     
-    # define some truchet tile patterns
-    pattern = '\x08\x04\x02\x01\x80\x40\x20\x10'
-    squaretile = ( pattern, pattern[::-1] )
-    pattern = '\x08\x08\x04\x03\xc0\x20\x10\x10'
-    roundtile = ( pattern, pattern[::-1] )
-    binary = ( '\x00\x10\x10\x10\x10\x10\x10\x00', '\x00\x18\x24\x24\x24\x24\x18\x00' )
-    dots0  = ( '\x00\x00\x00\x18\x18\x00\x00\x00', '\x00\x00\x18\x3c\x3c\x18\x00\x00' )
-    dots1  = ( '\x00\x06\x06\x00\x00\x00\x00\x00', '\x06\x0F\x0F\x06\x00\x00\x00\x00' )
-    dots2  = ( '\x00\x00\x00\x00\x00\x06\x06\x00', '\x00\x00\x00\x00\x06\x0F\x0F\x06' )
-    dots3  = ( '\x00\x60\x60\x00\x00\x00\x00\x00', '\x60\xF0\xF0\x60\x00\x00\x00\x00' )
-    dots4  = ( '\x00\x00\x00\x00\x00\x60\x60\x00', '\x00\x00\x00\x00\x60\xF0\xF0\x60' )
-    empty  = ( '\x00\x00\x00\x00\x00\x00\x00\x00', '\x01\x00\x00\x00\x00\x00\x00\x00' )
-    
     # build a table of screen addresses
     addr = [ (x,y) for x in xrange(0,W,8) for y in xrange(0,H,8) ]
 
@@ -39,7 +42,7 @@ def Truchet(display,W,H):
         random.shuffle(choice)
         for c in choice:
             # pick a random tile pattern from the available patterns
-            pattern = [binary, dots0, dots1, dots2, dots3, dots4, roundtile, squaretile][c]
+            pattern = patterns[c]
 
             # for each (randomized) address location
             random.shuffle(addr)
@@ -0,0 +1,325 @@
+"""
+Virtual display and fake bus transports, for running without hardware.
+
+VirtualDevice is an in-memory row-addressed display, available through
+pydisplay.MakeDisplay('virtual', W=128, H=64).
+
+install() goes further and lets the real drivers run headless: it puts
+fakes in place of pyparallel, pySerial and pyusb, and of the ppdev
+/dev/parport* files, each of which records every byte and control line
+change with a timestamp. Call it before pydisplay or any driver is
+imported, since they decide which buses exist as they load:
+
+    import virtual
+    virtual.install()
+
+    import pydisplay
+    display = pydisplay.MakeDisplay('ks0108', bus='par')
+    display.text((0, 0), 'hello')
+    print len(virtual.transports[-1].written())
+
+Copyright (c) 2006 spacemarmot@users.sourceforge.net
+
+This file is released under the GNU Lesser General Public Licence.
+See the file LICENSE for details.
+"""
+
+import os
+import sys
+import time
+import types
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # no ppdev here anyway
+
+import Image
+
+# every fake transport made, in order
+transports = []
+
+
+class Transport(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.log = []
+        transports.append(self)
+
+    def record(self, event, value=None):
+        self.log.append((time.time(), event, value))
+
+    def written(self):
+        """
+        Every byte written, in order, as a string.
+        """
+        result = []
+        for (t, event, value) in self.log:
+            if event == 'write':
+                result.append(value)
+            elif event == 'data':
+                result.append(chr(value & 0xFF))
+        return ''.join(result)
+
+    def reset(self):
+        del self.log[:]
+
+    def __repr__(self):
+        return '<%s %s, %d events>' % (self.__class__.__name__, self.name, len(self.log))
+
+
+#____ virtual display ___________________________________________________________
+
+class VirtualDevice(Transport):
+
+    # rough transfer costs in seconds, see cost.py
+    commandCost = 100e-6   # pretend to be a typical parallel port display
+    byteCost    = 10e-6
+
+    def __init__(self, W=128, H=64):
+        Transport.__init__(self, 'virtual')
+        self.W = W
+        self.H = H
+        self.memory = bytearray((W+7)/8 * H)
+        self.start = 0
+
+    def write(self, data, address=0):
+        self.record('write', data)
+        self.memory[address:address+len(data)] = data
+
+    def setStartLine(self, line):
+        # the row of memory shown at the top, wrapping round like a KS0108
+        self.record('start', line)
+        self.start = line
+
+    def toImage(self):
+        image = Image.fromstring('1', (self.W, self.H), str(self.memory))
+        if self.start:
+            (W, H) = (self.W, self.H)
+            top = image.crop((0, self.start, W, H))
+            image.paste(image.crop((0, 0, W, self.start)), (0, H - self.start))
+            image.paste(top, (0, 0))
+        return image
+
+
+#____ pyparallel ________________________________________________________________
+
+class Parallel(Transport):
+
+    def __init__(self, port=0):
+        Transport.__init__(self, 'parallel%s' % port)
+        self.busy = False
+
+    # outputs
+    def setData(self, value):       self.record('data', value)
+    def setDataStrobe(self, level): self.record('strobe', level)
+    def setAutoFeed(self, level):   self.record('autofeed', level)
+    def setInitOut(self, level):    self.record('init', level)
+    def setSelect(self, level):     self.record('select', level)
+
+    # inputs
+    def getInBusy(self):
+        # drivers wait on this line in either sense, as BUSY or as RDY, so
+        # flip it on every read: each wait then ends by the second poll
+        self.busy = not self.busy
+        return self.busy
+    def getInAcknowledge(self): return False
+    def getInPaperOut(self):    return False
+    def getInSelected(self):    return True
+
+
+#____ ppdev ______________________________________________________________________
+
+class Parport(Transport):
+
+    # a /dev/parport* file, backed by /dev/null so its descriptor is real
+    def __init__(self, path):
+        Transport.__init__(self, path)
+        self.fd = _os['open']('/dev/null', os.O_RDWR)
+        self.record('open')
+
+    def write(self, data):
+        self.record('write', data)
+        return len(data)
+
+    def ioctl(self, request, arg=0):
+        self.record('ioctl', (request, arg))
+        return arg
+
+    def close(self):
+        self.record('close')
+        _os['close'](self.fd)
+
+
+_parports = {}
+
+_os = { 'open'  : os.open,
+        'write' : os.write,
+        'close' : os.close,
+        'ioctl' : getattr(fcntl, 'ioctl', None) }
+
+def _open(path, flags, mode=0777):
+    if not path.startswith('/dev/parport'):
+        return _os['open'](path, flags, mode)
+    parport = Parport(path)
+    _parports[parport.fd] = parport
+    return parport.fd
+
+def _write(fd, data):
+    if fd in _parports:
+        return _parports[fd].write(data)
+    return _os['write'](fd, data)
+
+def _close(fd):
+    if fd in _parports:
+        return _parports.pop(fd).close()
+    return _os['close'](fd)
+
+def _ioctl(fd, request, arg=0, *args):
+    if fd in _parports:
+        return _parports[fd].ioctl(request, arg)
+    return _os['ioctl'](fd, request, arg, *args)
+
+
+#____ pySerial __________________________________________________________________
+
+def ubwReply(data):
+    """
+    What a USB Bit Whacker running D firmware 1.4 answers to a write.
+    """
+    if data.startswith('V'):
+        return 'UBW FW D Version 1.4.0\r\n'
+    if data.startswith('I'):
+        return 'I,0,0,0\r\n'
+    if data.startswith('BO'):
+        return None
+    return 'OK\r\n'
+
+
+class Serial(Transport):
+
+    def __init__(self, port=None, baudrate=9600, **kwds):
+        Transport.__init__(self, str(port))
+        self.port = port
+        self.baudrate = baudrate
+        self.settings = kwds
+        self.replies = []
+        # Bit Whackers enumerate as modems, everything else just listens
+        self.reply = (None, ubwReply)[str(port).startswith('/dev/ttyACM')]
+        self.record('open', baudrate)
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.record('close')
+
+    def write(self, data):
+        self.record('write', data)
+        if self.reply:
+            reply = self.reply(data)
+            if reply is not None:
+                self.replies.append(reply)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def readline(self, *args):
+        if self.replies:
+            return self.replies.pop(0)
+        return ''
+
+    def read(self, size=1):
+        return self.readline()[:size]
+
+    def inWaiting(self):
+        return sum(map(len, self.replies))
+
+    # control lines
+    def setDTR(self, level=1): self.record('dtr', level)
+    def setRTS(self, level=1): self.record('rts', level)
+    def getCTS(self): return True
+    def getDSR(self): return True
+
+
+#____ pyusb _____________________________________________________________________
+
+class UsbHandle(Transport):
+
+    def __init__(self, device):
+        Transport.__init__(self, 'usb%04x:%04x' % (device.idVendor, device.idProduct))
+
+    def getString(self, index, length):
+        return 'Virtual FT232R'
+
+    def controlMsg(self, requestType, request, buffer, value=0, index=0, timeout=100):
+        self.record('control', (requestType, request, value, index))
+        return buffer
+
+    def bulkWrite(self, endpoint, data, timeout=100):
+        if not isinstance(data, str):
+            data = ''.join(map(chr, data))
+        self.record('write', data)
+        return len(data)
+
+    def bulkRead(self, endpoint, size, timeout=100):
+        return ()
+
+
+class UsbDevice(object):
+
+    def __init__(self, idVendor=0x0403, idProduct=0x6001):
+        self.idVendor = idVendor
+        self.idProduct = idProduct
+
+    def open(self):
+        return UsbHandle(self)
+
+
+class UsbBus(object):
+
+    def __init__(self, devices):
+        self.devices = devices
+
+
+# four FTDI adapters is plenty for the dev= arguments in use
+usbBusses = [ UsbBus([ UsbDevice() for i in xrange(4) ]) ]
+
+
+#____ installation ______________________________________________________________
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+def install():
+    """
+    Replace pyparallel, pySerial, pyusb and the ppdev devices with fakes.
+    """
+    sys.modules['parallel'] = _module('parallel', Parallel=Parallel)
+    sys.modules['serial'] = _module('serial', Serial=Serial,
+                                    PARITY_NONE='N', PARITY_EVEN='E', PARITY_ODD='O',
+                                    SerialException=IOError)
+    sys.modules['usb'] = _module('usb', busses=lambda: usbBusses)
+
+    os.open = _open
+    os.write = _write
+    os.close = _close
+    if fcntl:
+        fcntl.ioctl = _ioctl
+
+def uninstall():
+    """
+    Put the real os and fcntl functions back. Drivers already imported keep
+    the fake modules.
+    """
+    for name in ('parallel', 'serial', 'usb'):
+        sys.modules.pop(name, None)
+    os.open = _os['open']
+    os.write = _os['write']
+    os.close = _os['close']
+    if fcntl:
+        fcntl.ioctl = _os['ioctl']